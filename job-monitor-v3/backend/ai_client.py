@@ -1,10 +1,13 @@
+import asyncio
 import os
-import random
+import threading
 import time
-from groq import Groq
+from groq import Groq, AsyncGroq
 import httpx
 from dotenv import load_dotenv
 
+import metrics
+
 load_dotenv()
 
 # Load all available Groq keys
@@ -17,38 +20,350 @@ for i in range(1, 10):
 if not GROQ_KEYS and os.getenv("GROQ_API_KEY"):
     GROQ_KEYS.append(os.getenv("GROQ_API_KEY"))
 
-_groq_clients = [Groq(api_key=key) for key in GROQ_KEYS]
+# Per-key quota (Groq free tier defaults) and scheduler behaviour.
+GROQ_RPM_PER_KEY = int(os.getenv("GROQ_RPM_PER_KEY", "30"))
+GROQ_TPM_PER_KEY = int(os.getenv("GROQ_TPM_PER_KEY", "6000"))
+GROQ_COOLDOWN_SECS = float(os.getenv("GROQ_COOLDOWN_SECS", "60"))
+# Longest a caller will wait for any key to have headroom before giving up.
+GROQ_MAX_WAIT_SECS = float(os.getenv("GROQ_MAX_WAIT_SECS", "30"))
+# Completion tokens reserved up front; corrected from response usage afterwards.
+GROQ_EST_COMPLETION_TOKENS = 300
+# Per-call HTTP timeout, and how many async generations may be in flight at once.
+GROQ_TIMEOUT_SECS = float(os.getenv("GROQ_TIMEOUT_SECS", "60"))
+GROQ_MAX_CONCURRENCY = int(os.getenv("GROQ_MAX_CONCURRENCY", "8"))
+
+
+class _KeySlot:
+    """One Groq key: request/token buckets, 429 cooldown and health counters."""
+
+    def __init__(self, index, api_key):
+        self.index = index
+        # Exported as a Prometheus label and in /system/health: never include key material.
+        self.label = f"key{index + 1}"
+        # Retries are driven by the scheduler, not the SDK's own backoff.
+        self.client = Groq(api_key=api_key, max_retries=0, timeout=GROQ_TIMEOUT_SECS)
+        self.async_client = AsyncGroq(api_key=api_key, max_retries=0, timeout=GROQ_TIMEOUT_SECS)
+        self.requests = float(GROQ_RPM_PER_KEY)
+        self.tokens = float(GROQ_TPM_PER_KEY)
+        self.refilled_at = time.monotonic()
+        self.cooldown_until = 0.0
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.throttled = 0
+        self.latency_total = 0.0
+
+    def refill(self, now):
+        elapsed = now - self.refilled_at
+        self.refilled_at = now
+        self.requests = min(GROQ_RPM_PER_KEY, self.requests + elapsed * GROQ_RPM_PER_KEY / 60.0)
+        self.tokens = min(GROQ_TPM_PER_KEY, self.tokens + elapsed * GROQ_TPM_PER_KEY / 60.0)
+
+    def headroom(self):
+        """Fraction of the tighter of the two budgets still available."""
+        return min(self.requests / GROQ_RPM_PER_KEY, self.tokens / GROQ_TPM_PER_KEY)
+
+    def wait_for(self, now, est_tokens):
+        """Seconds until this key could serve a request of est_tokens."""
+        wait = max(0.0, self.cooldown_until - now)
+        if self.requests < 1:
+            wait = max(wait, (1 - self.requests) * 60.0 / GROQ_RPM_PER_KEY)
+        if self.tokens < est_tokens:
+            wait = max(wait, (est_tokens - self.tokens) * 60.0 / GROQ_TPM_PER_KEY)
+        return wait
+
+
+_slots = [_KeySlot(i, key) for i, key in enumerate(GROQ_KEYS)]
+_scheduler_lock = threading.Lock()
+
+
+def _estimate_tokens(prompt: str) -> int:
+    return len(prompt) // 4 + GROQ_EST_COMPLETION_TOKENS
+
+
+def _try_acquire(est_tokens: int):
+    """Reserve budget on the key with the most headroom. Returns (slot, 0) or (None, seconds to wait)."""
+    with _scheduler_lock:
+        now = time.monotonic()
+        for slot in _slots:
+            slot.refill(now)
+        ready = [s for s in _slots if s.wait_for(now, est_tokens) == 0]
+        if ready:
+            slot = max(ready, key=lambda s: s.headroom())
+            slot.requests -= 1
+            slot.tokens -= est_tokens
+            slot.calls += 1
+            return slot, 0.0
+        return None, min(s.wait_for(now, est_tokens) for s in _slots)
+
+
+def _acquire_slot(est_tokens: int, max_wait: float = GROQ_MAX_WAIT_SECS):
+    """Reserve budget on the key with the most headroom, waiting if every key is exhausted.
+
+    Returns None if no key frees up within max_wait.
+    """
+    deadline = time.monotonic() + max_wait
+    # A request bigger than a whole minute's token budget can never fit; cap the reservation.
+    est_tokens = min(est_tokens, GROQ_TPM_PER_KEY)
+    while True:
+        slot, wait = _try_acquire(est_tokens)
+        if slot is not None:
+            return slot
+        if time.monotonic() + wait > deadline:
+            return None
+        time.sleep(min(wait, 1.0))
+
+
+async def _acquire_slot_async(est_tokens: int, max_wait: float = GROQ_MAX_WAIT_SECS):
+    """_acquire_slot for the event loop: waits with asyncio.sleep instead of blocking a thread."""
+    deadline = time.monotonic() + max_wait
+    est_tokens = min(est_tokens, GROQ_TPM_PER_KEY)
+    while True:
+        slot, wait = _try_acquire(est_tokens)
+        if slot is not None:
+            return slot
+        if time.monotonic() + wait > deadline:
+            return None
+        await asyncio.sleep(min(wait, 1.0))
+
+
+def _retry_after(error) -> float:
+    """Seconds from a 429's retry-after header, or the default cooldown."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return GROQ_COOLDOWN_SECS
+
+
+def _record_success(slot, model, started, est_tokens, usage):
+    elapsed = time.monotonic() - started
+    metrics.GROQ_LATENCY.observe(elapsed, model=model, key=slot.label, outcome="success")
+    with _scheduler_lock:
+        slot.successes += 1
+        slot.latency_total += elapsed
+        actual = getattr(usage, "total_tokens", None)
+        if actual is not None:
+            slot.tokens += est_tokens - actual
+
+
+def _record_throttle(slot, model, started, error):
+    metrics.GROQ_LATENCY.observe(time.monotonic() - started, model=model, key=slot.label, outcome="throttled")
+    with _scheduler_lock:
+        slot.throttled += 1
+        slot.cooldown_until = time.monotonic() + _retry_after(error)
+
+
+def _record_failure(slot, model, started):
+    metrics.GROQ_LATENCY.observe(time.monotonic() - started, model=model, key=slot.label, outcome="error")
+    with _scheduler_lock:
+        slot.failures += 1
+
+
+def _release_unused(slot, est_tokens):
+    """A call was cancelled before Groq answered: give its reservation back."""
+    with _scheduler_lock:
+        slot.calls -= 1
+        slot.requests = min(GROQ_RPM_PER_KEY, slot.requests + 1)
+        slot.tokens = min(GROQ_TPM_PER_KEY, slot.tokens + est_tokens)
+
 
 def get_groq_client():
-    if not _groq_clients:
+    """Client for the key with the most headroom right now (no budget is reserved)."""
+    if not _slots:
         return None
-    return random.choice(_groq_clients)
+    with _scheduler_lock:
+        now = time.monotonic()
+        for slot in _slots:
+            slot.refill(now)
+        available = [s for s in _slots if s.cooldown_until <= now] or _slots
+        return max(available, key=lambda s: s.headroom()).client
+
+
+def get_key_stats():
+    """Per-key health: budgets, cooldown and success/latency/throttle counters."""
+    with _scheduler_lock:
+        now = time.monotonic()
+        stats = []
+        for slot in _slots:
+            slot.refill(now)
+            stats.append({
+                "key": slot.label,
+                "calls": slot.calls,
+                "successes": slot.successes,
+                "failures": slot.failures,
+                "throttled": slot.throttled,
+                "avg_latency_sec": round(slot.latency_total / slot.successes, 3) if slot.successes else None,
+                "requests_available": round(slot.requests, 1),
+                "tokens_available": int(slot.tokens),
+                "cooldown_remaining_sec": round(max(0.0, slot.cooldown_until - now), 1),
+            })
+        return stats
+
+
+def _is_rate_limit(error) -> bool:
+    err_msg = str(error)
+    return getattr(error, "status_code", None) == 429 or "429" in err_msg or "rate limit" in err_msg.lower()
+
 
 def generate_with_retry(prompt: str, is_json: bool = False, max_retries: int = 3, model: str = "llama-3.3-70b-versatile"):
     """
     Unified interface to generate completions.
-    Handles rotating Groq keys automatically via random.choice and retries on 429.
+    Each attempt goes to the key with the most request/token headroom; a 429 puts
+    that key in cooldown (honouring retry-after) and the next attempt uses another key.
     """
-    # Default to Groq
+    if not _slots:
+        return "{}" if is_json else "Error: No API keys configured"
+
+    est_tokens = _estimate_tokens(prompt)
     for attempt in range(max_retries):
+        slot = _acquire_slot(est_tokens)
+        if slot is None:
+            break
+        started = time.monotonic()
         try:
-            client = get_groq_client()
-            if not client:
-                return "{}" if is_json else "Error: No API keys configured"
-                
-            completion = client.chat.completions.create(
+            completion = slot.client.chat.completions.create(
                 model=model,
                 messages=[{"role": "user", "content": prompt}],
                 response_format={"type": "json_object"} if is_json else None
             )
+            _record_success(slot, model, started, est_tokens, getattr(completion, "usage", None))
             return completion.choices[0].message.content
         except Exception as e:
-            err_msg = str(e)
-            if "429" in err_msg or "rate limit" in err_msg.lower():
-                print(f"[Attempt {attempt+1}/{max_retries}] Groq rate limit hit. Retrying...")
-                time.sleep(1 + attempt)
+            if _is_rate_limit(e):
+                _record_throttle(slot, model, started, e)
+                print(f"[Attempt {attempt+1}/{max_retries}] Groq rate limit on {slot.label}. Cooling down.")
                 continue
-            print(f"Groq API Error: {err_msg}")
+            _record_failure(slot, model, started)
+            print(f"Groq API Error: {e}")
             return "{}" if is_json else "Error generating response"
-            
+
+    return "{}" if is_json else "Error: Rate limit exceeded on all keys."
+
+
+_semaphore = None
+_in_flight = 0
+
+
+def _get_semaphore():
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(GROQ_MAX_CONCURRENCY)
+    return _semaphore
+
+
+def get_async_stats():
+    return {"in_flight": _in_flight, "max_concurrency": GROQ_MAX_CONCURRENCY, "timeout_sec": GROQ_TIMEOUT_SECS}
+
+
+async def generate_with_retry_async(prompt: str, is_json: bool = False, max_retries: int = 3,
+                                    model: str = "llama-3.3-70b-versatile", timeout: float = GROQ_TIMEOUT_SECS):
+    """
+    generate_with_retry on AsyncGroq, for async endpoints: same key rotation and
+    budgets, no thread held for the round trip. At most GROQ_MAX_CONCURRENCY calls
+    run at once, each attempt bounded by `timeout` seconds; cancelling the caller (e.g. the
+    HTTP client went away) aborts the request.
+    """
+    global _in_flight
+    if not _slots:
+        return "{}" if is_json else "Error: No API keys configured"
+
+    est_tokens = _estimate_tokens(prompt)
+    async with _get_semaphore():
+        _in_flight += 1
+        try:
+            for attempt in range(max_retries):
+                slot = await _acquire_slot_async(est_tokens)
+                if slot is None:
+                    break
+                started = time.monotonic()
+                try:
+                    completion = await slot.async_client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        response_format={"type": "json_object"} if is_json else None,
+                        timeout=timeout,
+                    )
+                    _record_success(slot, model, started, est_tokens, getattr(completion, "usage", None))
+                    return completion.choices[0].message.content
+                except asyncio.CancelledError:
+                    _release_unused(slot, est_tokens)
+                    raise
+                except Exception as e:
+                    if _is_rate_limit(e):
+                        _record_throttle(slot, model, started, e)
+                        print(f"[Attempt {attempt+1}/{max_retries}] Groq rate limit on {slot.label}. Cooling down.")
+                        continue
+                    _record_failure(slot, model, started)
+                    print(f"Groq API Error: {e}")
+                    return "{}" if is_json else "Error generating response"
+        finally:
+            _in_flight -= 1
+
     return "{}" if is_json else "Error: Rate limit exceeded on all keys."
+
+
+class GenerationError(Exception):
+    """stream_with_retry_async could not produce a completion."""
+
+
+async def stream_with_retry_async(prompt: str, max_retries: int = 3,
+                                  model: str = "llama-3.3-70b-versatile", timeout: float = GROQ_TIMEOUT_SECS):
+    """
+    Streaming generate_with_retry_async: an async generator of text deltas as the
+    model produces them. Rate-limited attempts move to another key only until the
+    stream has started. Raises GenerationError on failure. Holds a concurrency
+    slot until the stream ends or the generator is closed.
+    """
+    global _in_flight
+    if not _slots:
+        raise GenerationError("No API keys configured")
+
+    est_tokens = _estimate_tokens(prompt)
+    async with _get_semaphore():
+        _in_flight += 1
+        try:
+            for attempt in range(max_retries):
+                slot = await _acquire_slot_async(est_tokens)
+                if slot is None:
+                    break
+                started = time.monotonic()
+                try:
+                    stream = await slot.async_client.chat.completions.create(
+                        model=model,
+                        messages=[{"role": "user", "content": prompt}],
+                        stream=True,
+                        timeout=timeout,
+                    )
+                except asyncio.CancelledError:
+                    _release_unused(slot, est_tokens)
+                    raise
+                except Exception as e:
+                    if _is_rate_limit(e):
+                        _record_throttle(slot, model, started, e)
+                        print(f"[Attempt {attempt+1}/{max_retries}] Groq rate limit on {slot.label}. Cooling down.")
+                        continue
+                    _record_failure(slot, model, started)
+                    print(f"Groq API Error: {e}")
+                    raise GenerationError("Error generating response") from e
+
+                usage = None
+                async with stream:
+                    try:
+                        async for chunk in stream:
+                            # Groq reports usage on the last chunk under x_groq.
+                            usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                            delta = chunk.choices[0].delta.content if chunk.choices else None
+                            if delta:
+                                yield delta
+                    except Exception as e:
+                        _record_failure(slot, model, started)
+                        print(f"Groq stream error: {e}")
+                        raise GenerationError("Generation interrupted") from e
+                _record_success(slot, model, started, est_tokens, usage)
+                return
+        finally:
+            _in_flight -= 1
+
+    raise GenerationError("Rate limit exceeded on all keys.")
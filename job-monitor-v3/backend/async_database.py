@@ -0,0 +1,253 @@
+"""
+Async counterpart of database.get_read_connection / get_write_connection,
+for code running on the event loop.
+
+Postgres uses a native asyncpg pool. SQLite has no async driver, so each
+async connection is bound to one of ASYNC_DB_THREADS single-thread
+executors: statements run on that thread (reusing database's thread-local
+connection and DB_WRITE_LOCK), the loop only awaits them, and at most
+ASYNC_DB_THREADS connections are open at once.
+
+Queries use the same '?' placeholders as the sync API.
+"""
+import asyncio
+import itertools
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator
+
+import database
+import metrics
+from database import DATABASE_URL, DB_POOL_MIN, DB_POOL_TIMEOUT
+
+ASYNC_DB_THREADS = int(os.getenv("ASYNC_DB_THREADS", "4"))
+# asyncpg pool size. It is separate from database's psycopg2 pool, so the app can hold
+# up to DB_POOL_MAX + DB_ASYNC_POOL_MAX Postgres connections in total.
+DB_ASYNC_POOL_MAX = int(os.getenv("DB_ASYNC_POOL_MAX", "10"))
+
+_PLACEHOLDER = re.compile(r"\?")
+_WRAPPER_MODULES = frozenset({__name__, "contextlib"})
+
+_stats = {"checkouts": 0, "in_use": 0, "peak_in_use": 0, "timeouts": 0}
+
+
+def _to_asyncpg(query: str) -> str:
+    """Translate '?' placeholders to asyncpg's $1, $2, ..."""
+    counter = itertools.count(1)
+    return _PLACEHOLDER.sub(lambda _: f"${next(counter)}", query)
+
+
+def _checked_out() -> None:
+    _stats["checkouts"] += 1
+    _stats["in_use"] += 1
+    _stats["peak_in_use"] = max(_stats["peak_in_use"], _stats["in_use"])
+
+
+class _SqliteConnection:
+    """Runs every statement on the executor thread that owns the sqlite3 connection."""
+
+    def __init__(self, executor, conn):
+        self._executor = executor
+        self._conn = conn
+
+    async def _run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def fetchall(self, query: str, params=()) -> list:
+        return await self._run(lambda: self._conn.execute(query, tuple(params)).fetchall())
+
+    async def fetchone(self, query: str, params=()):
+        return await self._run(lambda: self._conn.execute(query, tuple(params)).fetchone())
+
+    async def fetchval(self, query: str, params=()):
+        row = await self.fetchone(query, params)
+        return row[0] if row is not None else None
+
+    async def execute(self, query: str, params=()) -> int:
+        """Run a statement; returns the affected row count."""
+        return await self._run(lambda: self._conn.execute(query, tuple(params)).rowcount)
+
+    async def executemany(self, query: str, rows) -> int:
+        rows = [tuple(r) for r in rows]
+        return await self._run(lambda: self._conn.executemany(query, rows).rowcount)
+
+
+class _PostgresConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    async def fetchall(self, query: str, params=()) -> list:
+        return await self._conn.fetch(_to_asyncpg(query), *params)
+
+    async def fetchone(self, query: str, params=()):
+        return await self._conn.fetchrow(_to_asyncpg(query), *params)
+
+    async def fetchval(self, query: str, params=()):
+        return await self._conn.fetchval(_to_asyncpg(query), *params)
+
+    async def execute(self, query: str, params=()) -> int:
+        """Run a statement; returns the affected row count."""
+        status = await self._conn.execute(_to_asyncpg(query), *params)
+        count = status.rsplit(" ", 1)[-1]
+        return int(count) if count.isdigit() else 0
+
+    async def executemany(self, query: str, rows) -> int:
+        rows = [tuple(r) for r in rows]
+        await self._conn.executemany(_to_asyncpg(query), rows)
+        return len(rows)
+
+
+class _SqliteExecutors:
+    """ASYNC_DB_THREADS single-thread executors handed out one per async connection."""
+
+    def __init__(self):
+        self._free = None
+        self._all = []
+
+    def _queue(self) -> asyncio.Queue:
+        if self._free is None:
+            self._free = asyncio.Queue()
+            for n in range(ASYNC_DB_THREADS):
+                executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"async-db-{n}")
+                self._all.append(executor)
+                self._free.put_nowait(executor)
+        return self._free
+
+    async def acquire(self):
+        try:
+            return await asyncio.wait_for(self._queue().get(), timeout=DB_POOL_TIMEOUT)
+        except asyncio.TimeoutError:
+            _stats["timeouts"] += 1
+            raise TimeoutError(f"No async database connection available within {DB_POOL_TIMEOUT}s")
+
+    def release(self, executor) -> None:
+        self._queue().put_nowait(executor)
+
+    def close(self) -> None:
+        for executor in self._all:
+            # Thread-local connections can only be closed from their own thread.
+            executor.submit(database.close_pool)
+            executor.shutdown(wait=True)
+        self._all.clear()
+        self._free = None
+
+
+_executors = _SqliteExecutors()
+_pg_pool = None
+_pg_pool_lock = None
+
+
+async def _get_pg_pool():
+    global _pg_pool, _pg_pool_lock
+    if _pg_pool is None:
+        if _pg_pool_lock is None:
+            _pg_pool_lock = asyncio.Lock()
+        async with _pg_pool_lock:
+            if _pg_pool is None:
+                import asyncpg
+                _pg_pool = await asyncpg.create_pool(
+                    DATABASE_URL, min_size=min(DB_POOL_MIN, DB_ASYNC_POOL_MAX), max_size=DB_ASYNC_POOL_MAX
+                )
+    return _pg_pool
+
+
+async def _finish_sqlite(executor, cm, exc_info, entering=None) -> None:
+    """Close the sync context on its own thread, then hand the executor back."""
+    loop = asyncio.get_running_loop()
+    try:
+        if entering is not None:
+            try:
+                await entering
+            except BaseException:
+                return  # never entered, nothing to undo
+        await loop.run_in_executor(executor, cm.__exit__, *exc_info)
+    finally:
+        _stats["in_use"] -= 1
+        _executors.release(executor)
+
+
+@asynccontextmanager
+async def _sqlite_connection(role: str, site: str) -> AsyncGenerator[Any, None]:
+    executor = await _executors.acquire()
+    _checked_out()
+    loop = asyncio.get_running_loop()
+    cm = database.get_read_connection(site) if role == "read" else database.get_write_connection(site)
+    entering = loop.run_in_executor(executor, cm.__enter__)
+    try:
+        conn = await asyncio.shield(entering)
+    except asyncio.CancelledError:
+        # The thread may still open the connection (and take DB_WRITE_LOCK); undo it once it has.
+        asyncio.ensure_future(_finish_sqlite(executor, cm, (None, None, None), entering))
+        raise
+    except BaseException:
+        _stats["in_use"] -= 1
+        _executors.release(executor)
+        raise
+
+    exc_info = (None, None, None)
+    try:
+        yield _SqliteConnection(executor, conn)
+    except BaseException as e:
+        exc_info = (type(e), e, e.__traceback__)
+        raise
+    finally:
+        # Shielded so a cancellation can't leave a transaction (or the write lock) open.
+        await asyncio.shield(_finish_sqlite(executor, cm, exc_info))
+
+
+@asynccontextmanager
+async def get_async_read_connection() -> AsyncGenerator[Any, None]:
+    """Async pooled connection for reading."""
+    site = metrics.call_site(_WRAPPER_MODULES)
+    if DATABASE_URL:
+        pool = await _get_pg_pool()
+        async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+            _checked_out()
+            started = time.perf_counter()
+            try:
+                yield _PostgresConnection(conn)
+            finally:
+                metrics.DB_SECONDS.observe(time.perf_counter() - started, site=site, role="read")
+                _stats["in_use"] -= 1
+    else:
+        async with _sqlite_connection("read", site) as conn:
+            yield conn
+
+
+@asynccontextmanager
+async def get_async_write_connection() -> AsyncGenerator[Any, None]:
+    """Async pooled connection for writing. Commits on success, rolls back on error."""
+    site = metrics.call_site(_WRAPPER_MODULES)
+    if DATABASE_URL:
+        pool = await _get_pg_pool()
+        async with pool.acquire(timeout=DB_POOL_TIMEOUT) as conn:
+            _checked_out()
+            started = time.perf_counter()
+            try:
+                async with conn.transaction():
+                    yield _PostgresConnection(conn)
+            finally:
+                metrics.DB_SECONDS.observe(time.perf_counter() - started, site=site, role="write")
+                _stats["in_use"] -= 1
+    else:
+        async with _sqlite_connection("write", site) as conn:
+            yield conn
+
+
+def get_async_pool_stats() -> dict:
+    stats = dict(_stats)
+    stats["backend"] = "asyncpg" if DATABASE_URL else "sqlite-threads"
+    stats["max_size"] = DB_ASYNC_POOL_MAX if DATABASE_URL else ASYNC_DB_THREADS
+    return stats
+
+
+async def close_async_pool() -> None:
+    """Close the asyncpg pool / SQLite executor threads (application shutdown)."""
+    global _pg_pool
+    if _pg_pool is not None:
+        await _pg_pool.close()
+        _pg_pool = None
+    _executors.close()
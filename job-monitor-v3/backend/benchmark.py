@@ -0,0 +1,584 @@
+"""
+Reproducible benchmark harness.
+
+    python benchmark.py                                  # SQLite; 10k, 100k and 1M seeded leads
+    python benchmark.py --rows 10000 --out bench.json
+    python benchmark.py --database-url postgresql://localhost/jobmonitor_bench
+    python benchmark.py --groq-latency-ms 400 --groq-429-rate 0.05
+
+Each row count runs in a fresh child process against an empty database: a
+temporary SQLite file, or the given Postgres database, whose app tables are
+DROPPED first (point it at a scratch database). The child serves fake RSS/JSON
+sources and a Groq-compatible endpoint on localhost, seeds job_leads, then
+drives run_all_fetchers, POST /leads/ingest plus the ingest worker,
+ai_analysis_worker and GET /leads. It reports throughput, p50/p95/p99 latency
+and peak RSS as JSON. All inputs derive from --seed, and the output records the
+commit and settings, so runs can be compared across commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BENCH_API_KEY = "bench_api_key"
+BASE_TIME = datetime(2026, 1, 1)
+
+WORDS = (
+    "python django react api backend frontend data pipeline etl dashboard marketing seo growth "
+    "campaign brand strategy content social ads funnel conversion automation zapier scraping "
+    "crawler bot integration cloud aws devops docker kubernetes startup saas b2b ecommerce "
+    "shopify wordpress design figma ui ux mobile flutter analytics sql reporting consultant "
+    "executive operations finance budget launch audit migration optimization ai llm chatbot"
+).split()
+
+
+# --- Inputs -----------------------------------------------------------------
+
+def _text(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def _job(rng, source, external_id):
+    """One synthetic posting; the description is long enough to be fingerprinted."""
+    return {
+        "source": source,
+        "external_id": external_id,
+        "title": f"{_text(rng, 3).title()} needed ({external_id})",
+        "description": f"{external_id} {_text(rng, rng.randint(30, 80))}",
+        "url": f"https://example.test/{source}/{external_id}",
+        "company": f"Company {rng.randint(1, 500)}",
+        "budget": f"${rng.randint(1, 100) * 50}",
+    }
+
+
+def _feed_items(seed, index, count):
+    rng = random.Random(f"{seed}:feed:{index}")
+    return [_job(rng, f"bench_feed_{index}", f"f{index}-{i}") for i in range(count)]
+
+
+def _rss(items):
+    entries = "".join(
+        f"<item><guid>{it['external_id']}</guid><title>{it['title']}</title>"
+        f"<link>{it['url']}</link><description>{it['description']}</description></item>"
+        for it in items
+    )
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>bench</title>{entries}</channel></rss>'.encode()
+
+
+def _percentiles(samples):
+    if not samples:
+        return {"count": 0, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    ordered = sorted(samples)
+
+    def rank(p):
+        return round(ordered[min(len(ordered) - 1, max(0, int(len(ordered) * p + 0.5) - 1))] * 1000, 3)
+
+    return {"count": len(ordered), "p50_ms": rank(0.50), "p95_ms": rank(0.95), "p99_ms": rank(0.99),
+            "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+# --- Local stand-ins ----------------------------------------------------------
+
+class FakeServices:
+    """RSS feeds, JSON APIs and a Groq-compatible chat endpoint on one localhost port."""
+
+    def __init__(self, args):
+        self.args = args
+        self.rng = random.Random(f"{args['seed']}:groq")
+        self.lock = threading.Lock()
+        self.groq_calls = 0
+        self.groq_throttled = 0
+        self.bodies = {}
+        half = args["sources"] // 2
+        for i in range(args["sources"]):
+            items = _feed_items(args["seed"], i, args["feed_items"])
+            if i < half:
+                self.bodies[f"/rss/{i}"] = ("application/rss+xml", _rss(items))
+            else:
+                self.bodies[f"/api/{i}"] = ("application/json", json.dumps({"items": items}).encode())
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body=b"", content_type="application/json", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path not in services.bodies:
+                    return self._send(404)
+                content_type, body = services.bodies[path]
+                etag = f'"{hash(body) & 0xffffffff:x}"'
+                if self.headers.get("If-None-Match") == etag:
+                    return self._send(304, headers={"ETag": etag})
+                self._send(200, body, content_type, {"ETag": etag})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"{}")
+                status, body, headers = services.chat_completion(request)
+                self._send(status, json.dumps(body).encode(), headers=headers)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def chat_completion(self, request):
+        with self.lock:
+            self.groq_calls += 1
+            throttled = self.rng.random() < self.args["groq_429_rate"]
+            delay = self.args["groq_latency_ms"] / 1000 * self.rng.uniform(0.5, 1.5)
+            if throttled:
+                self.groq_throttled += 1
+        time.sleep(delay)
+        if throttled:
+            return 429, {"error": {"message": "Rate limit reached", "type": "tokens"}}, \
+                {"retry-after": str(self.args["groq_retry_after"])}
+        prompt = request["messages"][-1]["content"]
+        content = json.dumps(self._classification(prompt))
+        return 200, {
+            "id": "chatcmpl-bench", "object": "chat.completion", "created": int(time.time()),
+            "model": request.get("model"),
+            "choices": [{"index": 0, "finish_reason": "stop",
+                         "message": {"role": "assistant", "content": content}}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 40,
+                      "total_tokens": len(prompt) // 4 + 40},
+        }, {}
+
+    def _classification(self, prompt):
+        from config import AGENCY_CONTEXT
+        agencies = list(AGENCY_CONTEXT) + ["reject"]
+
+        def one(text):
+            rng = random.Random(text)
+            return {"agency": rng.choice(agencies), "confidence": round(rng.uniform(0.5, 1), 2),
+                    "score": rng.randint(1, 100)}
+
+        if '"results"' in prompt:
+            jobs = prompt.split("JOB ")[1:]
+            return {"results": [dict(one(job), job=i) for i, job in enumerate(jobs)]}
+        return one(prompt)
+
+    def close(self):
+        self.server.shutdown()
+
+
+# --- Child: one row count ------------------------------------------------------
+
+def _reset_postgres(url):
+    import psycopg2
+    conn = psycopg2.connect(url)
+    conn.autocommit = True
+    cur = conn.cursor()
+    cur.execute("""
+        DROP TABLE IF EXISTS job_leads, job_sources, system_metrics, contacts, classification_cache,
+            ingest_queue, lead_changes, schema_migrations CASCADE
+    """)
+    cur.execute("DROP FUNCTION IF EXISTS record_lead_change() CASCADE")
+    conn.close()
+
+
+def _seed(rows, seed):
+    """Bulk-insert `rows` already-scored leads, outside any timed phase."""
+    from database import get_write_connection, DATABASE_URL
+    rng = random.Random(f"{seed}:seed")
+    agencies = ["ascend", "apex", "socketlogic", "unassigned"]
+    columns = ("id", "source", "external_id", "title", "description", "url", "budget", "company",
+               "posted_at", "agency_match", "match_score", "ai_confidence", "status", "created_at",
+               "scored_at", "fingerprinted_at")
+    now = datetime.now().isoformat()
+    chunk = 5000
+    for start in range(0, rows, chunk):
+        batch = []
+        for i in range(start, min(rows, start + chunk)):
+            source = f"bench_seed_{i % 8}"
+            batch.append((
+                f"{source}_{i}", source, str(i), f"{_text(rng, 3).title()} role", _text(rng, 12),
+                f"https://example.test/{i}", f"${rng.randint(1, 100) * 50}", f"Company {i % 500}",
+                (BASE_TIME - timedelta(minutes=i)).isoformat(), rng.choice(agencies),
+                rng.randint(1, 100), round(rng.random(), 2), "new", now, now, now,
+            ))
+        with get_write_connection() as conn:
+            cur = conn.cursor()
+            if DATABASE_URL:
+                from psycopg2.extras import execute_values
+                execute_values(cur, f"INSERT INTO job_leads ({', '.join(columns)}) VALUES %s", batch, page_size=chunk)
+            else:
+                cur.executemany(
+                    f"INSERT INTO job_leads ({', '.join(columns)}) VALUES ({', '.join('?' for _ in columns)})", batch
+                )
+
+
+def _add_sources(services, count):
+    from database import get_write_connection, _translate_params
+    api_config = json.dumps({"root_key": "items", "id_key": "external_id", "title_key": "title",
+                             "desc_key": "description", "url_key": "url", "company_key": "company"})
+    rows = []
+    for i in range(count):
+        kind = "rss" if f"/rss/{i}" in services.bodies else "api"
+        rows.append((f"bench_{kind}_{i}", f"bench_feed_{i}", kind, f"{services.url}/{kind}/{i}",
+                     api_config if kind == "api" else "{}"))
+    with get_write_connection() as conn:
+        conn.cursor().executemany(
+            _translate_params("INSERT INTO job_sources (id, name, type, url, parsing_config) VALUES (?, ?, ?, ?, ?)"), rows
+        )
+
+
+def _unscored():
+    import scoring
+    from database import get_read_connection
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(f"SELECT count(*) AS cnt FROM job_leads WHERE {scoring.UNSCORED_PREDICATE}")
+        row = cur.fetchone()
+        return row["cnt"] if isinstance(row, dict) else row[0]
+
+
+def _bench_fetch():
+    import fetchers
+    import metrics
+    results = {}
+    for run in ("cold", "steady"):
+        before = metrics.SOURCE_FETCH_SECONDS.snapshot()
+        leads_before = metrics.SOURCE_LEADS.total()
+        started = time.perf_counter()
+        errors = [e for e in fetchers.run_all_fetchers() if e.startswith("error:")]
+        elapsed = time.perf_counter() - started
+        per_source = [
+            total - before.get(key, (0, 0.0))[1]
+            for key, (count, total) in metrics.SOURCE_FETCH_SECONDS.snapshot().items()
+            if count > before.get(key, (0, 0.0))[0]
+        ]
+        saved = metrics.SOURCE_LEADS.total() - leads_before
+        results[run] = {
+            "elapsed_sec": round(elapsed, 3),
+            "leads_saved": saved,
+            "leads_per_sec": round(saved / elapsed, 1) if elapsed else None,
+            "errors": len(errors),
+            "source_latency": _percentiles(per_source),
+        }
+    return results
+
+
+async def _bench_ingest(client, args):
+    import ingest_queue
+    from config import INGEST_BATCH_SIZE
+    rng = random.Random(f"{args['seed']}:ingest")
+    batches = [
+        [_job(rng, "bench_ingest", f"i{r}-{j}") for j in range(args["ingest_batch"])]
+        for r in range(args["ingest_requests"])
+    ]
+    latencies, statuses = [], {}
+    gate = asyncio.Semaphore(args["concurrency"])
+
+    async def post(jobs):
+        async with gate:
+            started = time.perf_counter()
+            resp = await client.post("/leads/ingest", json={"jobs": jobs})
+            latencies.append(time.perf_counter() - started)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(post(jobs) for jobs in batches))
+    accept_elapsed = time.perf_counter() - started
+
+    queued = ingest_queue.depth()
+    started = time.perf_counter()
+    while await asyncio.to_thread(ingest_queue.process_batch, INGEST_BATCH_SIZE):
+        pass
+    drain_elapsed = time.perf_counter() - started
+    return {
+        "requests": len(batches),
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "accept_jobs_per_sec": round(sum(len(b) for b in batches) / accept_elapsed, 1),
+        "request_latency": _percentiles(latencies),
+        "drained_jobs": queued,
+        "drain_elapsed_sec": round(drain_elapsed, 3),
+        "drain_jobs_per_sec": round(queued / drain_elapsed, 1) if drain_elapsed else None,
+    }
+
+
+async def _bench_scoring(args, services):
+    import main
+    import metrics
+    import scoring
+    from database import get_read_connection, _translate_params
+
+    pending = await asyncio.to_thread(_unscored)
+    classified_before = {key: value for _, key, value in metrics.LEADS_CLASSIFIED.samples()}
+    calls_before, throttled_before = services.groq_calls, services.groq_throttled
+    phase_start = datetime.now()
+    started = time.perf_counter()
+    tasks = [asyncio.create_task(main.ai_analysis_worker(n)) for n in range(scoring.worker_count())]
+    remaining = pending
+    while remaining and time.perf_counter() - started < args["scoring_timeout"]:
+        await asyncio.sleep(0.25)
+        remaining = await asyncio.to_thread(_unscored)
+    elapsed = time.perf_counter() - started
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+    # Time from the start of the phase until each lead's score was written.
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_translate_params("SELECT scored_at FROM job_leads WHERE scored_at >= ?"), (phase_start.isoformat(),))
+        waits = [(datetime.fromisoformat(r["scored_at"]) - phase_start).total_seconds() for r in cur.fetchall()]
+    scored = pending - remaining
+    return {
+        "workers": len(tasks),
+        "leads": pending,
+        "scored": scored,
+        "timed_out": bool(remaining),
+        "elapsed_sec": round(elapsed, 3),
+        "leads_per_sec": round(scored / elapsed, 1) if elapsed else None,
+        "time_to_score": _percentiles(waits),
+        "groq_calls": services.groq_calls - calls_before,
+        "groq_throttled": services.groq_throttled - throttled_before,
+        "classified_by": {
+            dict(key).get("method"): value - classified_before.get(key, 0)
+            for _, key, value in metrics.LEADS_CLASSIFIED.samples()
+        },
+    }
+
+
+async def _timed_gets(client, requests, concurrency):
+    latencies, failures = [], 0
+    gate = asyncio.Semaphore(concurrency)
+
+    async def get(params):
+        nonlocal failures
+        async with gate:
+            started = time.perf_counter()
+            resp = await client.get("/leads", params=params)
+            latencies.append(time.perf_counter() - started)
+            failures += resp.status_code != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(get(params) for params in requests))
+    elapsed = time.perf_counter() - started
+    return {"requests_per_sec": round(len(requests) / elapsed, 1), "failures": failures,
+            "latency": _percentiles(latencies)}
+
+
+async def _bench_leads(client, args):
+    n = args["leads_requests"]
+    results = {
+        # Same first page every time: served from the response cache after the first.
+        "first_page_cached": await _timed_gets(client, [{}] * n, args["concurrency"]),
+        # Distinct filters: every request is a cache miss and hits the database.
+        "filtered_uncached": await _timed_gets(
+            client, [{"min_score": i % 100, "view": "list", "limit": 50 + i} for i in range(n)], args["concurrency"]
+        ),
+    }
+    # Keyset paging is sequential: each page needs the previous page's cursor.
+    latencies, cursor, pages = [], None, 0
+    started = time.perf_counter()
+    while pages < args["pages"]:
+        t0 = time.perf_counter()
+        resp = await client.get("/leads", params={"view": "list", **({"cursor": cursor} if cursor else {})})
+        latencies.append(time.perf_counter() - t0)
+        pages += 1
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    elapsed = time.perf_counter() - started
+    results["keyset_paging"] = {"pages": pages, "pages_per_sec": round(pages / elapsed, 1),
+                                "latency": _percentiles(latencies)}
+    return results
+
+
+async def _run_phases(args, services):
+    import httpx
+    import main
+    from async_database import close_async_pool
+    from database import close_pool
+
+    report = {}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench",
+                                 headers={"Authorization": f"Bearer {BENCH_API_KEY}"}, timeout=None) as client:
+        print("⏱️ fetch", file=sys.stderr)
+        report["fetch"] = await asyncio.to_thread(_bench_fetch)
+        report["fetch"]["peak_rss_mb"] = _peak_rss_mb()
+        print("⏱️ ingest", file=sys.stderr)
+        report["ingest"] = await _bench_ingest(client, args)
+        report["ingest"]["peak_rss_mb"] = _peak_rss_mb()
+        print("⏱️ scoring", file=sys.stderr)
+        report["scoring"] = await _bench_scoring(args, services)
+        report["scoring"]["peak_rss_mb"] = _peak_rss_mb()
+        print("⏱️ leads", file=sys.stderr)
+        report["leads"] = await _bench_leads(client, args)
+        report["leads"]["peak_rss_mb"] = _peak_rss_mb()
+    await close_async_pool()
+    close_pool()
+    return report
+
+
+def run_child(args):
+    services = FakeServices(args)
+    # Must be in place before the app modules read their configuration.
+    os.environ.update({
+        "API_KEY": BENCH_API_KEY,
+        "DISCORD_WEBHOOK_URL": "",
+        "GROQ_BASE_URL": services.url,
+        "GROQ_API_KEY": "",
+        "GROQ_RPM_PER_KEY": str(args["groq_rpm_per_key"]),
+        "GROQ_TPM_PER_KEY": str(args["groq_tpm_per_key"]),
+    })
+    for i in range(1, 10):
+        os.environ[f"GROQ_API_KEY_{i}"] = f"bench-key-{i:04d}" if i <= args["groq_keys"] else ""
+    if args["database_url"]:
+        os.environ["DATABASE_URL"] = args["database_url"]
+        _reset_postgres(args["database_url"])
+    else:
+        os.environ.pop("DATABASE_URL", None)
+        os.environ["DB_PATH"] = os.path.join(args["workdir"], "bench.db")
+    sys.path.insert(0, HERE)
+
+    import migrations
+    import near_dupes
+    import seen_filter
+    migrations.run_migrations()
+
+    started = time.perf_counter()
+    _seed(args["rows"], args["seed"])
+    seed_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    near_dupes.rebuild()
+    near_elapsed = time.perf_counter() - started
+    started = time.perf_counter()
+    seen_filter.rebuild()
+    seen_elapsed = time.perf_counter() - started
+    _add_sources(services, args["sources"])
+
+    report = {
+        "rows": args["rows"],
+        "seed": {"elapsed_sec": round(seed_elapsed, 3), "rows_per_sec": round(args["rows"] / seed_elapsed, 1)},
+        "near_dupes": {"load_sec": round(near_elapsed, 3), "indexed": len(near_dupes.index),
+                       "memory_bytes": near_dupes.index.memory_bytes()},
+        "seen_filter": {"load_sec": round(seen_elapsed, 3), "memory_bytes": seen_filter.index.memory_bytes()},
+    }
+    try:
+        report.update(asyncio.run(_run_phases(args, services)))
+    finally:
+        services.close()
+    report["peak_rss_mb"] = _peak_rss_mb()
+    return report
+
+
+# --- Parent: settings, one child per row count, combined JSON -------------------
+
+def _commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "HEAD"], cwd=HERE, capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=HERE,
+                               capture_output=True, text=True).stdout.strip()
+        return {"sha": sha or None, "dirty": bool(dirty)}
+    except OSError:
+        return {"sha": None, "dirty": None}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark fetch, ingest, scoring and GET /leads against local fakes.")
+    parser.add_argument("--rows", default="10000,100000,1000000", help="comma-separated seeded job_leads sizes")
+    parser.add_argument("--database-url", default=None, help="Postgres URL of a SCRATCH database (tables are dropped); default SQLite")
+    parser.add_argument("--out", default=None, help="write the JSON report here instead of stdout")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--sources", type=int, default=8, help="fake sources (half RSS, half JSON API)")
+    parser.add_argument("--feed-items", type=int, default=100, help="items per fake source")
+    parser.add_argument("--ingest-requests", type=int, default=20)
+    parser.add_argument("--ingest-batch", type=int, default=100, help="jobs per POST /leads/ingest")
+    parser.add_argument("--leads-requests", type=int, default=200, help="GET /leads requests per scenario")
+    parser.add_argument("--pages", type=int, default=50, help="keyset pages to walk")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--groq-keys", type=int, default=2)
+    parser.add_argument("--groq-latency-ms", type=float, default=300, help="mean fake Groq latency (±50%%)")
+    parser.add_argument("--groq-429-rate", type=float, default=0.02)
+    parser.add_argument("--groq-retry-after", type=float, default=1)
+    parser.add_argument("--groq-rpm-per-key", type=int, default=100000)
+    parser.add_argument("--groq-tpm-per-key", type=int, default=100000000)
+    parser.add_argument("--scoring-timeout", type=float, default=600)
+    parser.add_argument("--_child", dest="child", default=None, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.child:
+        with open(args.child) as f:
+            settings = json.load(f)
+        report = run_child(settings)
+        with open(settings["result"], "w") as f:
+            json.dump(report, f)
+        return
+
+    settings = {k: v for k, v in vars(args).items() if k not in ("rows", "out", "child")}
+    runs = []
+    for rows in (int(r) for r in args.rows.split(",") if r.strip()):
+        with tempfile.TemporaryDirectory(prefix="jobmonitor-bench-") as workdir:
+            child = dict(settings, rows=rows, workdir=workdir, result=os.path.join(workdir, "result.json"))
+            settings_path = os.path.join(workdir, "settings.json")
+            with open(settings_path, "w") as f:
+                json.dump(child, f)
+            print(f"🏁 Benchmark: {rows} seeded leads", file=sys.stderr)
+            # The app logs to stdout; keep ours clean for the JSON report.
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--_child", settings_path],
+                                  cwd=HERE, stdout=sys.stderr)
+            if proc.returncode != 0 or not os.path.exists(child["result"]):
+                runs.append({"rows": rows, "error": f"benchmark process exited with {proc.returncode}"})
+                continue
+            with open(child["result"]) as f:
+                runs.append(json.load(f))
+
+    report = {
+        "commit": _commit(),
+        "generated_at": datetime.now().isoformat(),
+        "database": "postgres" if args.database_url else "sqlite",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {k: v for k, v in settings.items() if k != "database_url"},
+        "runs": runs,
+    }
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
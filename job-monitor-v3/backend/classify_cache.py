@@ -0,0 +1,139 @@
+"""
+Classification cache for fetchers.classify_with_ai.
+
+Results are keyed by a hash of the normalized title + description. Each entry
+also records a fingerprint of AGENCY_CONTEXT and the model name, so editing the
+agency config or switching models invalidates old results. An in-memory LRU
+sits in front of the classification_cache table; entries expire after
+CLASSIFY_CACHE_TTL_SECS.
+"""
+import hashlib
+import json
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+from config import AGENCY_CONTEXT, CLASSIFY_CACHE_SIZE, CLASSIFY_CACHE_TTL_SECS
+from database import get_read_connection, get_write_connection, _translate_params
+
+_TAG_RE = re.compile(r"<[^>]+>")
+_SPACE_RE = re.compile(r"\s+")
+
+_lru = OrderedDict()
+_lock = threading.Lock()
+_stats = {"memory_hits": 0, "db_hits": 0, "misses": 0, "stores": 0, "invalidated": 0}
+
+
+def normalize_text(text):
+    """Lowercase, strip HTML tags and collapse whitespace so reposts hash identically."""
+    text = _TAG_RE.sub(" ", text or "")
+    return _SPACE_RE.sub(" ", text).strip().lower()
+
+
+def config_fingerprint(model):
+    """Short hash of the agency config plus model; changes whenever either does."""
+    payload = json.dumps(AGENCY_CONTEXT, sort_keys=True) + "|" + model
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+def cache_key(title, description, model):
+    content = normalize_text(title) + "\x00" + normalize_text(description)
+    return config_fingerprint(model) + ":" + hashlib.sha256(content.encode()).hexdigest()
+
+
+def _remember(key, value, expires_at):
+    with _lock:
+        _lru[key] = (value, expires_at)
+        _lru.move_to_end(key)
+        while len(_lru) > CLASSIFY_CACHE_SIZE:
+            _lru.popitem(last=False)
+
+
+def get(title, description, model):
+    """Return a cached (agency, confidence, score) or None."""
+    key = cache_key(title, description, model)
+    now = datetime.now().isoformat()
+    with _lock:
+        entry = _lru.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > now:
+                _lru.move_to_end(key)
+                _stats["memory_hits"] += 1
+                return value
+            del _lru[key]
+
+    try:
+        with get_read_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                _translate_params("SELECT agency, confidence, score, expires_at FROM classification_cache WHERE cache_key = ?"),
+                (key,),
+            )
+            row = cur.fetchone()
+    except Exception as e:
+        print(f"Classification cache read failed: {e}")
+        row = None
+
+    if row is not None and row['expires_at'] > now:
+        value = (row['agency'], row['confidence'], row['score'])
+        _remember(key, value, row['expires_at'])
+        with _lock:
+            _stats["db_hits"] += 1
+        return value
+
+    with _lock:
+        _stats["misses"] += 1
+    return None
+
+
+def put(title, description, model, result):
+    """Store a classification result in memory and in the classification_cache table."""
+    key = cache_key(title, description, model)
+    now = datetime.now()
+    expires_at = (now + timedelta(seconds=CLASSIFY_CACHE_TTL_SECS)).isoformat()
+    agency, confidence, score = result
+    _remember(key, (agency, confidence, score), expires_at)
+    with _lock:
+        _stats["stores"] += 1
+    try:
+        with get_write_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(_translate_params("""
+                INSERT INTO classification_cache (cache_key, fingerprint, agency, confidence, score, created_at, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (cache_key) DO UPDATE SET
+                    agency = excluded.agency, confidence = excluded.confidence, score = excluded.score,
+                    created_at = excluded.created_at, expires_at = excluded.expires_at
+            """), (key, key.split(":", 1)[0], agency, confidence, score, now.isoformat(), expires_at))
+    except Exception as e:
+        print(f"Classification cache write failed: {e}")
+
+
+def invalidate_stale(model):
+    """Drop persisted entries from other agency configs/models and expired ones. Called at startup."""
+    fingerprint = config_fingerprint(model)
+    with _lock:
+        _lru.clear()
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            _translate_params("DELETE FROM classification_cache WHERE fingerprint != ? OR expires_at <= ?"),
+            (fingerprint, datetime.now().isoformat()),
+        )
+        removed = cur.rowcount or 0
+    with _lock:
+        _stats["invalidated"] += removed
+    return removed
+
+
+def get_stats():
+    """Hit rates and LLM calls saved by the cache."""
+    with _lock:
+        stats = dict(_stats)
+        stats["memory_entries"] = len(_lru)
+    lookups = stats["memory_hits"] + stats["db_hits"] + stats["misses"]
+    stats["saved_llm_calls"] = stats["memory_hits"] + stats["db_hits"]
+    stats["hit_rate"] = round(stats["saved_llm_calls"] / lookups, 3) if lookups else 0.0
+    return stats
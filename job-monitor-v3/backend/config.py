@@ -11,6 +11,102 @@ API_KEY = os.getenv("API_KEY", "dev_secret_key_123")
 # Discord Webhook
 DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
 
+# Source fetching: how many sources are polled at once, and the wall-clock
+# budget (seconds) each fetch gets. The fetch itself gives up at the deadline
+# (every HTTP wait is capped to the time left); a source whose thread is still
+# busy stays marked running and is not started again until it finishes.
+FETCH_MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+SOURCE_FETCH_TIMEOUT = float(os.getenv("SOURCE_FETCH_TIMEOUT", "20"))
+# High-water mark: entry ids remembered per source so already-seen feed entries are
+# skipped without touching the database. Keep it above the longest feed/page size.
+SOURCE_SEEN_RING_SIZE = int(os.getenv("SOURCE_SEEN_RING_SIZE", "500"))
+# Seen filter (seen_filter.py): recently saved lead fingerprints are merged into the
+# sorted array once this many have accumulated.
+SEEN_FILTER_MERGE_SIZE = int(os.getenv("SEEN_FILTER_MERGE_SIZE", "10000"))
+
+# AI scoring engine: concurrent workers per configured Groq key (capped at
+# AI_MAX_WORKERS), leads claimed per round trip, and how long a claim is held
+# before another worker may take it over.
+AI_WORKERS_PER_KEY = int(os.getenv("AI_WORKERS_PER_KEY", "2"))
+AI_MAX_WORKERS = int(os.getenv("AI_MAX_WORKERS", "16"))
+AI_CLAIM_BATCH = int(os.getenv("AI_CLAIM_BATCH", "5"))
+AI_CLAIM_LEASE_SECS = int(os.getenv("AI_CLAIM_LEASE_SECS", "120"))
+# Claims a lead may use up: once this many have ended without a classification the
+# lead is marked scored (score 0) and is not claimed again.
+AI_MAX_SCORE_ATTEMPTS = int(os.getenv("AI_MAX_SCORE_ATTEMPTS", "5"))
+# Leads with descriptions shorter than this are classified several per prompt.
+AI_MULTI_ITEM_MAX_CHARS = int(os.getenv("AI_MULTI_ITEM_MAX_CHARS", "600"))
+
+# Classification cache: in-memory LRU entries and how long a result stays valid.
+CLASSIFY_CACHE_SIZE = int(os.getenv("CLASSIFY_CACHE_SIZE", "5000"))
+CLASSIFY_CACHE_TTL_SECS = int(os.getenv("CLASSIFY_CACHE_TTL_SECS", str(7 * 24 * 3600)))
+
+# Keyword pre-classifier (keyword_matcher.py). A phrase found in the title counts
+# KEYWORD_TITLE_WEIGHT, elsewhere 1. The LLM is skipped when the top agency scores
+# at least KEYWORD_MIN_SCORE and beats the runner-up by KEYWORD_MATCH_MARGIN.
+KEYWORD_TITLE_WEIGHT = int(os.getenv("KEYWORD_TITLE_WEIGHT", "3"))
+KEYWORD_MIN_SCORE = int(os.getenv("KEYWORD_MIN_SCORE", "6"))
+KEYWORD_MATCH_MARGIN = int(os.getenv("KEYWORD_MATCH_MARGIN", "4"))
+
+# Ingest pipeline (ingest_queue.py): bounded durable queue (full => 429). After a
+# wake-up the worker waits INGEST_BATCH_WINDOW_MS so a burst lands in one batch of
+# up to INGEST_BATCH_SIZE. Failed batches retry after INGEST_RETRY_DELAY_SECS x
+# attempts and are dead-lettered after INGEST_MAX_ATTEMPTS.
+INGEST_QUEUE_MAX = int(os.getenv("INGEST_QUEUE_MAX", "5000"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "200"))
+INGEST_BATCH_WINDOW_MS = int(os.getenv("INGEST_BATCH_WINDOW_MS", "250"))
+INGEST_RETRY_AFTER_SECS = int(os.getenv("INGEST_RETRY_AFTER_SECS", "2"))
+INGEST_LEASE_SECS = int(os.getenv("INGEST_LEASE_SECS", "60"))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+INGEST_RETRY_DELAY_SECS = int(os.getenv("INGEST_RETRY_DELAY_SECS", "10"))
+INGEST_POLL_SECS = float(os.getenv("INGEST_POLL_SECS", "5"))
+INGEST_DRAIN_TIMEOUT_SECS = float(os.getenv("INGEST_DRAIN_TIMEOUT_SECS", "10"))
+
+# Near-duplicate detection (near_dupes.py): SimHash bit distance at or below which two
+# leads are the same posting; texts with fewer tokens than NEAR_DUP_MIN_TOKENS are skipped.
+NEAR_DUP_MAX_DISTANCE = int(os.getenv("NEAR_DUP_MAX_DISTANCE", "3"))
+NEAR_DUP_MIN_TOKENS = int(os.getenv("NEAR_DUP_MIN_TOKENS", "20"))
+
+# Lead change feed (lead_changes.py): the /leads/stream broadcaster polls the
+# lead_changes table every LEAD_STREAM_POLL_SECS and sends an SSE comment every
+# LEAD_STREAM_HEARTBEAT_SECS when idle. Changes older than LEAD_CHANGES_RETENTION_SECS
+# are pruned; a client whose cursor predates that is told to reload.
+LEAD_STREAM_POLL_SECS = float(os.getenv("LEAD_STREAM_POLL_SECS", "1"))
+LEAD_STREAM_HEARTBEAT_SECS = float(os.getenv("LEAD_STREAM_HEARTBEAT_SECS", "15"))
+LEAD_STREAM_QUEUE_MAX = int(os.getenv("LEAD_STREAM_QUEUE_MAX", "1000"))
+LEAD_CHANGES_PAGE_MAX = int(os.getenv("LEAD_CHANGES_PAGE_MAX", "500"))
+LEAD_CHANGES_RETENTION_SECS = int(os.getenv("LEAD_CHANGES_RETENTION_SECS", str(7 * 24 * 3600)))
+
+# Read-endpoint response cache (response_cache.py): serialized responses kept per
+# table version; bodies of at least RESPONSE_GZIP_MIN_BYTES are also stored gzipped.
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_GZIP_MIN_BYTES = int(os.getenv("RESPONSE_GZIP_MIN_BYTES", "1024"))
+
+# Streaming CSV export (exporter.py): rows fetched per round trip (fetchmany /
+# Postgres server-side cursor), which also bounds memory per export.
+EXPORT_FETCH_SIZE = int(os.getenv("EXPORT_FETCH_SIZE", "1000"))
+
+# Metrics (metrics.py): every METRICS_ROLLUP_SECS the per-minute rates and averages
+# are written to system_metrics, which keeps METRICS_RETENTION_DAYS of history.
+METRICS_ROLLUP_SECS = float(os.getenv("METRICS_ROLLUP_SECS", "60"))
+METRICS_RETENTION_DAYS = int(os.getenv("METRICS_RETENTION_DAYS", "7"))
+
+# Adaptive source polling (source_scheduler.py). Each source's interval is rescaled
+# after every fetch so a fetch finds about SOURCE_TARGET_YIELD new leads, within
+# SOURCE_POLL_MIN_SECS..SOURCE_POLL_MAX_SECS. Failures back off exponentially up to
+# SOURCE_BACKOFF_MAX_SECS; SOURCE_DISABLE_AFTER_FAILURES in a row disables the source.
+# Every delay is randomized by +/- SOURCE_POLL_JITTER.
+SOURCE_SCHEDULER_ENABLED = os.getenv("SOURCE_SCHEDULER_ENABLED", "1") == "1"
+SOURCE_SCHEDULER_TICK_SECS = float(os.getenv("SOURCE_SCHEDULER_TICK_SECS", "5"))
+SOURCE_POLL_DEFAULT_SECS = float(os.getenv("SOURCE_POLL_DEFAULT_SECS", "900"))
+SOURCE_POLL_MIN_SECS = float(os.getenv("SOURCE_POLL_MIN_SECS", "120"))
+SOURCE_POLL_MAX_SECS = float(os.getenv("SOURCE_POLL_MAX_SECS", str(6 * 3600)))
+SOURCE_TARGET_YIELD = float(os.getenv("SOURCE_TARGET_YIELD", "5"))
+SOURCE_YIELD_ALPHA = float(os.getenv("SOURCE_YIELD_ALPHA", "0.3"))
+SOURCE_POLL_JITTER = float(os.getenv("SOURCE_POLL_JITTER", "0.1"))
+SOURCE_BACKOFF_MAX_SECS = float(os.getenv("SOURCE_BACKOFF_MAX_SECS", str(6 * 3600)))
+SOURCE_DISABLE_AFTER_FAILURES = int(os.getenv("SOURCE_DISABLE_AFTER_FAILURES", "8"))
+
 AGENCY_CONTEXT = {
     "ascend": {
         "name": "Ascend Growth Studio",
@@ -4,9 +4,12 @@ from psycopg2.extras import RealDictCursor
 import threading
 import os
 import re
+import time
 from contextlib import contextmanager
 from typing import Generator, Union, List, Any
 
+import metrics
+
 # DATABASE_URL should be set in environment for Cloud (Postgres)
 # If not set, it defaults to SQLite locally.
 DATABASE_URL = os.getenv("DATABASE_URL")
@@ -21,51 +24,245 @@ def _translate_params(query: str) -> str:
         return query.replace('?', '%s')
     return query
 
+# Pool sizing. SQLite keeps one reader and one writer connection per thread;
+# Postgres uses a bounded ThreadedConnectionPool shared by all threads.
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "1"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Connections idle longer than this are pinged with SELECT 1 on checkout.
+DB_POOL_HEALTHCHECK_SECS = float(os.getenv("DB_POOL_HEALTHCHECK_SECS", "30"))
+
+_pool_lock = threading.Lock()
+_pool_stats = {
+    "created": 0,
+    "checkouts": 0,
+    "in_use": 0,
+    "peak_in_use": 0,
+    "health_check_failures": 0,
+    "wait_time_total_sec": 0.0,
+    "timeouts": 0,
+}
+
+def _stat_incr(key: str, amount: float = 1) -> None:
+    with _pool_lock:
+        _pool_stats[key] += amount
+
 def get_db_connection():
     """Factory for connections based on environment."""
+    _stat_incr("created")
     if DATABASE_URL:
         conn = psycopg2.connect(DATABASE_URL, cursor_factory=RealDictCursor)
         return conn
     else:
         conn = sqlite3.connect(DB_PATH, timeout=30.0)
         conn.execute("PRAGMA journal_mode=WAL;")
+        conn.execute("PRAGMA synchronous=NORMAL;")
         conn.row_factory = sqlite3.Row
         return conn
 
-@contextmanager
-def get_read_connection() -> Generator[Any, None, None]:
-    """Get a connection for reading."""
-    conn = get_db_connection()
+def _is_healthy(conn) -> bool:
+    """Cheap liveness probe used on checkout."""
     try:
-        # For Postgres, we might want to return the connection but we'll use a wrapper
-        yield conn
-    finally:
-        conn.close()
+        if DATABASE_URL:
+            if conn.closed:
+                return False
+            cur = conn.cursor()
+            cur.execute("SELECT 1")
+            cur.fetchone()
+            conn.rollback()
+        else:
+            conn.execute("SELECT 1").fetchone()
+        return True
+    except Exception:
+        return False
 
-@contextmanager
-def get_write_connection() -> Generator[Any, None, None]:
-    """Get a connection for writing."""
-    if DATABASE_URL:
+class _SqliteThreadPool:
+    """One reusable reader and writer connection per thread; pragmas run once at connect."""
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def checkout(self, role: str):
+        slot = getattr(self._local, role, None)
+        if slot is not None:
+            conn, last_used = slot
+            if time.monotonic() - last_used < DB_POOL_HEALTHCHECK_SECS or _is_healthy(conn):
+                return conn
+            _stat_incr("health_check_failures")
+            self._discard(conn)
         conn = get_db_connection()
+        setattr(self._local, role, (conn, time.monotonic()))
+        return conn
+
+    def checkin(self, role: str, conn, broken: bool = False) -> None:
+        if broken:
+            setattr(self._local, role, None)
+            self._discard(conn)
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        setattr(self._local, role, (conn, time.monotonic()))
+
+    def close(self) -> None:
+        for role in ("read", "write"):
+            slot = getattr(self._local, role, None)
+            if slot is not None:
+                self._discard(slot[0])
+                setattr(self._local, role, None)
+
+    @staticmethod
+    def _discard(conn) -> None:
         try:
-            yield conn
-            conn.commit()
+            conn.close()
         except Exception:
-            conn.rollback()
+            pass
+
+class _PostgresPool:
+    """Bounded ThreadedConnectionPool; callers block (up to DB_POOL_TIMEOUT) instead of failing when it is exhausted."""
+
+    def __init__(self):
+        self._pool = None
+        self._slots = threading.BoundedSemaphore(DB_POOL_MAX)
+        self._last_used = {}
+
+    def _get_pool(self):
+        if self._pool is None:
+            with _pool_lock:
+                if self._pool is None:
+                    from psycopg2.pool import ThreadedConnectionPool
+                    self._pool = ThreadedConnectionPool(
+                        DB_POOL_MIN, DB_POOL_MAX, DATABASE_URL, cursor_factory=RealDictCursor
+                    )
+        return self._pool
+
+    def checkout(self, role: str):
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=DB_POOL_TIMEOUT):
+            _stat_incr("timeouts")
+            raise TimeoutError(f"No database connection available within {DB_POOL_TIMEOUT}s")
+        _stat_incr("wait_time_total_sec", time.monotonic() - started)
+        try:
+            pool = self._get_pool()
+            while True:
+                conn = pool.getconn()
+                last_used = self._last_used.get(id(conn))
+                if last_used is None:
+                    # First checkout of a connection the pool just opened.
+                    _stat_incr("created")
+                    return conn
+                if time.monotonic() - last_used < DB_POOL_HEALTHCHECK_SECS or _is_healthy(conn):
+                    return conn
+                _stat_incr("health_check_failures")
+                self._last_used.pop(id(conn), None)
+                pool.putconn(conn, close=True)
+        except Exception:
+            self._slots.release()
             raise
+
+    def checkin(self, role: str, conn, broken: bool = False) -> None:
+        try:
+            if not broken and not conn.closed:
+                try:
+                    conn.rollback()  # Never hand a connection back mid-transaction.
+                except psycopg2.Error:
+                    broken = True
+            broken = broken or bool(conn.closed)
+            if broken:
+                self._last_used.pop(id(conn), None)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+            self._get_pool().putconn(conn, close=broken)
         finally:
-            conn.close()
-    else:
-        with DB_WRITE_LOCK:
-            conn = get_db_connection()
+            self._slots.release()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.closeall()
+            self._pool = None
+            self._last_used.clear()
+
+_pool = _PostgresPool() if DATABASE_URL else _SqliteThreadPool()
+
+# Frames skipped when attributing connection time to a call site.
+_WRAPPER_MODULES = frozenset({__name__, "contextlib"})
+
+@contextmanager
+def _checkout(role: str, site: str = None) -> Generator[Any, None, None]:
+    site = site or metrics.call_site(_WRAPPER_MODULES)
+    conn = _pool.checkout(role)
+    with _pool_lock:
+        _pool_stats["checkouts"] += 1
+        _pool_stats["in_use"] += 1
+        _pool_stats["peak_in_use"] = max(_pool_stats["peak_in_use"], _pool_stats["in_use"])
+    started = time.perf_counter()
+    broken = False
+    try:
+        yield conn
+    except (sqlite3.OperationalError, sqlite3.InterfaceError, psycopg2.OperationalError, psycopg2.InterfaceError):
+        broken = True
+        raise
+    finally:
+        metrics.DB_SECONDS.observe(time.perf_counter() - started, site=site, role=role)
+        with _pool_lock:
+            _pool_stats["in_use"] -= 1
+        _pool.checkin(role, conn, broken=broken)
+
+def get_pool_stats() -> dict:
+    """Snapshot of connection pool counters, for sizing DB_POOL_MIN/DB_POOL_MAX."""
+    with _pool_lock:
+        stats = dict(_pool_stats)
+    stats["backend"] = "postgres" if DATABASE_URL else "sqlite"
+    stats["max_size"] = DB_POOL_MAX if DATABASE_URL else None
+    stats["avg_wait_ms"] = round(stats["wait_time_total_sec"] * 1000 / stats["checkouts"], 3) if stats["checkouts"] else 0.0
+    stats["wait_time_total_sec"] = round(stats["wait_time_total_sec"], 3)
+    return stats
+
+def close_pool() -> None:
+    """Close pooled connections (called on application shutdown)."""
+    _pool.close()
+
+@contextmanager
+def get_read_connection(site: str = None) -> Generator[Any, None, None]:
+    """Get a pooled connection for reading. `site` labels its timing metric (default: the caller)."""
+    with _checkout("read", site) as conn:
+        yield conn
+
+@contextmanager
+def get_write_connection(site: str = None) -> Generator[Any, None, None]:
+    """Get a pooled connection for writing. Commits on success, rolls back on error."""
+    if DATABASE_URL:
+        with _checkout("write", site) as conn:
             try:
                 yield conn
                 conn.commit()
             except Exception:
                 conn.rollback()
                 raise
-            finally:
-                conn.close()
+    else:
+        with DB_WRITE_LOCK:
+            with _checkout("write", site) as conn:
+                try:
+                    yield conn
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+
+@contextmanager
+def get_stream_connection() -> Generator[Any, None, None]:
+    """Connection for a long read consumed by a generator (e.g. a StreamingResponse), which may
+    resume on a different thread at each step. SQLite gets a private connection, since pooled
+    ones are bound to their thread; Postgres borrows a pooled one."""
+    if DATABASE_URL:
+        with _checkout("read") as conn:
+            yield conn
+    else:
+        conn = sqlite3.connect(DB_PATH, timeout=30.0, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield conn
+        finally:
+            conn.close()
 
 def db_execute(query: str, params: tuple = (), is_write: bool = False):
     """Universal execution helper that handles ? vs %s and cursors."""
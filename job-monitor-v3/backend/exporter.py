@@ -0,0 +1,59 @@
+"""
+Streaming CSV export of job_leads.
+
+Rows are read EXPORT_FETCH_SIZE at a time (fetchmany on SQLite, a named
+server-side cursor on Postgres) and each batch is encoded and yielded before
+the next is fetched, so memory stays flat however many leads are exported
+and the first bytes go out immediately. Optionally the stream is gzipped.
+"""
+import csv
+import io
+import uuid
+import zlib
+
+from config import EXPORT_FETCH_SIZE
+from database import get_stream_connection, _translate_params, DATABASE_URL
+
+
+def _encode(rows):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for row in rows:
+        writer.writerow([str(x) for x in row])
+    return buf.getvalue().encode()
+
+
+def _gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _csv_chunks(columns, clauses, params, order_by):
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    query = _translate_params(f"SELECT {', '.join(columns)} FROM job_leads {where} ORDER BY {order_by}")
+    with get_stream_connection() as conn:
+        if DATABASE_URL:
+            # Named cursor: rows stay on the server until fetched.
+            cur = conn.cursor(name=f"export_{uuid.uuid4().hex}")
+            cur.itersize = EXPORT_FETCH_SIZE
+        else:
+            cur = conn.cursor()
+        cur.execute(query, tuple(params))
+        rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+        if not rows:
+            yield _encode([["No data"]])
+            return
+        yield _encode([columns])
+        while rows:
+            yield _encode([[row[c] for c in columns] for row in rows])
+            rows = cur.fetchmany(EXPORT_FETCH_SIZE)
+
+
+def stream_csv(columns, clauses, params, order_by, compress=False):
+    """Yield the CSV (header + rows matching `clauses`) as byte chunks, gzipped if `compress`."""
+    chunks = _csv_chunks(columns, clauses, params, order_by)
+    return _gzip_chunks(chunks) if compress else chunks
@@ -1,67 +1,184 @@
+import asyncio
 import feedparser
 import requests
-import sqlite3
+import urllib3
 import os
 import json
 import re
-from datetime import datetime
-from config import DB_PATH, AGENCY_KEYWORDS, REJECT_KEYWORDS, AGENCY_CONTEXT
+import hashlib
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from config import DB_PATH, AGENCY_KEYWORDS, REJECT_KEYWORDS, AGENCY_CONTEXT, FETCH_MAX_WORKERS, SOURCE_FETCH_TIMEOUT, SOURCE_SEEN_RING_SIZE
 from discord_notify import send_discord_notification
-from ai_client import generate_with_retry
+from ai_client import generate_with_retry, generate_with_retry_async
+import classify_cache
+import keyword_matcher
+import metrics
+import near_dupes
+import seen_filter
 import time
-
-from database import get_read_connection, get_write_connection, db_get_one, _translate_params
-
-def should_reject_job(text):
-    """Pre-filter: Check if job matches rejection criteria."""
-# ... (rest of function is unchanged, but I need to make sure imports are right)
-
-# ... (omitting middle parts, focusing on save_lead and imports)
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from database import get_read_connection, get_write_connection, _translate_params, DATABASE_URL
+
+SAVE_BATCH_SIZE = 200
+
+_INSERT_COLUMNS = (
+    "id", "source", "external_id", "title", "description", "url",
+    "budget", "company", "posted_at", "status", "created_at", "match_score",
+    "simhash", "fingerprinted_at", "duplicate_of"
+)
+
+def _lead_id(lead_data):
+    return f"{lead_data['source']}_{lead_data['external_id']}"[:50]
+
+def _lead_row(lead_data, now, fingerprint=None, duplicate_of=None):
+    """Map a lead dict onto the job_leads insert column order."""
+    return (
+        _lead_id(lead_data), lead_data['source'], lead_data['external_id'],
+        lead_data['title'], lead_data['description'], lead_data['url'],
+        lead_data.get('budget', 'N/A'), lead_data.get('company', 'Unknown'),
+        lead_data.get('posted_at') or now, 'duplicate' if duplicate_of else 'new', now, 0,
+        fingerprint, now, duplicate_of
+    )
+
+def _insert_batch(rows):
+    """Insert one batch in a single transaction and return the IDs actually written."""
+    columns = ", ".join(_INSERT_COLUMNS)
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        if DATABASE_URL:
+            # execute_values lets Postgres report exactly which rows won the conflict.
+            from psycopg2.extras import execute_values
+            inserted = execute_values(
+                cur,
+                f"INSERT INTO job_leads ({columns}) VALUES %s ON CONFLICT DO NOTHING RETURNING id",
+                rows, fetch=True
+            )
+            return [r['id'] if isinstance(r, dict) else r[0] for r in inserted]
+
+        # SQLite: writers are serialized by DB_WRITE_LOCK, so a pre-check inside
+        # the same transaction is exact.
+        ids = [r[0] for r in rows]
+        placeholders = ", ".join("?" for _ in ids)
+        cur.execute(f"SELECT id FROM job_leads WHERE id IN ({placeholders})", ids)
+        existing = {r[0] for r in cur.fetchall()}
+        values = ", ".join("?" for _ in _INSERT_COLUMNS)
+        cur.executemany(
+            f"INSERT INTO job_leads ({columns}) VALUES ({values}) ON CONFLICT DO NOTHING",
+            rows
+        )
+        inserted, seen = [], set(existing)
+        for lid in ids:
+            if lid not in seen:
+                seen.add(lid)
+                inserted.append(lid)
+        return inserted
+
+def _flush_batch(batch, provisional, strict=False):
+    inserted = []
+    try:
+        inserted = _insert_batch(batch)
+        # Every row now exists, whether inserted here or already there.
+        seen_filter.index.add_many((row[1], row[2]) for row in batch)
+    except Exception as e:
+        if strict:
+            raise
+        print(f"Save Error: batch of {len(batch)} failed: {e}")
+    finally:
+        _settle_near_dupes(batch, provisional, inserted)
+    return inserted
+
+def _settle_near_dupes(batch, provisional, inserted):
+    """Drop index entries for canonical rows that didn't get inserted; count linked duplicates."""
+    inserted = set(inserted)
+    for lid, slot in provisional:
+        if lid not in inserted:
+            near_dupes.index.remove(slot)
+    provisional.clear()
+    near_dupes.index.record_linked(sum(1 for row in batch if row[-1] and row[0] in inserted))
+
+def save_leads(leads, strict=False):
+    """Bulk-save leads, one transaction per batch. Returns the IDs that were newly inserted.
+
+    Leads the seen filter already knows, once confirmed in job_leads by one batched
+    query, are dropped up front.
+    Near-duplicates of an existing canonical lead are stored with status 'duplicate'
+    and duplicate_of set, so they are neither listed nor AI-scored.
+    With strict=True a failed batch raises instead of being logged and skipped,
+    so durable callers can retry it.
+    """
+    inserted = []
+    batch = []
+    # (lead id, index slot) of canonical leads added to the index ahead of the insert, so
+    # duplicates within the same batch are caught; rolled back if the row isn't written.
+    provisional = []
+    now = datetime.now().isoformat()
+    hits = set()
+    for lead_data in leads:
+        try:
+            if seen_filter.index.seen(lead_data['source'], lead_data['external_id']):
+                hits.add(_lead_id(lead_data))
+        except (KeyError, TypeError):
+            pass  # Reported as malformed below.
+    # Only hits cost a query; one that isn't stored (a fingerprint collision) is saved as new.
+    stored = set()
+    if hits:
+        try:
+            stored = seen_filter.confirm(hits)
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Save Error: seen-filter confirmation failed, trusting the filter: {e}")
+            stored = hits
+    for lead_data in leads:
+        try:
+            lid = _lead_id(lead_data)
+            if lid in stored:
+                continue
+            fingerprint = near_dupes.simhash(lead_data['title'], lead_data['description'])
+            duplicate_of = None
+            if fingerprint is not None:
+                duplicate_of = near_dupes.index.find(fingerprint)
+                if duplicate_of == lid:
+                    duplicate_of = None  # Re-fetch of a lead we already have.
+                elif duplicate_of is None:
+                    provisional.append((lid, near_dupes.index.add(lid, fingerprint)))
+            batch.append(_lead_row(lead_data, now, fingerprint, duplicate_of))
+        except (KeyError, TypeError) as e:
+            print(f"Save Error: malformed lead skipped ({e})")
+            continue
+        if len(batch) >= SAVE_BATCH_SIZE:
+            inserted.extend(_flush_batch(batch, provisional, strict))
+            batch = []
+    if batch:
+        inserted.extend(_flush_batch(batch, provisional, strict))
+    return inserted
 
 def save_lead(lead_data):
-    """Save lead to DB using Single-Writer Pipeline."""
-    try:
-        # 1. READ (Concurrent Check)
-        exists = db_get_one("SELECT id FROM job_leads WHERE external_id = ?", (lead_data['external_id'],))
-        if exists:
-            return False
+    """Save a single lead. Thin wrapper over save_leads()."""
+    return bool(save_leads([lead_data]))
 
-        # 2. WRITE (Serialized)
-        lid = f"{lead_data['source']}_{lead_data['external_id']}"[:50]
-        
-        with get_write_connection() as conn:
-            cur = conn.cursor()
-            query = _translate_params("""
-                INSERT INTO job_leads (
-                    id, source, external_id, title, description, url, 
-                    budget, company, posted_at, status, created_at, match_score
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, 'new', ?, 0)
-            """)
-            cur.execute(query, (
-                lid, lead_data['source'], lead_data['external_id'],
-                lead_data['title'], lead_data['description'], lead_data['url'],
-                lead_data.get('budget', 'N/A'), lead_data.get('company', 'Unknown'),
-                lead_data.get('posted_at') or datetime.now().isoformat(), datetime.now().isoformat()
-            ))
-        return True
 
-    except sqlite3.IntegrityError:
-        return False
-    except Exception as e:
-        print(f"Save Error: {e}")
-        return False
 
+# Returned when the AI call failed or produced nothing usable, so callers can retry later.
+UNCLASSIFIED = ("unassigned", 0.0, 0)
+CLASSIFY_MODEL = "llama-3.1-8b-instant"
 
+def _agency_prompt_section():
+    section = ""
+    for key, data in AGENCY_CONTEXT.items():
+        section += f"{key.upper()} ({data['name']}):\n"
+        section += f"  - Focus: {data['focus']}\n"
+        section += f"  - Keywords: {', '.join(data.get('industries', [])[:5])}\n"
+        section += f"  - Roles: {', '.join(data.get('target_roles', [])[:5])}\n\n"
+    return section
 
 def build_ai_prompt(title, description):
     """Dynamically build AI prompt based on config.AGENCY_CONTEXT."""
     prompt = "Classify this job into ONE of the following business units:\n\n"
-    
-    for key, data in AGENCY_CONTEXT.items():
-        prompt += f"{key.upper()} ({data['name']}):\n"
-        prompt += f"  - Focus: {data['focus']}\n"
-        prompt += f"  - Keywords: {', '.join(data.get('industries', [])[:5])}\n"
-        prompt += f"  - Roles: {', '.join(data.get('target_roles', [])[:5])}\n\n"
+    prompt += _agency_prompt_section()
         
     prompt += "If the job does not clearly fit ANY (e.g. entry level, low budget, unrelated), return REJECT.\n\n"
     prompt += f"JOB TITLE: {title}\n"
@@ -77,73 +194,369 @@ def build_ai_prompt(title, description):
     
     return prompt
 
+def build_batch_ai_prompt(jobs):
+    """Prompt that classifies several (title, description) pairs in one call."""
+    prompt = "Classify EACH job below into ONE of the following business units:\n\n"
+    prompt += _agency_prompt_section()
+    prompt += "If a job does not clearly fit ANY (e.g. entry level, low budget, unrelated), use REJECT.\n\n"
+    for i, (title, description) in enumerate(jobs):
+        prompt += f"JOB {i}:\n  TITLE: {title}\n  DESC: {description[:800]}\n\n"
+    prompt += "Return formatted JSON ONLY, one result per job, in the same order:\n"
+    prompt += '{"results": [\n'
+    prompt += '  {"job": 0, "agency": "AGENCY_KEY" (or "reject"), "confidence": 0.0 to 1.0, "score": 0 to 100}\n'
+    prompt += "]}"
+    return prompt
+
+def _parse_classification(data):
+    """Normalize one {agency, confidence, score} object from the model."""
+    agency = str(data.get("agency", "unassigned")).lower()
+    confidence = float(data.get("confidence", 0.5))
+    score = int(data.get("score", 50))
+
+    # Map back to keys if AI output full name
+    for key in AGENCY_CONTEXT.keys():
+        if key in agency:
+            agency = key
+            break
+
+    if agency not in AGENCY_CONTEXT and agency != "reject":
+        agency = "unassigned"
+
+    return agency, confidence, score
+
 def classify_with_ai(title, description):
     """Classify job using Groq with structured JSON output."""
-    # 1. Pre-filter
-    if should_reject_job(f"{title} {description}"):
-        return "reject", 1.0, 0
+    # 1. Pre-filter: clear rejects and clear single-agency keyword matches
+    decided = keyword_matcher.classify(title, description)
+    if decided:
+        metrics.LEADS_CLASSIFIED.inc(method="keyword")
+        return decided
+
+    # 2. Same posting seen before (another source, re-ingest, manual classify)
+    cached = classify_cache.get(title, description, CLASSIFY_MODEL)
+    if cached:
+        metrics.LEADS_CLASSIFIED.inc(method="cache")
+        return cached
 
     prompt = build_ai_prompt(title, description)
-    content = generate_with_retry(prompt, is_json=True, model="llama-3.1-8b-instant")
+    content = generate_with_retry(prompt, is_json=True, model=CLASSIFY_MODEL)
     
     if not content or content.startswith("Error") or content == "{}":
-        return "unassigned", 0.0, 0
+        metrics.LEADS_CLASSIFIED.inc(method="failed")
+        return UNCLASSIFIED
 
     try:
-        # Parse JSON
-        data = json.loads(content)
-        agency = data.get("agency", "unassigned").lower()
-        confidence = float(data.get("confidence", 0.5))
-        score = int(data.get("score", 50))
-        
-        # Map back to keys if AI output full name
-        for key in AGENCY_CONTEXT.keys():
-            if key in agency:
-                agency = key
-                break
-                
-        if agency not in AGENCY_CONTEXT and agency != "reject":
-             agency = "unassigned"
+        result = _parse_classification(json.loads(content))
+    except Exception as e:
+        print(f"AI Classification Parsing Error: {e} - Content: {content}")
+        metrics.LEADS_CLASSIFIED.inc(method="failed")
+        return UNCLASSIFIED
+    metrics.LEADS_CLASSIFIED.inc(method="llm")
+    classify_cache.put(title, description, CLASSIFY_MODEL, result)
+    return result
+
+async def classify_with_ai_async(title, description):
+    """classify_with_ai for async endpoints: the LLM call holds no thread while in flight."""
+    decided = keyword_matcher.classify(title, description)
+    if decided:
+        metrics.LEADS_CLASSIFIED.inc(method="keyword")
+        return decided
+
+    cached = await asyncio.to_thread(classify_cache.get, title, description, CLASSIFY_MODEL)
+    if cached:
+        metrics.LEADS_CLASSIFIED.inc(method="cache")
+        return cached
 
-        return agency, confidence, score
+    prompt = build_ai_prompt(title, description)
+    content = await generate_with_retry_async(prompt, is_json=True, model=CLASSIFY_MODEL)
+
+    if not content or content.startswith("Error") or content == "{}":
+        metrics.LEADS_CLASSIFIED.inc(method="failed")
+        return UNCLASSIFIED
 
+    try:
+        result = _parse_classification(json.loads(content))
     except Exception as e:
         print(f"AI Classification Parsing Error: {e} - Content: {content}")
-        return "unassigned", 0.0, 0
+        metrics.LEADS_CLASSIFIED.inc(method="failed")
+        return UNCLASSIFIED
+    metrics.LEADS_CLASSIFIED.inc(method="llm")
+    await asyncio.to_thread(classify_cache.put, title, description, CLASSIFY_MODEL, result)
+    return result
+
+def classify_batch_with_ai(jobs):
+    """Classify several (title, description) pairs with a single multi-item prompt.
+
+    Returns one (agency, confidence, score) tuple per job. Jobs the model skipped or
+    garbled are retried individually through classify_with_ai().
+    """
+    results = [None] * len(jobs)
+    pending = []
+    for i, (title, description) in enumerate(jobs):
+        results[i] = keyword_matcher.classify(title, description)
+        if results[i] is not None:
+            metrics.LEADS_CLASSIFIED.inc(method="keyword")
+            continue
+        results[i] = classify_cache.get(title, description, CLASSIFY_MODEL)
+        if results[i] is not None:
+            metrics.LEADS_CLASSIFIED.inc(method="cache")
+        else:
+            pending.append(i)
+
+    if len(pending) > 1:
+        prompt = build_batch_ai_prompt([jobs[i] for i in pending])
+        content = generate_with_retry(prompt, is_json=True, model=CLASSIFY_MODEL)
+        if not content or content.startswith("Error") or content == "{}":
+            # The call itself failed; per-item retries would fail the same way.
+            metrics.LEADS_CLASSIFIED.inc(len(pending), method="failed")
+            return [r if r is not None else UNCLASSIFIED for r in results]
+        try:
+            for item in json.loads(content).get("results", []):
+                pos = int(item.get("job", -1))
+                if 0 <= pos < len(pending) and results[pending[pos]] is None:
+                    results[pending[pos]] = _parse_classification(item)
+                    metrics.LEADS_CLASSIFIED.inc(method="llm")
+                    classify_cache.put(*jobs[pending[pos]], CLASSIFY_MODEL, results[pending[pos]])
+        except Exception as e:
+            print(f"AI Batch Classification Parsing Error: {e} - Content: {content}")
+
+    for i, result in enumerate(results):
+        if result is None:
+            results[i] = classify_with_ai(*jobs[i])
+    return results
 
 # --- Universal Fetchers ---
 
+class FetchTimeout(Exception):
+    """A source fetch ran past its SOURCE_FETCH_TIMEOUT deadline."""
+
+
+class _Deadline:
+    """Wall-clock budget for one source fetch, checked cooperatively between steps."""
+
+    def __init__(self, seconds=SOURCE_FETCH_TIMEOUT):
+        self.seconds = seconds
+        self.at = time.monotonic() + seconds
+
+    def remaining(self):
+        """Seconds left; raises FetchTimeout once the budget is spent."""
+        left = self.at - time.monotonic()
+        if left <= 0:
+            raise FetchTimeout(f"timed out after {self.seconds:g}s")
+        return left
+
+
+_READ_CHUNK = 64 * 1024
+
+def _http_get(url, deadline, **kwargs):
+    """requests.get bounded by `deadline` as a whole, not per socket wait.
+
+    The body is read with read1 (whatever has arrived, up to _READ_CHUNK) and every
+    socket wait is capped to the time left, so a slow-trickling server can't hold
+    the fetch past the deadline.
+    """
+    try:
+        resp = requests.get(url, timeout=deadline.remaining(), stream=True, **kwargs)
+        with resp:
+            chunks = []
+            while True:
+                sock = getattr(resp.raw.connection, "sock", None)
+                if sock is not None:
+                    sock.settimeout(deadline.remaining())
+                chunk = resp.raw.read1(_READ_CHUNK, decode_content=True)
+                if not chunk:
+                    break
+                chunks.append(chunk)
+            resp._content = b"".join(chunks)
+    except (requests.exceptions.Timeout, urllib3.exceptions.TimeoutError, TimeoutError):
+        deadline.remaining()  # Report a wait cut short by the deadline as FetchTimeout.
+        raise
+    return resp
+
+def _conditional_get(source, deadline):
+    """GET a source, sending the validators stored from the previous fetch.
+
+    Returns None when nothing changed (a 304, or a body whose hash matches the
+    last one we processed), otherwise (response, cache_fields) where cache_fields
+    should be passed to _record_source_check() only once the body's leads have been
+    saved, so a failed save is retried on the next poll.
+    """
+    headers = {"User-Agent": "Mozilla/5.0"}
+    if source['etag']:
+        headers["If-None-Match"] = source['etag']
+    if source['last_modified']:
+        headers["If-Modified-Since"] = source['last_modified']
+
+    resp = _http_get(source['url'], deadline, headers=headers)
+    if resp.status_code == 304:
+        _record_source_check(source['id'])
+        return None
+    resp.raise_for_status()
+
+    cache_fields = {
+        "etag": resp.headers.get("ETag"),
+        "last_modified": resp.headers.get("Last-Modified"),
+        "content_hash": hashlib.sha256(resp.content).hexdigest(),
+    }
+    if cache_fields["content_hash"] == source['content_hash']:
+        # Server ignored our validators but the body is identical.
+        _record_source_check(source['id'], **cache_fields)
+        return None
+    return resp, cache_fields
+
+def _record_source_check(source_id, **cache_fields):
+    """Stamp last_checked and persist any new HTTP cache validators for a source."""
+    fields = {"last_checked": datetime.now().isoformat(), **cache_fields}
+    assignments = ", ".join(f"{col} = ?" for col in fields)
+    try:
+        with get_write_connection() as conn:
+            cur = conn.cursor()
+            query = _translate_params(f"UPDATE job_sources SET {assignments} WHERE id = ?")
+            cur.execute(query, (*fields.values(), source_id))
+    except Exception as e:
+        print(f"Source check update failed for {source_id}: {e}")
+
+# Non-ISO date layouts accepted from API published_key fields.
+_API_DATE_FORMATS = ("%m/%d/%Y %H:%M:%S", "%m/%d/%Y %H:%M", "%m/%d/%Y", "%d %b %Y", "%b %d, %Y")
+
+def _parse_date(text):
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        pass
+    try:
+        return parsedate_to_datetime(text)
+    except (TypeError, ValueError):
+        pass
+    for fmt in _API_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+def _utc_stamp(value):
+    """Normalize a feed/API date (epoch, ISO 8601, RFC 822 or a few common layouts) to a
+    UTC 'YYYY-MM-DDTHH:MM:SS' string, or None if it can't be parsed."""
+    if isinstance(value, bool) or value in (None, ""):
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            # Epoch seconds, or milliseconds from JavaScript-style APIs.
+            dt = datetime.fromtimestamp(value / 1000 if value > 1e11 else value, timezone.utc)
+        else:
+            dt = _parse_date(str(value).strip())
+    except (ValueError, OverflowError, OSError):
+        return None
+    if dt is None:
+        return None
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+def _newest_first(stamps):
+    """True if every entry has a timestamp and they never increase down the listing."""
+    return bool(stamps) and all(stamps) and all(a >= b for a, b in zip(stamps, stamps[1:]))
+
+class _HighWaterMark:
+    """A source's newest seen entry: its published time plus a ring of recent entry ids.
+
+    Entries already in the ring are skipped. On a newest-first listing the first
+    seen entry (or one published before the mark) ends the scan, since everything
+    after it is older. Published times are normalized UTC stamps (see _utc_stamp), so
+    they compare chronologically. Advanced via fields() only after a strict save
+    succeeds; a failed save leaves the stored mark where it was.
+    """
+
+    def __init__(self, source):
+        self.ids = json.loads(source['seen_ids'] or '[]')
+        self._seen = set(self.ids)
+        self.published = source['hwm_published_at']
+        self.newest = self.published
+        self.new_ids = []
+
+    def unseen(self, entries, entry_id, published, newest_first):
+        """Return (entries not seen before, whether the mark was reached)."""
+        fresh = []
+        for entry in entries:
+            eid = entry_id(entry)
+            when = published(entry)
+            older = newest_first and when and self.published and when < self.published
+            if eid in self._seen or older:
+                if newest_first:
+                    return fresh, True
+                continue
+            if eid is not None:
+                self._seen.add(eid)
+                self.new_ids.append(eid)
+            if when and (self.newest is None or when > self.newest):
+                self.newest = when
+            fresh.append(entry)
+        return fresh, False
+
+    def fields(self):
+        """job_sources columns recording the advanced mark."""
+        return {"seen_ids": json.dumps((self.new_ids + self.ids)[:SOURCE_SEEN_RING_SIZE]),
+                "hwm_published_at": self.newest}
+
+
 class UniversalRssFetcher:
     def __init__(self, source_config):
         self.config = source_config
         self.parsing_rules = json.loads(source_config['parsing_config'] or '{}')
 
-    def fetch(self):
+    def fetch(self, deadline=None):
         print(f"Fetching RSS: {self.config['name']}...")
+        deadline = deadline or _Deadline()
         try:
-            feed = feedparser.parse(self.config['url'])
-            count = 0
-            for entry in feed.entries:
+            # Download via requests (bounded timeout); feedparser's own fetcher has none.
+            fetched = _conditional_get(self.config, deadline)
+            if fetched is None:
+                print(f"Unchanged: {self.config['name']}")
+                return 0
+            resp, cache_fields = fetched
+            feed = feedparser.parse(resp.content)
+            mark = _HighWaterMark(self.config)
+            stamps = [self._published(e) for e in feed.entries]
+            newest_first = self.parsing_rules.get('newest_first', _newest_first(stamps))
+            entries, _ = mark.unseen(feed.entries, self._entry_id, self._published, newest_first)
+            metrics.SOURCE_SKIPPED.inc(len(feed.entries) - len(entries), source=self.config['name'])
+            leads = []
+            for entry in entries:
                 # Apply filters if config has them
                 if not self._passes_filter(entry):
                     continue
 
-                lead = {
+                leads.append({
                     "source": self.config['name'],
-                    "external_id": entry.id if 'id' in entry else entry.link,
+                    "external_id": self._entry_id(entry),
                     "title": entry.title,
                     "description": entry.get("summary", "") or entry.get("description", ""),
                     "url": entry.link,
                     "company": self._extract_company(entry.title),
                     "budget": "N/A"
-                }
-                
-                if save_lead(lead):
-                    count += 1
+                })
+
+            # Last deadline check: once saving starts it runs to completion.
+            deadline.remaining()
+            # Strict, so a failed insert raises before the validators are stored and the
+            # next poll refetches this body instead of getting a 304.
+            count = len(save_leads(leads, strict=True))
+            _record_source_check(self.config['id'], **cache_fields, **mark.fields())
             return count
         except Exception as e:
             print(f"Error fetching {self.config['name']}: {e}")
-            return 0
+            metrics.SOURCE_ERRORS.inc(source=self.config['name'])
+            raise
+
+    @staticmethod
+    def _entry_id(entry):
+        return entry.id if 'id' in entry else entry.link
+
+    @staticmethod
+    def _published(entry):
+        stamp = entry.get('published_parsed') or entry.get('updated_parsed')
+        return time.strftime("%Y-%m-%dT%H:%M:%S", stamp) if stamp else None
 
     def _extract_company(self, title):
         # Common pattern "Company: Job Title" or "Job Title at Company"
@@ -162,33 +575,70 @@ class UniversalApiFetcher:
         self.config = source_config
         self.parsing_rules = json.loads(source_config['parsing_config'] or '{}')
 
-    def fetch(self):
+    def fetch(self, deadline=None):
         print(f"Fetching API: {self.config['name']}...")
+        deadline = deadline or _Deadline()
         try:
-            resp = requests.get(self.config['url'], headers={"User-Agent": "Mozilla/5.0"}, timeout=15)
-            data = resp.json()
-            
-            # Handle list location (root or nested key)
-            items = data
-            if self.parsing_rules.get('root_key'):
-                items = data.get(self.parsing_rules['root_key'], [])
-            
-            count = 0
-            for item in items:
-                lead = self._map_item(item)
-                if lead and save_lead(lead):
-                    count += 1
+            fetched = _conditional_get(self.config, deadline)
+            if fetched is None:
+                print(f"Unchanged: {self.config['name']}")
+                return 0
+            resp, cache_fields = fetched
+            rules = self.parsing_rules
+            mark = _HighWaterMark(self.config)
+            # Optional pagination ({"page_param": "page", "page_start": 1, "max_pages": 5}) walks a
+            # newest-first listing until it reaches the high-water mark.
+            page_param = rules.get('page_param')
+            page = int(rules.get('page_start', 1))
+            items = self._items(resp.json())
+            stamps = [self._published(item) for item in items]
+            newest_first = rules.get('newest_first', bool(page_param) or _newest_first(stamps))
+            leads = []
+            max_pages = int(rules.get('max_pages', 5))
+            for pages in range(1, max_pages + 1):
+                fresh, reached = mark.unseen(items, self._entry_id, self._published, newest_first)
+                metrics.SOURCE_SKIPPED.inc(len(items) - len(fresh), source=self.config['name'])
+                leads.extend(lead for lead in map(self._map_item, fresh) if lead)
+                if reached or not page_param or not items or pages == max_pages:
+                    break
+                page += 1
+                next_page = _http_get(self.config['url'], deadline, params={page_param: page},
+                                      headers={"User-Agent": "Mozilla/5.0"})
+                next_page.raise_for_status()
+                items = self._items(next_page.json())
+
+            # Last deadline check: once saving starts it runs to completion.
+            deadline.remaining()
+            # Strict, so a failed insert raises before the validators are stored and the
+            # next poll refetches this body instead of getting a 304.
+            count = len(save_leads(leads, strict=True))
+            _record_source_check(self.config['id'], **cache_fields, **mark.fields())
             return count
         except Exception as e:
             print(f"Error fetching {self.config['name']}: {e}")
-            return 0
+            metrics.SOURCE_ERRORS.inc(source=self.config['name'])
+            raise
+
+    def _items(self, data):
+        # Handle list location (root or nested key)
+        if self.parsing_rules.get('root_key'):
+            return data.get(self.parsing_rules['root_key'], [])
+        return data
+
+    def _entry_id(self, item):
+        return str(item.get(self.parsing_rules.get('id_key', 'id'))) if isinstance(item, dict) else None
+
+    def _published(self, item):
+        key = self.parsing_rules.get('published_key')
+        # Unparseable dates give None, which disables the date cutoff for that item.
+        return _utc_stamp(item.get(key)) if key and isinstance(item, dict) else None
 
     def _map_item(self, item):
         rules = self.parsing_rules
         try:
             return {
                 "source": self.config['name'],
-                "external_id": str(item.get(rules.get('id_key', 'id'))),
+                "external_id": self._entry_id(item),
                 "title": item.get(rules.get('title_key', 'title')),
                 "description": item.get(rules.get('desc_key', 'description'), ""),
                 "url": item.get(rules.get('url_key', 'url')),
@@ -199,8 +649,73 @@ class UniversalApiFetcher:
             return None
 
 
+# Shared across refreshes so worker threads (and their pooled DB connections) are reused.
+_fetch_executor = None
+_fetch_executor_lock = threading.Lock()
+
+def _get_fetch_executor():
+    global _fetch_executor
+    with _fetch_executor_lock:
+        if _fetch_executor is None:
+            _fetch_executor = ThreadPoolExecutor(max_workers=FETCH_MAX_WORKERS, thread_name_prefix="fetcher")
+        return _fetch_executor
+
+# Sources with a fetch queued or running, from /leads/refresh or the scheduler alike,
+# so neither starts a second fetch of a source the other (or a timed-out run) still holds.
+_running_sources = set()
+_running_lock = threading.Lock()
+
+def running_sources():
+    """Ids of sources with a fetch queued or running."""
+    with _running_lock:
+        return set(_running_sources)
+
+def _release_source(source_id):
+    with _running_lock:
+        _running_sources.discard(source_id)
+
+def start_fetch(source, started=None):
+    """Submit one source's fetch to the fetcher pool, unless it already has one.
+
+    Returns the future, or None when the source is still being fetched. The source
+    stays marked running until the fetch thread is done (or the queued fetch is
+    cancelled), even if the caller gave up waiting on it.
+    """
+    with _running_lock:
+        if source['id'] in _running_sources:
+            return None
+        _running_sources.add(source['id'])
+    try:
+        future = _get_fetch_executor().submit(_fetch_source, source, started)
+    except Exception:
+        _release_source(source['id'])
+        raise
+    future.add_done_callback(lambda _: _release_source(source['id']))
+    return future
+
+def _fetch_source(source, started=None):
+    """Run the fetcher for one source under a SOURCE_FETCH_TIMEOUT deadline, recording when it began."""
+    deadline = _Deadline()
+    if started is not None:
+        started[source['id']] = time.monotonic()
+    count = 0
+    with metrics.SOURCE_FETCH_SECONDS.time(source=source['name']):
+        if source['type'] == 'rss':
+            count = UniversalRssFetcher(source).fetch(deadline)
+        elif source['type'] == 'api':
+            count = UniversalApiFetcher(source).fetch(deadline)
+    metrics.SOURCE_LEADS.inc(count, source=source['name'])
+    return count
+
 def run_all_fetchers():
-    """Executor for all configured sources."""
+    """Executor for all configured sources.
+
+    Sources are fetched concurrently on a bounded pool; log/progress events are
+    yielded in completion order. Sources already being fetched (by the scheduler or
+    an earlier run that timed out on them) are skipped. A source still running
+    after SOURCE_FETCH_TIMEOUT is reported as an error and no longer waited on; it
+    stays marked running until its thread finishes.
+    """
     # Use cursor to ensure compatibility
     with get_read_connection() as conn:
         cur = conn.cursor()
@@ -211,26 +726,45 @@ def run_all_fetchers():
     total_new = 0
     yield f"progress:0:Starting fetch for {len(sources)} sources..."
 
-    for i, source in enumerate(sources):
-        try:
-            result = 0
-            if source['type'] == 'rss':
-                result = UniversalRssFetcher(source).fetch()
-            elif source['type'] == 'api':
-                result = UniversalApiFetcher(source).fetch()
-            
-            total_new += result
-            yield f"log:Fetched {result} from {source['name']}"
-            
-        except Exception as e:
-            yield f"error:Failed {source['name']}: {e}"
-            
-        progress = int(((i + 1) / len(sources)) * 100)
-        yield f"progress:{progress}:Processing..."
-
-    yield f"done:{total_new}"
-
+    started = {}
+    pending = {}
+    finished = 0
+    for source in sources:
+        future = start_fetch(source, started)
+        if future is None:
+            finished += 1
+            yield f"log:Skipped {source['name']}: still fetching from an earlier run"
+        else:
+            pending[future] = source
 
+    try:
+        while pending:
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            events = []
+            for future in done:
+                source = pending.pop(future)
+                try:
+                    result = future.result()
+                    total_new += result
+                    events.append(f"log:Fetched {result} from {source['name']}")
+                except Exception as e:
+                    events.append(f"error:Failed {source['name']}: {e}")
+
+            now = time.monotonic()
+            for future, source in list(pending.items()):
+                begun = started.get(source['id'])
+                if begun is not None and now - begun > SOURCE_FETCH_TIMEOUT:
+                    pending.pop(future)
+                    events.append(f"error:Failed {source['name']}: timed out after {SOURCE_FETCH_TIMEOUT:g}s")
+
+            for event in events:
+                finished += 1
+                yield event
+                progress = int((finished / len(sources)) * 100)
+                yield f"progress:{progress}:Processing..."
+    finally:
+        # Client disconnected or generator closed early: drop anything not yet started.
+        for future in pending:
+            future.cancel()
 
-    
-
+    yield f"done:{total_new}"
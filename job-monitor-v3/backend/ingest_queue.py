@@ -0,0 +1,208 @@
+"""
+Durable ingest queue backing POST /leads/ingest.
+
+Jobs are appended to the ingest_queue table before the endpoint answers, so
+nothing accepted is lost on a restart or crash. The ingest worker claims
+batches under a lease, saves them through fetchers.save_leads and deletes
+them; failures are retried with a growing delay and moved to the 'dead'
+state after INGEST_MAX_ATTEMPTS. Delivery is at-least-once, which is safe
+because save_leads ignores leads that already exist.
+"""
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta
+
+import fetchers
+import metrics
+from config import INGEST_LEASE_SECS, INGEST_MAX_ATTEMPTS, INGEST_RETRY_DELAY_SECS
+from async_database import get_async_write_connection
+from database import get_read_connection, get_write_connection, _translate_params, DATABASE_URL
+
+_lock = threading.Lock()
+# Pending (not yet saved, not dead) rows; seeded from the table by recover().
+_depth = 0
+# Room held by try_reserve() for requests whose enqueue hasn't finished yet.
+_reserved = 0
+_stats = {"enqueued": 0, "saved_batches": 0, "saved_jobs": 0, "retries": 0, "dead_lettered": 0}
+
+
+def _adjust_depth(delta):
+    global _depth
+    with _lock:
+        _depth = max(0, _depth + delta)
+
+
+def depth():
+    """Jobs accepted but not yet saved."""
+    with _lock:
+        return _depth
+
+
+def try_reserve(n, limit):
+    """Atomically hold room for `n` jobs if the queue (plus other holds) stays within `limit`.
+
+    Returns False, holding nothing, when it doesn't fit. A successful hold is turned
+    into depth by enqueue(jobs, reserved=True), or given back with release(n) if the
+    enqueue fails.
+    """
+    global _reserved
+    with _lock:
+        if _depth + _reserved + n > limit:
+            return False
+        _reserved += n
+        return True
+
+
+def release(n):
+    """Give back a try_reserve() hold whose jobs were not enqueued."""
+    global _reserved
+    with _lock:
+        _reserved = max(0, _reserved - n)
+
+
+async def enqueue(jobs, reserved=False):
+    """Append jobs (dicts) in one transaction. Returns the number written.
+
+    With reserved=True the jobs were held by try_reserve(); the hold becomes depth.
+    """
+    global _depth, _reserved
+    now = datetime.now().isoformat()
+    rows = [(json.dumps(job), now) for job in jobs]
+    async with get_async_write_connection() as conn:
+        await conn.executemany(
+            "INSERT INTO ingest_queue (payload, status, attempts, created_at) VALUES (?, 'pending', 0, ?)",
+            rows,
+        )
+    with _lock:
+        _depth += len(rows)
+        if reserved:
+            _reserved = max(0, _reserved - len(rows))
+        _stats["enqueued"] += len(rows)
+    return len(rows)
+
+
+def claim(limit):
+    """Lease up to `limit` pending jobs, oldest first. Returns [(row_id, attempts, job), ...]."""
+    token = uuid.uuid4().hex
+    now = datetime.now()
+    expires = (now + timedelta(seconds=INGEST_LEASE_SECS)).isoformat()
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        if DATABASE_URL:
+            cur.execute("""
+                UPDATE ingest_queue SET lease_token = %s, lease_expires_at = %s
+                WHERE id IN (
+                    SELECT id FROM ingest_queue
+                    WHERE status = 'pending' AND (lease_expires_at IS NULL OR lease_expires_at < %s)
+                    ORDER BY id
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING id, attempts, payload
+            """, (token, expires, now.isoformat(), limit))
+        else:
+            # SQLite writers are serialized by DB_WRITE_LOCK, so UPDATE-then-SELECT is atomic.
+            cur.execute("""
+                UPDATE ingest_queue SET lease_token = ?, lease_expires_at = ?
+                WHERE id IN (
+                    SELECT id FROM ingest_queue
+                    WHERE status = 'pending' AND (lease_expires_at IS NULL OR lease_expires_at < ?)
+                    ORDER BY id
+                    LIMIT ?
+                )
+            """, (token, expires, now.isoformat(), limit))
+            cur.execute("SELECT id, attempts, payload FROM ingest_queue WHERE lease_token = ?", (token,))
+        rows = cur.fetchall()
+    return sorted((row['id'], row['attempts'], json.loads(row['payload'])) for row in rows)
+
+
+def ack(row_ids):
+    """Jobs were saved: remove them from the queue."""
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        cur.executemany(_translate_params("DELETE FROM ingest_queue WHERE id = ?"), [(i,) for i in row_ids])
+    _adjust_depth(-len(row_ids))
+
+
+def fail(claimed, error):
+    """Record a failed attempt: retry after a growing delay, or dead-letter after INGEST_MAX_ATTEMPTS."""
+    now = datetime.now()
+    retry, dead = [], []
+    for row_id, attempts, _ in claimed:
+        attempts += 1
+        if attempts >= INGEST_MAX_ATTEMPTS:
+            dead.append((attempts, str(error)[:500], row_id))
+        else:
+            not_before = (now + timedelta(seconds=INGEST_RETRY_DELAY_SECS * attempts)).isoformat()
+            retry.append((attempts, str(error)[:500], not_before, row_id))
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        if retry:
+            # lease_expires_at doubles as the not-before time for the next attempt.
+            cur.executemany(_translate_params("""
+                UPDATE ingest_queue SET attempts = ?, last_error = ?, lease_token = NULL, lease_expires_at = ?
+                WHERE id = ?
+            """), retry)
+        if dead:
+            cur.executemany(_translate_params("""
+                UPDATE ingest_queue SET status = 'dead', attempts = ?, last_error = ?, lease_token = NULL, lease_expires_at = NULL
+                WHERE id = ?
+            """), dead)
+    _adjust_depth(-len(dead))
+    metrics.INGEST_JOBS.inc(len(retry), outcome="retried")
+    metrics.INGEST_JOBS.inc(len(dead), outcome="dead")
+    with _lock:
+        _stats["retries"] += len(retry)
+        _stats["dead_lettered"] += len(dead)
+
+
+def process_batch(limit):
+    """Claim, save and ack one batch. Returns the number of jobs claimed (0 = nothing ready)."""
+    claimed = claim(limit)
+    if not claimed:
+        return 0
+    metrics.INGEST_BATCH_SIZE.observe(len(claimed))
+    try:
+        with metrics.INGEST_BATCH_SECONDS.time():
+            fetchers.save_leads([job for _, _, job in claimed], strict=True)
+    except Exception as e:
+        print(f"Ingest Error: batch of {len(claimed)} failed, will retry: {e}")
+        fail(claimed, e)
+        return len(claimed)
+    ack([row_id for row_id, _, _ in claimed])
+    metrics.INGEST_JOBS.inc(len(claimed), outcome="saved")
+    with _lock:
+        _stats["saved_batches"] += 1
+        _stats["saved_jobs"] += len(claimed)
+    return len(claimed)
+
+
+def recover():
+    """Startup replay: release leases left by a crashed or killed process and reseed the depth counter."""
+    global _depth
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE ingest_queue SET lease_token = NULL, lease_expires_at = NULL WHERE status = 'pending' AND lease_token IS NOT NULL")
+        released = cur.rowcount or 0
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT count(*) AS cnt FROM ingest_queue WHERE status = 'pending'")
+        row = cur.fetchone()
+        pending = row['cnt'] if isinstance(row, dict) else row[0]
+    with _lock:
+        _depth = pending
+    if pending:
+        print(f"📥 Replaying {pending} queued ingest jobs ({released} had stale leases)")
+    return pending
+
+
+metrics.gauge("ingest_queue_depth", "Jobs accepted by /leads/ingest but not yet saved", depth)
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["depth"] = _depth
+        stats["reserved"] = _reserved
+    return stats
@@ -0,0 +1,125 @@
+"""
+Keyword pre-classifier.
+
+AGENCY_KEYWORDS and REJECT_KEYWORDS are compiled into a single regex with
+word boundaries, so title + description are scanned once per lead. The
+result decides clear rejects and clear single-agency matches without an LLM
+call; anything ambiguous falls through to the AI.
+"""
+import re
+import threading
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from config import (
+    AGENCY_KEYWORDS, REJECT_KEYWORDS,
+    KEYWORD_TITLE_WEIGHT, KEYWORD_MIN_SCORE, KEYWORD_MATCH_MARGIN,
+)
+
+REJECT = "__reject__"
+
+
+def _compile(keywords_by_label):
+    """One alternation over every phrase (longest first), bounded by non-word characters."""
+    labels = defaultdict(set)
+    for label, phrases in keywords_by_label.items():
+        for phrase in phrases:
+            labels[phrase.lower()].add(label)
+    alternation = "|".join(re.escape(p) for p in sorted(labels, key=len, reverse=True))
+    return re.compile(rf"(?<!\w)(?:{alternation})(?!\w)", re.IGNORECASE), dict(labels)
+
+
+_PATTERN, _PHRASE_LABELS = _compile({**AGENCY_KEYWORDS, REJECT: REJECT_KEYWORDS})
+
+_stats_lock = threading.Lock()
+_stats = {"rejected": 0, "matched": 0, "fell_through": 0}
+
+
+@dataclass
+class KeywordVerdict:
+    agency_scores: dict = field(default_factory=dict)
+    reject_hits: list = field(default_factory=list)
+    reject_in_title: bool = False
+
+    @property
+    def ranked(self):
+        return sorted(self.agency_scores.items(), key=lambda kv: kv[1], reverse=True)
+
+    @property
+    def is_reject(self):
+        """Reject keyword in the title, or in the body with no agency signal at all."""
+        return self.reject_in_title or (bool(self.reject_hits) and not self.agency_scores)
+
+    @property
+    def clear_agency(self):
+        """The top agency if it clears KEYWORD_MIN_SCORE and leads the runner-up by KEYWORD_MATCH_MARGIN."""
+        ranked = self.ranked
+        if not ranked or self.reject_hits:
+            return None
+        top, top_score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        if top_score >= KEYWORD_MIN_SCORE and top_score - runner_up >= KEYWORD_MATCH_MARGIN:
+            return top
+        return None
+
+
+def scan(title, description=""):
+    """Single pass over title + description. Each distinct phrase counts once,
+    weighted KEYWORD_TITLE_WEIGHT if it appears in the title."""
+    title = title or ""
+    text = f"{title}\n{description or ''}"
+    phrase_weight = {}
+    # Tracked separately from the weight, which need not exceed 1 (KEYWORD_TITLE_WEIGHT=1).
+    title_phrases = set()
+    for m in _PATTERN.finditer(text):
+        phrase = m.group(0).lower()
+        in_title = m.start() < len(title)
+        if in_title:
+            title_phrases.add(phrase)
+        weight = KEYWORD_TITLE_WEIGHT if in_title else 1
+        phrase_weight[phrase] = max(phrase_weight.get(phrase, 0), weight)
+
+    verdict = KeywordVerdict()
+    for phrase, weight in phrase_weight.items():
+        for label in _PHRASE_LABELS[phrase]:
+            if label == REJECT:
+                verdict.reject_hits.append(phrase)
+                verdict.reject_in_title = verdict.reject_in_title or phrase in title_phrases
+            else:
+                verdict.agency_scores[label] = verdict.agency_scores.get(label, 0) + weight
+    return verdict
+
+
+def classify(title, description=""):
+    """Return (agency, confidence, score) when keywords alone are decisive, else None."""
+    verdict = scan(title, description)
+    if verdict.is_reject:
+        _bump("rejected")
+        return "reject", 1.0, 0
+
+    agency = verdict.clear_agency
+    if agency:
+        ranked = verdict.ranked
+        top = ranked[0][1]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        confidence = round(min(0.95, top / (top + runner_up)), 2)
+        score = min(80, 40 + 5 * top)
+        _bump("matched")
+        return agency, confidence, score
+
+    _bump("fell_through")
+    return None
+
+
+def _bump(key):
+    with _stats_lock:
+        _stats[key] += 1
+
+
+def get_stats():
+    """How many classifications were settled by keywords vs. sent to the LLM."""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats["short_circuit_rate"] = round((stats["rejected"] + stats["matched"]) / total, 3) if total else 0.0
+    return stats
@@ -0,0 +1,186 @@
+"""
+Lead change feed behind /leads/changes and /leads/stream.
+
+Triggers on job_leads append a row to lead_changes whenever a lead is
+inserted, scored, enriched (proposal/plan), has its status changed or has any
+other visible column updated, so lead_changes.seq is a monotonically
+increasing cursor over every write. Seqs are handed out in commit order
+(see migrations._create_lead_change_triggers), so a cursor never skips a
+change that commits late.
+Clients catch up with changes_since(cursor); the Broadcaster polls the
+table once for all connected SSE clients and fans new changes out to them.
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+from config import LEAD_STREAM_POLL_SECS, LEAD_STREAM_QUEUE_MAX, LEAD_CHANGES_PAGE_MAX, LEAD_CHANGES_RETENTION_SECS
+from async_database import get_async_read_connection, get_async_write_connection
+from database import get_read_connection, _translate_params
+
+PRUNE_EVERY_SECS = 3600
+
+
+_CURRENT_SEQ_SQL = "SELECT max(seq) FROM lead_changes"
+_OLDEST_SEQ_SQL = "SELECT min(seq) FROM lead_changes"
+_CHANGES_SQL = "SELECT seq, lead_id, kind FROM lead_changes WHERE seq > ? ORDER BY seq LIMIT ?"
+
+
+def _scalar(cur):
+    row = cur.fetchone()
+    if row is None:
+        return None
+    return row[0] if not isinstance(row, dict) else next(iter(row.values()))
+
+
+def _collapse(rows):
+    """One entry per lead, ordered by its newest seq, listing every change kind seen."""
+    latest = {}
+    for row in rows:
+        entry = latest.pop(row['lead_id'], None) or {"lead_id": row['lead_id'], "kinds": []}
+        entry["seq"] = row['seq']
+        if row['kind'] not in entry["kinds"]:
+            entry["kinds"].append(row['kind'])
+        latest[row['lead_id']] = entry  # re-insert so dict order follows the newest seq
+    return latest
+
+
+def _leads_sql(columns, count):
+    return f"SELECT {', '.join(columns)} FROM job_leads WHERE id IN ({', '.join('?' for _ in range(count))})"
+
+
+def _result(since, rows, oldest, latest, leads):
+    reset = bool(since) and oldest is not None and since < oldest - 1
+    if not rows:
+        return [], since, reset
+    changes = []
+    for lead_id, entry in latest.items():
+        entry["lead"] = leads.get(lead_id)  # None if the lead has since been deleted
+        changes.append(entry)
+    return changes, rows[-1]['seq'], reset
+
+
+def current_seq():
+    """Cursor of the newest change (0 if there are none)."""
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_CURRENT_SEQ_SQL)
+        return _scalar(cur) or 0
+
+
+async def current_seq_async():
+    async with get_async_read_connection() as conn:
+        return await conn.fetchval(_CURRENT_SEQ_SQL) or 0
+
+
+def changes_since(since, columns, limit=LEAD_CHANGES_PAGE_MAX):
+    """
+    Changes after `since`, collapsed to one entry per lead carrying its current
+    `columns` and every change kind seen. Returns (changes, cursor, reset):
+    `cursor` is the seq to resume from and `reset` is True when `since` is older
+    than the retained history, so the client must reload the full list instead.
+    """
+    limit = max(1, min(limit, LEAD_CHANGES_PAGE_MAX))
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(_translate_params(_CHANGES_SQL), (since, limit))
+        rows = cur.fetchall()
+        cur.execute(_OLDEST_SEQ_SQL)
+        oldest = _scalar(cur)
+        latest = _collapse(rows)
+        leads = {}
+        if latest:
+            cur.execute(_translate_params(_leads_sql(columns, len(latest))), tuple(latest))
+            leads = {row['id']: dict(row) for row in cur.fetchall()}
+    return _result(since, rows, oldest, latest, leads)
+
+
+async def changes_since_async(since, columns, limit=LEAD_CHANGES_PAGE_MAX):
+    """changes_since for the event loop (used by the SSE stream and broadcaster)."""
+    limit = max(1, min(limit, LEAD_CHANGES_PAGE_MAX))
+    async with get_async_read_connection() as conn:
+        rows = await conn.fetchall(_CHANGES_SQL, (since, limit))
+        oldest = await conn.fetchval(_OLDEST_SEQ_SQL)
+        latest = _collapse(rows)
+        leads = {}
+        if latest:
+            leads = {row['id']: dict(row) for row in await conn.fetchall(_leads_sql(columns, len(latest)), tuple(latest))}
+    return _result(since, rows, oldest, latest, leads)
+
+
+async def prune():
+    """Drop changes older than LEAD_CHANGES_RETENTION_SECS."""
+    cutoff = (datetime.now() - timedelta(seconds=LEAD_CHANGES_RETENTION_SECS)).isoformat()
+    async with get_async_write_connection() as conn:
+        return await conn.execute("DELETE FROM lead_changes WHERE created_at < ?", (cutoff,))
+
+
+class Broadcaster:
+    """One poller for all /leads/stream subscribers. Each subscriber gets a bounded
+    queue; a subscriber that falls LEAD_STREAM_QUEUE_MAX changes behind is dropped
+    and catches up from its last event id when it reconnects."""
+
+    def __init__(self, columns):
+        self.columns = columns
+        self.cursor = 0
+        self._subscribers = set()
+        self.events_sent = 0
+        self.dropped = 0
+
+    def subscribe(self):
+        queue = asyncio.Queue(maxsize=LEAD_STREAM_QUEUE_MAX)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue):
+        self._subscribers.discard(queue)
+
+    def _publish(self, changes):
+        for queue in list(self._subscribers):
+            try:
+                for change in changes:
+                    queue.put_nowait(change)
+                self.events_sent += len(changes)
+            except asyncio.QueueFull:
+                # Too far behind: end its stream; the client resumes from Last-Event-ID.
+                self.dropped += 1
+                self._end(queue)
+
+    def _end(self, queue):
+        self.unsubscribe(queue)
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    def close(self):
+        """End every open stream (shutdown)."""
+        for queue in list(self._subscribers):
+            self._end(queue)
+
+    async def run(self, stop):
+        loop = asyncio.get_event_loop()
+        self.cursor = await current_seq_async()
+        last_prune = 0.0
+        print(f"📡 Lead change broadcaster started at seq {self.cursor}")
+        while not stop.is_set():
+            try:
+                if self._subscribers:
+                    changes, self.cursor, _ = await changes_since_async(self.cursor, self.columns)
+                    if changes:
+                        self._publish(changes)
+                        continue  # drain a backlog without sleeping
+                else:
+                    # Nobody listening: just keep the cursor current.
+                    self.cursor = await current_seq_async()
+                if loop.time() - last_prune > PRUNE_EVERY_SECS:
+                    last_prune = loop.time()
+                    await prune()
+            except Exception as e:
+                print(f"Lead change broadcaster error: {e}")
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=LEAD_STREAM_POLL_SECS)
+            except asyncio.TimeoutError:
+                pass
+
+    def get_stats(self):
+        return {"subscribers": len(self._subscribers), "cursor": self.cursor,
+                "events_sent": self.events_sent, "dropped_subscribers": self.dropped}
@@ -1,19 +1,41 @@
-from fastapi import FastAPI, HTTPException, Body, BackgroundTasks, Depends, Security, Request
+from fastapi import FastAPI, HTTPException, Body, BackgroundTasks, Depends, Security, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from pydantic import BaseModel
 import os
 import json
 import time
-from datetime import datetime
+import base64
+from datetime import datetime, timedelta
 from typing import List, Optional, Dict
 from groq import Groq
 from dotenv import load_dotenv
-from config import DB_PATH, AGENCY_CONTEXT, API_KEY
+from config import (
+    DB_PATH, AGENCY_CONTEXT, API_KEY,
+    INGEST_QUEUE_MAX, INGEST_BATCH_SIZE, INGEST_BATCH_WINDOW_MS, INGEST_RETRY_AFTER_SECS,
+    INGEST_POLL_SECS, INGEST_DRAIN_TIMEOUT_SECS,
+    LEAD_STREAM_HEARTBEAT_SECS, LEAD_CHANGES_PAGE_MAX, RESPONSE_GZIP_MIN_BYTES,
+    METRICS_ROLLUP_SECS, METRICS_RETENTION_DAYS, SOURCE_SCHEDULER_ENABLED,
+)
 import fetchers
-from ai_client import generate_with_retry
+import migrations
+import scoring
+import classify_cache
+import keyword_matcher
+import ingest_queue
+import near_dupes
+import search
+import lead_changes
+import response_cache
+import exporter
+import metrics
+import source_scheduler
+import seen_filter
+from ai_client import generate_with_retry_async, stream_with_retry_async, GenerationError, get_key_stats, get_async_stats
 import asyncio
 from contextlib import asynccontextmanager
-from database import get_read_connection, get_write_connection, _translate_params
+from database import get_read_connection, get_write_connection, _translate_params, get_pool_stats, close_pool
+from async_database import get_async_read_connection, get_async_write_connection, get_async_pool_stats, close_async_pool
 
 load_dotenv()
 
@@ -38,9 +60,38 @@ async def lifespan(app: FastAPI):
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
     init_db()
     seed_sources()
-    asyncio.create_task(worker())
-    asyncio.create_task(ai_analysis_worker())
+    classify_cache.invalidate_stale(fetchers.CLASSIFY_MODEL)
+    near_dupes.rebuild()
+    seen_filter.rebuild()
+    ingest_queue.recover()
+    ingest_task = asyncio.create_task(worker())
+    scoring_tasks = [asyncio.create_task(ai_analysis_worker(n)) for n in range(scoring.worker_count())]
+    broadcaster_task = asyncio.create_task(lead_broadcaster.run(_stream_stop))
+    metrics_task = asyncio.create_task(metrics_rollup_worker())
+    scheduler_task = asyncio.create_task(source_scheduler.run(_scheduler_stop)) if SOURCE_SCHEDULER_ENABLED else None
     yield
+    if scheduler_task:
+        _scheduler_stop.set()
+        await scheduler_task
+    _metrics_stop.set()
+    await metrics_task
+    _stream_stop.set()
+    lead_broadcaster.close()
+    await broadcaster_task
+    # Graceful shutdown: let the ingest worker drain; anything left stays queued for next start.
+    _ingest_stop.set()
+    _ingest_wakeup.set()
+    try:
+        await asyncio.wait_for(ingest_task, timeout=INGEST_DRAIN_TIMEOUT_SECS)
+    except asyncio.TimeoutError:
+        print(f"⏳ Ingest drain timed out; {ingest_queue.depth()} jobs remain queued for next start")
+    # Scoring workers loop forever; stop them before their pools go away. An interrupted
+    # batch keeps its claim and is rescored once the lease expires.
+    for task in scoring_tasks:
+        task.cancel()
+    await asyncio.gather(*scoring_tasks, return_exceptions=True)
+    await close_async_pool()
+    close_pool()
 
 app = FastAPI(title="Job Lead Monitor V2", lifespan=lifespan, dependencies=[Depends(verify_api_key)])
 
@@ -50,80 +101,15 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Compresses everything else; cached read responses arrive already gzipped and are left alone.
+# Relies on Starlette >= 0.46 (requirements.txt) to skip pre-encoded and text/event-stream responses.
+app.add_middleware(GZipMiddleware, minimum_size=RESPONSE_GZIP_MIN_BYTES)
 
 def init_db():
-    DATABASE_URL = os.getenv("DATABASE_URL")
-    with get_write_connection() as conn:
-        c = conn.cursor()
-        pk_type = "SERIAL" if DATABASE_URL else "INTEGER PRIMARY KEY AUTOINCREMENT"
-
-        c.execute(_translate_params("""
-            CREATE TABLE IF NOT EXISTS job_leads (
-                id TEXT PRIMARY KEY,
-                source TEXT,
-                external_id TEXT,
-                title TEXT,
-                description TEXT,
-                url TEXT,
-                budget TEXT,
-                company TEXT,
-                posted_at TEXT,
-                agency_match TEXT,
-                match_score REAL,
-                ai_confidence REAL,
-                match_reasoning TEXT,
-                status TEXT DEFAULT 'new',
-                applied INTEGER DEFAULT 0,
-                applied_at TEXT,
-                applied_by TEXT,
-                connect_score INTEGER DEFAULT 0,
-                client_signals TEXT,
-                client_proposal TEXT,
-                client_plan TEXT,
-                created_at TEXT
-            )
-        """))
-
-        c.execute(_translate_params("""
-            CREATE TABLE IF NOT EXISTS job_sources (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL,
-                url TEXT,
-                parsing_config TEXT,
-                enabled INTEGER DEFAULT 1,
-                last_checked TEXT
-            )
-        """))
-        
-        try:
-            c.execute(_translate_params("ALTER TABLE job_leads ADD COLUMN ai_confidence REAL"))
-            c.execute(_translate_params("ALTER TABLE job_leads ADD COLUMN match_reasoning TEXT"))
-        except: pass
-
-        try:
-            c.execute(_translate_params("ALTER TABLE job_leads ADD COLUMN client_proposal TEXT"))
-            c.execute(_translate_params("ALTER TABLE job_leads ADD COLUMN client_plan TEXT"))
-        except: pass
-        
-        try:
-            c.execute(_translate_params("ALTER TABLE job_sources ADD COLUMN parsing_config TEXT"))
-        except: pass
-
-        c.execute(_translate_params(f"""
-            CREATE TABLE IF NOT EXISTS system_metrics (
-                id {pk_type},
-                metric_type TEXT, value REAL, timestamp TEXT
-            )
-        """))
-
-        c.execute(_translate_params("""
-            CREATE TABLE IF NOT EXISTS contacts (
-                id TEXT PRIMARY KEY, name TEXT, role TEXT, location TEXT, url TEXT,
-                email_guess TEXT, validation_status TEXT DEFAULT 'pending', source TEXT, created_at TEXT
-            )
-        """))
+    """Bring the schema up to date via the versioned migration runner."""
+    migrations.run_migrations()
 
 def seed_sources():
     with get_write_connection() as conn:
@@ -195,19 +181,52 @@ def get_system_health():
     try:
         with get_read_connection() as conn:
             pass # We just need to check if we can connect
-        queue_length = job_queue.qsize()
+        queue_length = ingest_queue.depth()
+        rates = metrics.summary()
         return {
             "status": "Healthy",
             "metrics": {
-                "avg_ai_time_sec": 0.5,
-                "throughput_jobs_min": 60,
+                "avg_ai_time_sec": rates["avg_ai_time_sec"],
+                "throughput_jobs_min": rates["throughput_jobs_min"],
                 "queue_length": queue_length,
+                "rates": rates,
+                "db_pool": get_pool_stats(),
+                "async_db_pool": get_async_pool_stats(),
+                "groq_keys": get_key_stats(),
+                "groq_async": get_async_stats(),
+                "classification_cache": classify_cache.get_stats(),
+                "keyword_prefilter": keyword_matcher.get_stats(),
+                "ingest_queue": ingest_queue.get_stats(),
+                "near_duplicates": near_dupes.get_stats(),
+                "seen_filter": seen_filter.get_stats(),
+                "lead_stream": lead_broadcaster.get_stats(),
+                "response_cache": response_cache.get_stats(),
+                "source_scheduler": source_scheduler.get_stats(),
             },
             "recommendation": "System running smoothly.",
         }
     except Exception as e:
         return {"status": "Error", "message": str(e)}
 
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus scrape endpoint (text exposition format)."""
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+_scheduler_stop = asyncio.Event()
+
+@app.get("/sources/schedule")
+async def get_source_schedule():
+    """Each source's adaptive polling interval, next poll, yield/error stats and disabled state."""
+    return {"sources": await source_scheduler.get_schedule(), "stats": source_scheduler.get_stats()}
+
+@app.post("/sources/{source_id}/enable")
+async def enable_source(source_id: str):
+    """Re-enable a (possibly auto-disabled) source; it is polled on the next scheduler tick."""
+    if not await source_scheduler.enable(source_id):
+        raise HTTPException(status_code=404, detail="Source not found")
+    return {"status": "enabled", "id": source_id}
+
 @app.get("/leads/refresh")
 def refresh_leads():
     from fastapi.responses import StreamingResponse
@@ -218,10 +237,23 @@ def refresh_leads():
 
 @app.post("/leads/ingest")
 async def ingest_leads(req: IngestRequest):
-    count = 0
-    for job in req.jobs:
-        await job_queue.put(job.dict())
-        count += 1
+    if len(req.jobs) > INGEST_QUEUE_MAX:
+        raise HTTPException(status_code=413, detail=f"Batch too large; send at most {INGEST_QUEUE_MAX} jobs per request")
+    # All-or-nothing: if the batch doesn't fit, reject it whole so the client can resend it as-is.
+    # The room is reserved atomically, so concurrent requests can't all pass the check.
+    if not ingest_queue.try_reserve(len(req.jobs), INGEST_QUEUE_MAX):
+        raise HTTPException(
+            status_code=429,
+            detail=f"Ingest queue full ({ingest_queue.depth()}/{INGEST_QUEUE_MAX}); retry later",
+            headers={"Retry-After": str(INGEST_RETRY_AFTER_SECS)},
+        )
+    # Persist before answering so accepted jobs survive a restart.
+    try:
+        count = await ingest_queue.enqueue([job.dict() for job in req.jobs], reserved=True)
+    except Exception:
+        ingest_queue.release(len(req.jobs))
+        raise
+    _ingest_wakeup.set()
     return {"status": "queued", "count": count}
 
 class ManualLeadRequest(BaseModel):
@@ -249,61 +281,292 @@ def add_manual_lead(req: ManualLeadRequest):
         ))
     return {"success": True, "id": lid}
 
-@app.get("/leads", response_model=List[JobLead])
-async def get_leads():
+# Heavy text columns left out of the list projection; fetch them via GET /leads/{lead_id}.
+LEAD_DETAIL_ONLY_COLUMNS = ("description", "client_proposal", "client_plan")
+# Explicit projections, so internal columns (claims, simhash, search_vector...) never leak.
+LEAD_COLUMNS = list(JobLead.model_fields)
+LEAD_LIST_COLUMNS = [f for f in LEAD_COLUMNS if f not in LEAD_DETAIL_ONLY_COLUMNS]
+LEADS_PAGE_DEFAULT = 100
+LEADS_PAGE_MAX = 500
+
+def _encode_cursor(row) -> str:
+    key = [row['match_score'], row['posted_at'], row['id']]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def _decode_cursor(cursor: str):
     try:
+        score, posted_at, lead_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return score, posted_at, lead_id
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def _lead_filters(agency=None, source=None, min_score=None, applied=None,
+                  posted_after=None, posted_before=None, status=None):
+    """Build the shared WHERE clause for lead listings."""
+    clauses, params = [], []
+    if status:
+        clauses.append("status = ?"); params.append(status)
+    if agency:
+        clauses.append("agency_match = ?"); params.append(agency)
+    if source:
+        clauses.append("source = ?"); params.append(source)
+    if min_score is not None:
+        clauses.append("match_score >= ?"); params.append(min_score)
+    if applied is not None:
+        clauses.append("applied = ?"); params.append(1 if applied else 0)
+    if posted_after:
+        clauses.append("posted_at >= ?"); params.append(posted_after)
+    if posted_before:
+        clauses.append("posted_at < ?"); params.append(posted_before)
+    return clauses, params
+
+@app.get("/leads")
+def get_leads(
+    request: Request,
+    limit: int = LEADS_PAGE_DEFAULT,
+    cursor: Optional[str] = None,
+    view: str = "full",
+    agency: Optional[str] = None,
+    source: Optional[str] = None,
+    min_score: Optional[float] = None,
+    applied: Optional[bool] = None,
+    posted_after: Optional[str] = None,
+    posted_before: Optional[str] = None,
+):
+    """
+    Keyset-paginated lead listing ordered by (match_score, posted_at, id) DESC.
+    The body stays a plain array; the next page's cursor is sent in X-Next-Cursor.
+    view=list drops description/client_proposal/client_plan. Served via response_cache (ETag/304).
+    """
+    limit = max(1, min(limit, LEADS_PAGE_MAX))
+    clauses, params = _lead_filters(agency, source, min_score, applied, posted_after, posted_before, status="new")
+    if cursor:
+        clauses.append("(match_score, posted_at, id) < (?, ?, ?)")
+        params.extend(_decode_cursor(cursor))
+    columns = ", ".join(LEAD_LIST_COLUMNS if view == "list" else LEAD_COLUMNS)
+
+    def build():
         with get_read_connection() as conn:
             cur = conn.cursor()
-            query = _translate_params("SELECT * FROM job_leads WHERE status='new' ORDER BY match_score DESC, posted_at DESC")
-            cur.execute(query)
+            query = _translate_params(
+                f"SELECT {columns} FROM job_leads WHERE {' AND '.join(clauses)} "
+                "ORDER BY match_score DESC, posted_at DESC, id DESC LIMIT ?"
+            )
+            cur.execute(query, (*params, limit + 1))
             rows = cur.fetchall()
-            results = [dict(row) for row in rows]
-        return results
+            results = [dict(row) for row in rows[:limit]]
+        headers = {"X-Next-Cursor": _encode_cursor(results[-1])} if len(rows) > limit else {}
+        return results, headers
+
+    try:
+        return response_cache.respond(request, build)
     except Exception as e:
         print(f"Error in /leads: {e}")
         return []
 
-job_queue = asyncio.Queue()
+@app.get("/leads/stats")
+def get_lead_stats(request: Request):
+    """
+    Header counts for the dashboard over every open lead (status 'new'), aggregated in SQL so the
+    client only has to load the page it shows: total, per agency, applied and per source.
+    """
+    clauses, params = _lead_filters(status="new")
+    where = " AND ".join(clauses)
+
+    def grouped(cur, column):
+        cur.execute(_translate_params(
+            f"SELECT {column} AS value, COUNT(*) AS n FROM job_leads WHERE {where} GROUP BY {column}"
+        ), params)
+        return {row["value"]: row["n"] for row in cur.fetchall() if row["value"] is not None}
+
+    def build():
+        with get_read_connection() as conn:
+            cur = conn.cursor()
+            agencies = grouped(cur, "agency_match")
+            sources = grouped(cur, "source")
+            applied = grouped(cur, "applied")
+        return {
+            "total": sum(sources.values()),
+            "agencies": agencies,
+            "applied": applied.get(1, 0),
+            "sources": sources,
+        }, {}
+
+    return response_cache.respond(request, build)
+
+lead_broadcaster = lead_changes.Broadcaster(LEAD_LIST_COLUMNS)
+_stream_stop = asyncio.Event()
+
+def _sse(event, data, event_id=None):
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.get("/leads/changes")
+def get_lead_changes(since: Optional[int] = None, limit: int = LEAD_CHANGES_PAGE_MAX):
+    """
+    Leads inserted, scored, enriched, re-statused or updated after change cursor `since`, one
+    entry per lead ({lead_id, seq, kinds, lead}) in the list projection. Resume from the
+    returned cursor; reset=true means `since` has been pruned and /leads must be reloaded.
+    Without `since` only the current cursor is returned.
+    """
+    if since is None:
+        return {"changes": [], "cursor": lead_changes.current_seq(), "reset": False}
+    changes, cursor, reset = lead_changes.changes_since(since, LEAD_LIST_COLUMNS, limit)
+    return {"changes": changes, "cursor": cursor, "reset": reset}
+
+@app.get("/leads/stream")
+async def stream_leads(request: Request, since: Optional[int] = None):
+    """
+    Server-Sent Events: a `lead` event (id = change cursor) per changed lead, as in
+    /leads/changes. Reconnects resume from Last-Event-ID (or ?since=); a `reset` event
+    asks the client to reload /leads.
+    """
+    from fastapi.responses import StreamingResponse
+    last_event_id = request.headers.get("Last-Event-ID", "")
+    cursor = int(last_event_id) if last_event_id.isdigit() else since
+    queue = lead_broadcaster.subscribe()
+
+    async def event_stream():
+        nonlocal cursor
+        try:
+            yield "retry: 3000\n\n"
+            if cursor is None:
+                cursor = lead_broadcaster.cursor
+            # Catch up from the client's cursor, then switch to live events.
+            while True:
+                changes, next_cursor, reset = await lead_changes.changes_since_async(cursor, LEAD_LIST_COLUMNS)
+                if reset:
+                    yield _sse("reset", {})
+                    cursor = await lead_changes.current_seq_async()
+                    break
+                for change in changes:
+                    yield _sse("lead", change, change["seq"])
+                if next_cursor == cursor:
+                    break
+                cursor = next_cursor
+            while not await request.is_disconnected():
+                try:
+                    change = await asyncio.wait_for(queue.get(), timeout=LEAD_STREAM_HEARTBEAT_SECS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if change is None:
+                    break
+                if change["seq"] <= cursor:
+                    continue  # already sent during catch-up
+                cursor = change["seq"]
+                yield _sse("lead", change, cursor)
+        finally:
+            lead_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+SEARCH_PAGE_MAX = 100
+
+@app.get("/leads/search")
+def search_leads(
+    request: Request,
+    q: str,
+    limit: int = 20,
+    offset: int = 0,
+    agency: Optional[str] = None,
+    source: Optional[str] = None,
+    min_score: Optional[float] = None,
+    applied: Optional[bool] = None,
+    posted_after: Optional[str] = None,
+    posted_before: Optional[str] = None,
+    status: Optional[str] = "new",
+):
+    """Ranked full-text search over title/description/company, combinable with the /leads filters.
+    Results use the list projection plus rank, title_highlight and snippet (<mark>-highlighted)."""
+    limit = max(1, min(limit, SEARCH_PAGE_MAX))
+    clauses, params = _lead_filters(agency, source, min_score, applied, posted_after, posted_before, status=status)
+    try:
+        return response_cache.respond(request, lambda: (
+            search.search_leads(q, clauses, params, LEAD_LIST_COLUMNS, limit, max(0, offset)), {}))
+    except search.SearchQueryError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid search query: {e}")
+    except Exception as e:
+        print(f"Error in /leads/search: {e}")
+        raise HTTPException(status_code=500, detail="Search failed")
+
+_ingest_wakeup = asyncio.Event()
+_ingest_stop = asyncio.Event()
+
+async def _wait_for_ingest_work():
+    """Sleep until /leads/ingest signals new work (or INGEST_POLL_SECS for retries), then
+    hold INGEST_BATCH_WINDOW_MS so a burst of requests lands in one batch."""
+    try:
+        await asyncio.wait_for(_ingest_wakeup.wait(), timeout=INGEST_POLL_SECS)
+    except asyncio.TimeoutError:
+        return
+    _ingest_wakeup.clear()
+    if not _ingest_stop.is_set():
+        await asyncio.sleep(INGEST_BATCH_WINDOW_MS / 1000)
 
 async def worker():
     print("👷 Ingest Worker Started")
+    loop = asyncio.get_event_loop()
     while True:
         try:
-            job_data = await job_queue.get()
-            loop = asyncio.get_event_loop()
-            await loop.run_in_executor(None, fetchers.save_lead, job_data)
-            await asyncio.sleep(0.5)
-            job_queue.task_done()
+            claimed = await loop.run_in_executor(None, ingest_queue.process_batch, INGEST_BATCH_SIZE)
         except Exception as e:
             print(f"Ingest Error: {e}")
-            job_queue.task_done()
-
-async def ai_analysis_worker():
-    print("🧠 AI Analysis Worker Started")
+            claimed = 0
+        if claimed:
+            continue  # Backlog: keep draining at full batch size.
+        if _ingest_stop.is_set():
+            return
+        await _wait_for_ingest_work()
+
+async def ai_analysis_worker(worker_no: int = 0):
+    print(f"🧠 AI Analysis Worker {worker_no} Started")
+    loop = asyncio.get_event_loop()
+    executor = scoring.get_executor()
     while True:
         try:
-            row = None
-            with get_read_connection() as conn:
-                cur = conn.cursor()
-                query = _translate_params("SELECT * FROM job_leads WHERE match_score = 0 AND description != '' LIMIT 1")
-                cur.execute(query)
-                row = cur.fetchone()
-
-            if row:
-                lead = dict(row)
-                print(f"🧠 Scoring: {lead['title'][:30]}...")
-                agency, confidence, score = fetchers.classify_with_ai(lead['title'], lead['description'])
-                with get_write_connection() as conn:
-                    cur = conn.cursor()
-                    query = _translate_params("UPDATE job_leads SET agency_match=?, match_score=?, ai_confidence=? WHERE id=?")
-                    cur.execute(query, (agency, score, confidence, lead['id']))
-                await asyncio.sleep(1.0) 
+            token, rows = await scoring.claim_leads()
+            if rows:
+                print(f"🧠 [{worker_no}] Scoring {len(rows)} leads...")
+                results = await loop.run_in_executor(executor, scoring.score_claimed, rows)
+                await scoring.save_scores(token, results)
             else:
                 await asyncio.sleep(5.0)
         except Exception as e:
             print(f"AI Worker Error: {e}")
             await asyncio.sleep(5.0)
 
+# Read at scrape time; everything else is recorded where it happens.
+metrics.gauge("db_connections_in_use", "Checked-out DB connections per pool",
+              lambda: {"sync": get_pool_stats()["in_use"], "async": get_async_pool_stats()["in_use"]}, label="pool")
+metrics.gauge("groq_in_flight", "Async Groq generations in flight", lambda: get_async_stats()["in_flight"])
+metrics.gauge("lead_stream_subscribers", "Connected /leads/stream clients", lambda: lead_broadcaster.get_stats()["subscribers"])
+
+_metrics_stop = asyncio.Event()
+
+async def metrics_rollup_worker():
+    """Every METRICS_ROLLUP_SECS, persist the window's rates/averages to system_metrics and prune old rows."""
+    while not _metrics_stop.is_set():
+        try:
+            await asyncio.wait_for(_metrics_stop.wait(), timeout=METRICS_ROLLUP_SECS)
+            return
+        except asyncio.TimeoutError:
+            pass
+        try:
+            values = metrics.rollup()
+            values["queue_length"] = ingest_queue.depth()
+            now = datetime.now()
+            cutoff = (now - timedelta(days=METRICS_RETENTION_DAYS)).isoformat()
+            async with get_async_write_connection() as conn:
+                await conn.executemany(
+                    "INSERT INTO system_metrics (metric_type, value, timestamp) VALUES (?, ?, ?)",
+                    [(name, value, now.isoformat()) for name, value in values.items()],
+                )
+                await conn.execute("DELETE FROM system_metrics WHERE timestamp < ?", (cutoff,))
+        except Exception as e:
+            print(f"Metrics Rollup Error: {e}")
+
 @app.post("/leads/enrich")
 def enrich_job(req: IngestJob): 
     score = 0
@@ -327,6 +590,14 @@ class AIRequest(BaseModel):
     enhanced_description: Optional[str] = None
     proposal_persona: Optional[str] = "agency"
 
+class CompanyAnalysisRequest(BaseModel):
+    job_id: Optional[str] = None
+    description: str = ""
+
+class ClassifyRequest(BaseModel):
+    title: str
+    description: str = ""
+
 AGENCY_KNOWLEDGE = {
     "ascend": "Growth Engineering, Marketing Automation, and AI-driven growth strategies. We specialize in GoHighLevel, ActiveCampaign, Zapier, Make, and building scalable marketing systems that drive revenue.",
     "apex": "Strategic consulting, fractional CMO/COO services, and high-level business transformation. We help companies restructure operations, optimize processes, and scale efficiently.",
@@ -334,20 +605,33 @@ AGENCY_KNOWLEDGE = {
     "infrastructure": "Cloud Engineering, DevOps, Cybersecurity, and IT Systems. We handle AWS, Azure, CI/CD pipelines, network architecture, and security audits."
 }
 
-@app.post("/generate-proposal")
-def generate_proposal(req: AIRequest):
-    if req.job_id:
-        with get_read_connection() as conn:
-            cur = conn.cursor()
-            query = _translate_params("SELECT * FROM job_leads WHERE id=?")
-            cur.execute(query, (req.job_id,))
-            row = cur.fetchone()
-        if not row: return {"error": "Not found"}
-        title = row['title'] if isinstance(row, dict) else row[3]
-        desc = req.enhanced_description if req.enhanced_description else (row['description'] if isinstance(row, dict) else row[4])
-    else:
-        title = req.title
-        desc = req.description
+DISCONNECT_POLL_SECS = 0.5
+
+async def _unless_disconnected(request: Request, coro):
+    """Await `coro`, cancelling it (and any Groq call in flight) if the client disconnects first."""
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECS)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                raise HTTPException(status_code=499, detail="Client closed request")
+    finally:
+        if not task.done():
+            task.cancel()
+
+async def _ai_request_context(req: AIRequest):
+    """(title, description) for a generation request, from the stored lead when job_id is given."""
+    if not req.job_id:
+        return req.title, req.description
+    async with get_async_read_connection() as conn:
+        row = await conn.fetchone("SELECT title, description FROM job_leads WHERE id=?", (req.job_id,))
+    if not row:
+        return None
+    return row['title'], req.enhanced_description or row['description']
+
+def _proposal_prompt(req: AIRequest, title, desc):
     agency_info = AGENCY_KNOWLEDGE.get(req.agency.lower(), f"{req.agency} agency")
     persona = req.proposal_persona or "agency"
     
@@ -365,35 +649,75 @@ def generate_proposal(req: AIRequest):
     Our agency specializes in: {agency_info}.
     Sign off with [Your Name], {req.agency}."""
     
-    prompt = f"Write a persuasive Upwork proposal for {title}. Context: {desc}. Instructor: {persona_instruction}"
-    proposal = generate_with_retry(prompt, is_json=False)
-    return {"proposal": proposal}
+    return f"Write a persuasive Upwork proposal for {title}. Context: {desc}. Instructor: {persona_instruction}"
 
-@app.post("/generate-action-plan")
-def generate_action_plan(req: AIRequest):
-    if req.job_id:
-        with get_read_connection() as conn:
-            cur = conn.cursor()
-            query = _translate_params("SELECT * FROM job_leads WHERE id=?")
-            cur.execute(query, (req.job_id,))
-            row = cur.fetchone()
-        if not row: return {"error": "Not found"}
-        title = row['title'] if isinstance(row, dict) else row[3]
-        desc = req.enhanced_description if req.enhanced_description else (row['description'] if isinstance(row, dict) else row[4])
-    else:
-        title = req.title
-        desc = req.description
+def _action_plan_prompt(req: AIRequest, title, desc):
     agency_info = AGENCY_KNOWLEDGE.get(req.agency.lower(), f"{req.agency} agency")
     persona = req.proposal_persona or "agency"
-    
-    prompt = f"Create a chronological execution roadmap for {title}. Context: {desc}. Agency focus: {agency_info}. Write as {persona}."
-    plan = generate_with_retry(prompt, is_json=False)
+    return f"Create a chronological execution roadmap for {title}. Context: {desc}. Agency focus: {agency_info}. Write as {persona}."
+
+@app.post("/generate-proposal")
+async def generate_proposal(req: AIRequest, request: Request):
+    context = await _ai_request_context(req)
+    if context is None: return {"error": "Not found"}
+    prompt = _proposal_prompt(req, *context)
+    proposal = await _unless_disconnected(request, generate_with_retry_async(prompt, is_json=False))
+    return {"proposal": proposal}
+
+@app.post("/generate-action-plan")
+async def generate_action_plan(req: AIRequest, request: Request):
+    context = await _ai_request_context(req)
+    if context is None: return {"error": "Not found"}
+    prompt = _action_plan_prompt(req, *context)
+    plan = await _unless_disconnected(request, generate_with_retry_async(prompt, is_json=False))
     return {"plan": plan}
 
+async def _stream_generation(prompt, job_id, column):
+    """SSE response: a `token` event per text delta, then `done` once the full text has been
+    saved to job_leads.<column> (when job_id is set), or `error`. Partial text is never saved."""
+    from fastapi.responses import StreamingResponse
+
+    async def events():
+        parts = []
+        tokens = stream_with_retry_async(prompt)
+        try:
+            async for text in tokens:
+                parts.append(text)
+                yield _sse("token", {"text": text})
+            saved = False
+            if job_id:
+                async with get_async_write_connection() as conn:
+                    saved = await conn.execute(f"UPDATE job_leads SET {column} = ? WHERE id = ?", ("".join(parts), job_id)) > 0
+            yield _sse("done", {"saved": saved})
+        except GenerationError as e:
+            yield _sse("error", {"error": str(e)})
+        finally:
+            # Client gone or stream over: release the Groq connection and concurrency slot now.
+            await tokens.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.post("/generate-proposal/stream")
+async def stream_proposal(req: AIRequest):
+    """Token-streamed /generate-proposal; the finished proposal is saved to client_proposal."""
+    context = await _ai_request_context(req)
+    if context is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return await _stream_generation(_proposal_prompt(req, *context), req.job_id, "client_proposal")
+
+@app.post("/generate-action-plan/stream")
+async def stream_action_plan(req: AIRequest):
+    """Token-streamed /generate-action-plan; the finished plan is saved to client_plan."""
+    context = await _ai_request_context(req)
+    if context is None:
+        raise HTTPException(status_code=404, detail="Not found")
+    return await _stream_generation(_action_plan_prompt(req, *context), req.job_id, "client_plan")
+
 @app.post("/analyze-company")
-def analyze_company(req: CompanyAnalysisRequest):
+async def analyze_company(req: CompanyAnalysisRequest, request: Request):
     prompt = f"Extract company details from: {req.description[:1000]}"
-    content = generate_with_retry(prompt, is_json=True, model="llama-3.1-8b-instant")
+    content = await _unless_disconnected(request, generate_with_retry_async(prompt, is_json=True, model="llama-3.1-8b-instant"))
     try:
         data = json.loads(content)
         return {"company_name": data.get("company_name", "Unknown"), "industry": data.get("industry", "General"), "targets": data.get("targets", ["Hiring Manager"])}
@@ -417,8 +741,8 @@ def save_draft(lead_id: str, req: dict):
     return {"success": True}
 
 @app.post("/leads/classify")
-def classify_job(req: ClassifyRequest):
-    agency, confidence, score = fetchers.classify_with_ai(req.title, req.description)
+async def classify_job(req: ClassifyRequest, request: Request):
+    agency, confidence, score = await _unless_disconnected(request, fetchers.classify_with_ai_async(req.title, req.description))
     return {"agency": agency, "confidence": confidence, "score": score}
 
 @app.post("/leads/{lead_id}/unapply")
@@ -430,25 +754,53 @@ def unmark_applied(lead_id: str):
     return {"success": True}
 
 @app.get("/leads/export-csv")
-def export_applied_leads_csv():
-    import csv, io
+def export_leads_csv(
+    request: Request,
+    columns: Optional[str] = None,
+    agency: Optional[str] = None,
+    source: Optional[str] = None,
+    min_score: Optional[float] = None,
+    applied: Optional[bool] = True,
+    posted_after: Optional[str] = None,
+    posted_before: Optional[str] = None,
+    status: Optional[str] = None,
+    gzip: bool = False,
+):
+    """
+    Stream leads as CSV (applied leads by default), newest application first.
+    columns is a comma-separated subset of the lead fields; filters match /leads.
+    gzip=true streams a .csv.gz download instead.
+    """
     from fastapi.responses import StreamingResponse
-    with get_read_connection() as conn:
-        cur = conn.cursor()
-        query = _translate_params("SELECT * FROM job_leads WHERE applied = 1 ORDER BY applied_at DESC")
-        cur.execute(query)
-        rows = cur.fetchall()
-    output = io.StringIO()
-    writer = csv.writer(output)
-    if rows:
-        writer.writerow(rows[0].keys())
-        for row in rows: writer.writerow([str(x) for x in list(row)])
-    else:
-        writer.writerow(["No data"])
-    output.seek(0)
-    response = StreamingResponse(iter([output.getvalue()]), media_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=applied_jobs.csv"
-    return response
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else list(JobLead.model_fields)
+    unknown = [c for c in selected if c not in JobLead.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown columns: {', '.join(unknown)}")
+    etag, not_modified = response_cache.check(request)
+    if not_modified:
+        return not_modified
+    clauses, params = _lead_filters(agency, source, min_score, applied, posted_after, posted_before, status)
+    chunks = exporter.stream_csv(selected, clauses, params, "applied_at DESC, id", compress=gzip)
+    filename = "applied_jobs.csv.gz" if gzip else "applied_jobs.csv"
+    return StreamingResponse(
+        chunks,
+        media_type="application/gzip" if gzip else "text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}", "ETag": etag, "Cache-Control": "no-cache"},
+    )
+
+# Must stay below every other GET /leads/<name> route so it doesn't shadow them.
+@app.get("/leads/{lead_id}", response_model=JobLead)
+def get_lead(request: Request, lead_id: str):
+    def build():
+        with get_read_connection() as conn:
+            cur = conn.cursor()
+            query = _translate_params(f"SELECT {', '.join(LEAD_COLUMNS)} FROM job_leads WHERE id=?")
+            cur.execute(query, (lead_id,))
+            row = cur.fetchone()
+        if not row:
+            raise HTTPException(status_code=404, detail="Lead not found")
+        return JobLead(**dict(row)).model_dump(), {}
+    return response_cache.respond(request, build)
 
 @app.get("/")
 def read_root():
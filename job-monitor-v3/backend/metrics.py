@@ -0,0 +1,273 @@
+"""
+In-process metrics registry.
+
+Counters, gauges and latency histograms, labelled like Prometheus series and
+rendered in its text exposition format for GET /metrics. Gauges can also be
+callbacks read at scrape time (queue depth, pool usage). rollup() turns the
+change since the previous rollup into per-minute figures; main.py stores them
+in system_metrics and /system/health reports the latest one.
+"""
+import bisect
+import sys
+import threading
+import time
+
+# Seconds; covers sub-ms DB calls up to slow LLM round trips.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SIZE_BUCKETS = (1, 5, 10, 25, 50, 100, 200, 500, 1000)
+
+_lock = threading.Lock()
+_registry = {}
+
+
+def _key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in key) + "}"
+
+
+def _fmt_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def total(self):
+        with _lock:
+            return sum(self._values.values())
+
+    def value(self, **labels):
+        """Count for one label set."""
+        with _lock:
+            return self._values.get(_key(labels), 0)
+
+    def samples(self):
+        with _lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn=None, label="name"):
+        self.name = name
+        self.help = help_text
+        self._fn = fn
+        self._label = label
+        self._values = {}
+
+    def set(self, value, **labels):
+        with _lock:
+            self._values[_key(labels)] = value
+
+    def samples(self):
+        if self._fn is not None:
+            try:
+                value = self._fn()
+            except Exception:
+                return []
+            if isinstance(value, dict):
+                return [(self.name, ((self._label, key),), v) for key, v in value.items()]
+            return [(self.name, (), value)]
+        with _lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., count, sum]
+
+    def observe(self, value, **labels):
+        key = _key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with _lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += 1
+            series[-1] += value
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds of its block."""
+        return _Timer(self, labels)
+
+    def snapshot(self):
+        """{labels dict as sorted tuple: (count, sum)} per label set."""
+        with _lock:
+            return {key: (s[-2], s[-1]) for key, s in self._series.items()}
+
+    def totals(self):
+        """(count, sum) across all label sets."""
+        with _lock:
+            return sum(s[-2] for s in self._series.values()), sum(s[-1] for s in self._series.values())
+
+    def samples(self):
+        out = []
+        with _lock:
+            series = {key: list(s) for key, s in self._series.items()}
+        for key, s in series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, s):
+                cumulative += count
+                out.append((f"{self.name}_bucket", key + (("le", _fmt_value(float(bound))),), cumulative))
+            out.append((f"{self.name}_bucket", key + (("le", "+Inf"),), s[-2]))
+            out.append((f"{self.name}_count", key, s[-2]))
+            out.append((f"{self.name}_sum", key, round(s[-1], 6)))
+        return out
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+        return False
+
+
+def call_site(skip_modules):
+    """'module.function' of the nearest caller outside `skip_modules` (used to label DB timings)."""
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") in skip_modules:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__')}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _register(cls, name, *args):
+    with _lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args)
+    return metric
+
+
+def counter(name, help_text):
+    return _register(Counter, name, help_text)
+
+
+def gauge(name, help_text, fn=None, label="name"):
+    """A settable gauge, or with `fn` one read at scrape time; fn returns a number or
+    {label value: number}, reported under the label `label`."""
+    return _register(Gauge, name, help_text, fn, label)
+
+
+def histogram(name, help_text, buckets=DEFAULT_BUCKETS):
+    return _register(Histogram, name, help_text, buckets)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (0.0.4)."""
+    with _lock:
+        metrics = sorted(_registry.values(), key=lambda m: m.name)
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, key, value in metric.samples():
+            lines.append(f"{name}{_fmt_labels(key)} {_fmt_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# The metrics the app records. Defined here so every module shares one instance.
+GROQ_LATENCY = histogram("groq_request_seconds", "Groq completion latency by model, key and outcome")
+LEADS_CLASSIFIED = counter("leads_classified_total", "Classifications by how they were decided (keyword, cache, llm, failed)")
+LEADS_SCORED = counter("leads_scored_total", "Leads whose score was written by the scoring workers")
+LEADS_SCORE_FAILED = counter("leads_score_failed_total", "Leads given up on after AI_MAX_SCORE_ATTEMPTS failed classifications")
+INGEST_BATCH_SIZE = histogram("ingest_batch_size", "Jobs per ingest worker batch", SIZE_BUCKETS)
+INGEST_BATCH_SECONDS = histogram("ingest_batch_seconds", "Time to save one ingest batch")
+INGEST_JOBS = counter("ingest_jobs_total", "Ingested jobs by outcome (saved, retried, dead)")
+SOURCE_FETCH_SECONDS = histogram("source_fetch_seconds", "Per-source fetch duration")
+SOURCE_LEADS = counter("source_leads_total", "New leads saved per source")
+SOURCE_ERRORS = counter("source_fetch_errors_total", "Failed fetches per source")
+SOURCE_SKIPPED = counter("source_entries_skipped_total", "Feed entries skipped as already seen (high-water mark)")
+DB_SECONDS = histogram("db_connection_seconds", "Time a DB connection is held, per call site and role")
+
+
+_last_rollup = {"at": None, "values": {}, "marks": {}}
+
+
+def _marks():
+    groq_count, groq_sum = GROQ_LATENCY.totals()
+    db_count, db_sum = DB_SECONDS.totals()
+    return {
+        "groq_count": groq_count, "groq_sum": groq_sum,
+        "db_count": db_count, "db_sum": db_sum,
+        "classified": LEADS_CLASSIFIED.total(),
+        "scored": LEADS_SCORED.total(),
+        # Retried and dead-lettered jobs aren't throughput.
+        "ingested": INGEST_JOBS.value(outcome="saved"),
+        "fetched": SOURCE_LEADS.total(),
+        "time": time.monotonic(),
+    }
+
+
+def _per_window(now, then):
+    minutes = max((now["time"] - then["time"]) / 60.0, 1e-9)
+    groq_calls = now["groq_count"] - then["groq_count"]
+    db_calls = now["db_count"] - then["db_count"]
+    return {
+        "avg_ai_time_sec": round((now["groq_sum"] - then["groq_sum"]) / groq_calls, 3) if groq_calls else 0.0,
+        "throughput_jobs_min": round((now["scored"] - then["scored"]) / minutes, 2),
+        "classifications_min": round((now["classified"] - then["classified"]) / minutes, 2),
+        "ingested_jobs_min": round((now["ingested"] - then["ingested"]) / minutes, 2),
+        "fetched_leads_min": round((now["fetched"] - then["fetched"]) / minutes, 2),
+        "avg_db_ms": round((now["db_sum"] - then["db_sum"]) * 1000 / db_calls, 3) if db_calls else 0.0,
+    }
+
+
+_started = _marks()
+
+
+def rollup():
+    """Per-minute figures since the previous rollup (or since startup). Returns {metric_type: value}."""
+    now = _marks()
+    with _lock:
+        previous = _last_rollup["marks"] or _started
+    values = _per_window(now, previous)
+    with _lock:
+        _last_rollup.update(at=time.time(), values=values, marks=now)
+    return values
+
+
+def summary():
+    """Latest rollup window, or the figures since startup before the first rollup."""
+    with _lock:
+        if _last_rollup["values"]:
+            return dict(_last_rollup["values"])
+    return _per_window(_marks(), _started)
@@ -0,0 +1,452 @@
+"""
+Versioned schema migrations.
+
+Each migration runs once, in its own transaction, and is recorded in
+schema_migrations. Append new migrations to MIGRATIONS with the next version
+number; never edit or reorder one that has shipped.
+"""
+from datetime import datetime
+
+from database import get_read_connection, get_write_connection, _translate_params, DATABASE_URL
+
+
+def _columns(cur, table):
+    """Return the set of column names currently on a table."""
+    if DATABASE_URL:
+        cur.execute(
+            "SELECT column_name FROM information_schema.columns WHERE table_name = %s",
+            (table,),
+        )
+        return {row['column_name'] for row in cur.fetchall()}
+    cur.execute(f"PRAGMA table_info({table})")
+    return {row[1] for row in cur.fetchall()}
+
+
+def _add_columns(cur, table, columns):
+    """ALTER TABLE ... ADD COLUMN for each (name, type) not already present."""
+    existing = _columns(cur, table)
+    for name, col_type in columns:
+        if name not in existing:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {name} {col_type}")
+
+
+def _m001_base_tables(cur):
+    pk_type = "SERIAL PRIMARY KEY" if DATABASE_URL else "INTEGER PRIMARY KEY AUTOINCREMENT"
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS job_leads (
+            id TEXT PRIMARY KEY,
+            source TEXT,
+            external_id TEXT,
+            title TEXT,
+            description TEXT,
+            url TEXT,
+            budget TEXT,
+            company TEXT,
+            posted_at TEXT,
+            agency_match TEXT,
+            match_score REAL,
+            ai_confidence REAL,
+            match_reasoning TEXT,
+            status TEXT DEFAULT 'new',
+            applied INTEGER DEFAULT 0,
+            applied_at TEXT,
+            applied_by TEXT,
+            connect_score INTEGER DEFAULT 0,
+            client_signals TEXT,
+            client_proposal TEXT,
+            client_plan TEXT,
+            created_at TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS job_sources (
+            id TEXT PRIMARY KEY,
+            name TEXT NOT NULL,
+            type TEXT NOT NULL,
+            url TEXT,
+            parsing_config TEXT,
+            enabled INTEGER DEFAULT 1,
+            last_checked TEXT
+        )
+    """)
+
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS system_metrics (
+            id {pk_type},
+            metric_type TEXT, value REAL, timestamp TEXT
+        )
+    """)
+
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS contacts (
+            id TEXT PRIMARY KEY, name TEXT, role TEXT, location TEXT, url TEXT,
+            email_guess TEXT, validation_status TEXT DEFAULT 'pending', source TEXT, created_at TEXT
+        )
+    """)
+
+
+def _m002_backfill_columns(cur):
+    # Databases created by older builds may predate these columns.
+    _add_columns(cur, "job_leads", [
+        ("ai_confidence", "REAL"),
+        ("match_reasoning", "TEXT"),
+        ("client_proposal", "TEXT"),
+        ("client_plan", "TEXT"),
+    ])
+    _add_columns(cur, "job_sources", [
+        ("parsing_config", "TEXT"),
+        ("etag", "TEXT"),
+        ("last_modified", "TEXT"),
+        ("content_hash", "TEXT"),
+    ])
+
+
+def _m003_hot_path_indexes(cur):
+    # Dedupe key for save_leads' ON CONFLICT DO NOTHING.
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_job_leads_source_external ON job_leads (source, external_id)")
+    # /leads/enrich matches on external_id alone.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_job_leads_external_id ON job_leads (external_id)")
+    # GET /leads: WHERE status='new' ORDER BY match_score DESC, posted_at DESC
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_job_leads_status_score_posted ON job_leads (status, match_score DESC, posted_at DESC)")
+    # ai_analysis_worker: WHERE match_score = 0 -- only unscored rows are indexed.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_job_leads_unscored ON job_leads (created_at) WHERE match_score = 0")
+
+
+def _m004_leads_keyset_index(cur):
+    # GET /leads pages on (match_score, posted_at, id); include id so the
+    # keyset predicate and ORDER BY are fully covered.
+    cur.execute("DROP INDEX IF EXISTS idx_job_leads_status_score_posted")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_job_leads_status_keyset ON job_leads (status, match_score DESC, posted_at DESC, id DESC)")
+
+
+def _m005_scoring_claims(cur):
+    # Lease columns for parallel AI workers; scored_at marks leads whose
+    # legitimate score is 0 so they are not re-claimed forever.
+    _add_columns(cur, "job_leads", [
+        ("claimed_by", "TEXT"),
+        ("claim_expires_at", "TEXT"),
+        ("scored_at", "TEXT"),
+    ])
+    cur.execute("DROP INDEX IF EXISTS idx_job_leads_unscored")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_job_leads_unscored ON job_leads (created_at) WHERE match_score = 0 AND scored_at IS NULL")
+
+
+def _m006_classification_cache(cur):
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS classification_cache (
+            cache_key TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            agency TEXT,
+            confidence REAL,
+            score INTEGER,
+            created_at TEXT,
+            expires_at TEXT
+        )
+    """)
+
+
+def _m007_ingest_queue(cur):
+    pk_type = "SERIAL PRIMARY KEY" if DATABASE_URL else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS ingest_queue (
+            id {pk_type},
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            lease_token TEXT,
+            lease_expires_at TEXT,
+            last_error TEXT,
+            created_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ingest_queue_pending ON ingest_queue (id) WHERE status = 'pending'")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_ingest_queue_lease ON ingest_queue (lease_token)")
+
+
+def _m008_near_duplicates(cur):
+    _add_columns(cur, "job_leads", [
+        ("simhash", "BIGINT" if DATABASE_URL else "INTEGER"),
+        ("fingerprinted_at", "TEXT"),
+        ("duplicate_of", "TEXT"),
+    ])
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_job_leads_duplicate_of ON job_leads (duplicate_of) WHERE duplicate_of IS NOT NULL")
+
+
+def _m009_full_text_search(cur):
+    if DATABASE_URL:
+        cur.execute("""
+            ALTER TABLE job_leads ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(company, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(description, '')), 'C')
+            ) STORED
+        """)
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_job_leads_search ON job_leads USING GIN (search_vector)")
+        return
+
+    # External-content FTS5 table kept in sync by triggers. job_leads has a TEXT primary
+    # key, so its implicit rowid isn't stable (VACUUM may renumber it); the index is
+    # keyed on search_rowid instead, a persisted integer assigned once per lead.
+    _add_columns(cur, "job_leads", [("search_rowid", "INTEGER")])
+    cur.execute("UPDATE job_leads SET search_rowid = rowid WHERE search_rowid IS NULL")
+    cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_job_leads_search_rowid ON job_leads (search_rowid)")
+    cur.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS job_leads_fts USING fts5(
+            title, description, company,
+            content='job_leads', content_rowid='search_rowid', tokenize='porter unicode61'
+        )
+    """)
+    # New leads take the next search_rowid (an index lookup), then get indexed under it.
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_leads_fts_ai AFTER INSERT ON job_leads BEGIN
+            UPDATE job_leads SET search_rowid = (SELECT coalesce(max(search_rowid), 0) + 1 FROM job_leads)
+            WHERE id = new.id;
+            INSERT INTO job_leads_fts (rowid, title, description, company)
+            SELECT search_rowid, title, description, company FROM job_leads WHERE id = new.id;
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_leads_fts_ad AFTER DELETE ON job_leads BEGIN
+            INSERT INTO job_leads_fts (job_leads_fts, rowid, title, description, company)
+            VALUES ('delete', old.search_rowid, old.title, old.description, old.company);
+        END
+    """)
+    cur.execute("""
+        CREATE TRIGGER IF NOT EXISTS job_leads_fts_au AFTER UPDATE OF title, description, company ON job_leads BEGIN
+            INSERT INTO job_leads_fts (job_leads_fts, rowid, title, description, company)
+            VALUES ('delete', old.search_rowid, old.title, old.description, old.company);
+            INSERT INTO job_leads_fts (rowid, title, description, company)
+            VALUES (new.search_rowid, new.title, new.description, new.company);
+        END
+    """)
+    cur.execute("INSERT INTO job_leads_fts (job_leads_fts) VALUES ('rebuild')")
+
+
+# Which job_leads columns make an update a 'scored', 'status' or 'enriched' change.
+_CHANGE_KINDS = [
+    ("scored", ("match_score", "agency_match", "ai_confidence")),
+    ("status", ("status", "applied")),
+    ("enriched", ("client_proposal", "client_plan", "client_signals", "connect_score")),
+]
+# Bookkeeping columns no reader sees; a change to any other column is an 'updated' change.
+_LEAD_BOOKKEEPING_COLUMNS = (
+    "claimed_by", "claim_expires_at", "score_attempts", "scored_at", "simhash", "fingerprinted_at",
+    "duplicate_of", "search_rowid", "search_vector",
+)
+# Any key works, as long as every writer of lead_changes uses the same one.
+_LEAD_CHANGES_LOCK_KEY = 7420011
+
+
+def _create_lead_change_triggers(cur):
+    """(Re)create the job_leads triggers that append to lead_changes, from _CHANGE_KINDS.
+
+    seq must follow commit order, or a client could move its cursor past a change
+    that commits later under a lower seq. SQLite writers are already serialized by
+    DB_WRITE_LOCK; on Postgres the trigger takes a transaction-scoped advisory lock
+    before drawing a seq, so writers of job_leads commit in seq order.
+    """
+    if DATABASE_URL:
+        branches = "\n".join(
+            f"ELSIF {' OR '.join(f'NEW.{c} IS DISTINCT FROM OLD.{c}' for c in cols)} THEN kind := '{kind}';"
+            for kind, cols in _CHANGE_KINDS
+        )
+        bookkeeping = ", ".join(f"'{c}'" for c in _LEAD_BOOKKEEPING_COLUMNS)
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION record_lead_change() RETURNS trigger AS $$
+            DECLARE kind TEXT;
+            BEGIN
+                IF TG_OP = 'INSERT' THEN kind := 'inserted';
+                {branches}
+                ELSIF (to_jsonb(NEW) - ARRAY[{bookkeeping}]) IS DISTINCT FROM (to_jsonb(OLD) - ARRAY[{bookkeeping}])
+                    THEN kind := 'updated';
+                ELSE RETURN NEW;
+                END IF;
+                PERFORM pg_advisory_xact_lock({_LEAD_CHANGES_LOCK_KEY});
+                INSERT INTO lead_changes (lead_id, kind, created_at) VALUES (NEW.id, kind, to_char(now(), 'YYYY-MM-DD"T"HH24:MI:SS.US'));
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cur.execute("DROP TRIGGER IF EXISTS job_leads_changes ON job_leads")
+        cur.execute("""
+            CREATE TRIGGER job_leads_changes AFTER INSERT OR UPDATE ON job_leads
+            FOR EACH ROW EXECUTE FUNCTION record_lead_change()
+        """)
+        return
+
+    now = "strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime')"
+    cur.execute("DROP TRIGGER IF EXISTS job_leads_changes_ai")
+    cur.execute(f"""
+        CREATE TRIGGER job_leads_changes_ai AFTER INSERT ON job_leads BEGIN
+            INSERT INTO lead_changes (lead_id, kind, created_at) VALUES (new.id, 'inserted', {now});
+        END
+    """)
+    # SQLite triggers need explicit column lists: 'updated' watches every column that is
+    # neither bookkeeping nor covered by a kind above, as the table stands now. A later
+    # migration adding a visible job_leads column must call this again.
+    kind_columns = {c for _, cols in _CHANGE_KINDS for c in cols}
+    other = sorted(_columns(cur, "job_leads") - kind_columns - set(_LEAD_BOOKKEEPING_COLUMNS) - {"id"})
+    for kind, cols in [*_CHANGE_KINDS, ("updated", tuple(other))]:
+        changed = " OR ".join(f"new.{c} IS NOT old.{c}" for c in cols)
+        cur.execute(f"DROP TRIGGER IF EXISTS job_leads_changes_{kind}")
+        cur.execute(f"""
+            CREATE TRIGGER job_leads_changes_{kind} AFTER UPDATE OF {', '.join(cols)} ON job_leads
+            WHEN {changed} BEGIN
+                INSERT INTO lead_changes (lead_id, kind, created_at) VALUES (new.id, '{kind}', {now});
+            END
+        """)
+
+
+def _m010_lead_changes(cur):
+    pk_type = "BIGSERIAL PRIMARY KEY" if DATABASE_URL else "INTEGER PRIMARY KEY AUTOINCREMENT"
+    cur.execute(f"""
+        CREATE TABLE IF NOT EXISTS lead_changes (
+            seq {pk_type},
+            lead_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            created_at TEXT
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_lead_changes_created ON lead_changes (created_at)")
+
+    # Triggers record every change, whichever code path wrote it.
+    _create_lead_change_triggers(cur)
+
+
+def _m011_lead_change_enrichment(cur):
+    # Extension enrichment (client_signals / connect_score) now counts as 'enriched'.
+    _create_lead_change_triggers(cur)
+
+
+def _m012_system_metrics_index(cur):
+    # Metric rollups are read as a series per type and pruned by age.
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_system_metrics_type_time ON system_metrics (metric_type, timestamp)")
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_system_metrics_time ON system_metrics (timestamp)")
+
+
+def _m013_source_schedule(cur):
+    # Per-source adaptive polling state (source_scheduler.py).
+    _add_columns(cur, "job_sources", [
+        ("poll_interval_secs", "REAL"),
+        ("next_poll_at", "TEXT"),
+        ("yield_avg", "REAL"),
+        ("last_yield", "INTEGER"),
+        ("error_rate", "REAL DEFAULT 0"),
+        ("consecutive_failures", "INTEGER DEFAULT 0"),
+        ("fetch_count", "INTEGER DEFAULT 0"),
+        ("error_count", "INTEGER DEFAULT 0"),
+        ("last_error", "TEXT"),
+        ("disabled_reason", "TEXT"),
+    ])
+
+
+def _m014_source_high_water_mark(cur):
+    # Newest seen entry per source (fetchers._HighWaterMark): a JSON ring of recent
+    # entry ids plus the newest published timestamp.
+    _add_columns(cur, "job_sources", [
+        ("seen_ids", "TEXT"),
+        ("hwm_published_at", "TEXT"),
+    ])
+
+
+def _m015_leads_version(cur):
+    # Version counter for the whole job_leads table (response_cache.py ETags). Bumped by
+    # a row trigger on every insert, update and delete, in commit order: the counter row
+    # stays locked until the writing transaction ends.
+    cur.execute("CREATE TABLE IF NOT EXISTS job_leads_version (id INTEGER PRIMARY KEY, version BIGINT NOT NULL)")
+    cur.execute("INSERT INTO job_leads_version (id, version) VALUES (1, 0) ON CONFLICT DO NOTHING")
+    bump = "UPDATE job_leads_version SET version = version + 1 WHERE id = 1"
+    if DATABASE_URL:
+        cur.execute(f"""
+            CREATE OR REPLACE FUNCTION bump_job_leads_version() RETURNS trigger AS $$
+            BEGIN
+                {bump};
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql
+        """)
+        cur.execute("DROP TRIGGER IF EXISTS job_leads_version_bump ON job_leads")
+        cur.execute("""
+            CREATE TRIGGER job_leads_version_bump AFTER INSERT OR UPDATE OR DELETE ON job_leads
+            FOR EACH ROW EXECUTE FUNCTION bump_job_leads_version()
+        """)
+        return
+    for event in ("INSERT", "UPDATE", "DELETE"):
+        cur.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS job_leads_version_{event.lower()} AFTER {event} ON job_leads BEGIN
+                {bump};
+            END
+        """)
+
+
+def _m016_score_attempts(cur):
+    # Claims per lead (scoring.py), so a lead the classifier keeps failing on is
+    # eventually given up on instead of being re-leased forever.
+    _add_columns(cur, "job_leads", [("score_attempts", "INTEGER NOT NULL DEFAULT 0")])
+
+
+# (version, name, function). Append only.
+MIGRATIONS = [
+    (1, "base_tables", _m001_base_tables),
+    (2, "backfill_columns", _m002_backfill_columns),
+    (3, "hot_path_indexes", _m003_hot_path_indexes),
+    (4, "leads_keyset_index", _m004_leads_keyset_index),
+    (5, "scoring_claims", _m005_scoring_claims),
+    (6, "classification_cache", _m006_classification_cache),
+    (7, "ingest_queue", _m007_ingest_queue),
+    (8, "near_duplicates", _m008_near_duplicates),
+    (9, "full_text_search", _m009_full_text_search),
+    (10, "lead_changes", _m010_lead_changes),
+    (11, "lead_change_enrichment", _m011_lead_change_enrichment),
+    (12, "system_metrics_index", _m012_system_metrics_index),
+    (13, "source_schedule", _m013_source_schedule),
+    (14, "source_high_water_mark", _m014_source_high_water_mark),
+    (15, "leads_version", _m015_leads_version),
+    (16, "score_attempts", _m016_score_attempts),
+]
+
+
+def _ensure_migrations_table():
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TEXT NOT NULL
+            )
+        """)
+
+
+def applied_versions():
+    """Set of migration versions already recorded in schema_migrations."""
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT version FROM schema_migrations")
+        return {row['version'] if isinstance(row, dict) else row[0] for row in cur.fetchall()}
+
+
+def run_migrations():
+    """Apply every pending migration in version order. Returns the versions applied."""
+    _ensure_migrations_table()
+    done = applied_versions()
+    applied = []
+    for version, name, migrate in sorted(MIGRATIONS):
+        if version in done:
+            continue
+        with get_write_connection() as conn:
+            cur = conn.cursor()
+            if not DATABASE_URL:
+                # sqlite3 autocommits DDL unless a transaction is already open.
+                cur.execute("BEGIN")
+            migrate(cur)
+            cur.execute(
+                _translate_params("INSERT INTO schema_migrations (version, name, applied_at) VALUES (?, ?, ?)"),
+                (version, name, datetime.now().isoformat()),
+            )
+        print(f"🗄️ Applied migration {version:03d}_{name}")
+        applied.append(version)
+    return applied
@@ -0,0 +1,193 @@
+"""
+Near-duplicate lead detection.
+
+Every saved lead gets a 64-bit SimHash of its normalized title + description
+(stored in job_leads.simhash). Canonical leads are kept in an in-memory LSH
+index: the fingerprint is split into NEAR_DUP_BANDS bands, and two leads
+within NEAR_DUP_MAX_DISTANCE bits must share at least one band exactly
+(pigeonhole), so a lookup only compares against one bucket per band.
+Reposts and cross-posts are linked via duplicate_of instead of being scored
+and listed again. The index is rebuilt from the stored fingerprints on startup.
+"""
+import hashlib
+import sys
+import threading
+from array import array
+from datetime import datetime
+
+from classify_cache import normalize_text
+from config import NEAR_DUP_MAX_DISTANCE, NEAR_DUP_MIN_TOKENS
+from database import get_read_connection, get_write_connection, _translate_params
+
+NEAR_DUP_BANDS = NEAR_DUP_MAX_DISTANCE + 1
+_BAND_BITS = 64 // NEAR_DUP_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+# Band heads are a flat array up to 2**20 values per band (4 MiB); wider bands
+# (NEAR_DUP_MAX_DISTANCE < 2) fall back to a dict.
+_DENSE_HEADS = _BAND_BITS <= 20
+
+
+def _to_signed(value):
+    """Store as signed 64-bit so it fits SQLite INTEGER / Postgres BIGINT."""
+    return value - (1 << 64) if value >= (1 << 63) else value
+
+
+def simhash(title, description):
+    """64-bit SimHash over word 3-gram shingles, or None if the text is too short to judge."""
+    tokens = normalize_text(f"{title} {description}").split()
+    if len(tokens) < NEAR_DUP_MIN_TOKENS:
+        return None
+    # Bit-sliced counter: planes[i] holds bit i of every column's running count, so
+    # adding a shingle hash is a short XOR/AND carry chain instead of 64 increments.
+    planes = []
+    shingles = 0
+    for i in range(len(tokens) - 2):
+        shingle = " ".join(tokens[i:i + 3]).encode()
+        carry = int.from_bytes(hashlib.blake2b(shingle, digest_size=8).digest(), "big")
+        shingles += 1
+        for level, plane in enumerate(planes):
+            planes[level] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+    value = 0
+    for bit in range(64):
+        count = sum(((plane >> bit) & 1) << level for level, plane in enumerate(planes))
+        if count * 2 > shingles:
+            value |= 1 << bit
+    return _to_signed(value)
+
+
+def _bands(value):
+    value &= (1 << 64) - 1
+    return [(band, (value >> (band * _BAND_BITS)) & _BAND_MASK) for band in range(NEAR_DUP_BANDS)]
+
+
+class NearDuplicateIndex:
+    """Banded LSH over SimHash fingerprints of canonical leads.
+
+    Kept compact for ~1M leads: each lead gets an integer slot, fingerprints live in
+    an array('q'), and every band is a chained hash table of slots (a head per band
+    value, a next pointer per slot). Lead ids are packed into one UTF-8 buffer and
+    only decoded for a match. Removed slots are tombstoned, not reused; removals only
+    roll back provisional adds, so they are rare.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.duplicates_linked = 0
+        self._reset()
+
+    def _reset(self):
+        self._hashes = array('q')
+        self._heads = [array('i', [-1]) * (1 << _BAND_BITS) if _DENSE_HEADS else {} for _ in range(NEAR_DUP_BANDS)]
+        self._next = [array('i') for _ in range(NEAR_DUP_BANDS)]
+        self._ids = bytearray()
+        self._id_ends = array('Q')
+        self._dead = set()
+
+    def __len__(self):
+        return len(self._hashes) - len(self._dead)
+
+    def add(self, lead_id, value):
+        """Index a canonical lead; returns its slot (for remove())."""
+        with self._lock:
+            slot = len(self._hashes)
+            self._hashes.append(value)
+            self._ids += lead_id.encode()
+            self._id_ends.append(len(self._ids))
+            for band, key in _bands(value):
+                self._next[band].append(self._head(band, key))
+                self._heads[band][key] = slot
+            return slot
+
+    def remove(self, slot):
+        with self._lock:
+            if 0 <= slot < len(self._hashes):
+                self._dead.add(slot)
+
+    def _head(self, band, key):
+        heads = self._heads[band]
+        return heads[key] if _DENSE_HEADS else heads.get(key, -1)
+
+    def _lead_id(self, slot):
+        start = self._id_ends[slot - 1] if slot else 0
+        return self._ids[start:self._id_ends[slot]].decode()
+
+    def find(self, value):
+        """Closest canonical lead within NEAR_DUP_MAX_DISTANCE bits, or None."""
+        best, best_distance = None, NEAR_DUP_MAX_DISTANCE + 1
+        with self._lock:
+            for band, key in _bands(value):
+                chain, slot = self._next[band], self._head(band, key)
+                while slot != -1:
+                    if slot not in self._dead:
+                        distance = bin((self._hashes[slot] ^ value) & ((1 << 64) - 1)).count("1")
+                        if distance < best_distance:
+                            best, best_distance = slot, distance
+                    slot = chain[slot]
+            return None if best is None else self._lead_id(best)
+
+    def record_linked(self, count):
+        with self._lock:
+            self.duplicates_linked += count
+
+    def memory_bytes(self):
+        with self._lock:
+            arrays = [self._hashes, self._ids, self._id_ends, *self._heads, *self._next]
+            # Sparse heads hold an int object per key on top of the dict table.
+            extra = 0 if _DENSE_HEADS else 32 * sum(len(heads) for heads in self._heads)
+            return sum(sys.getsizeof(a) for a in arrays) + sys.getsizeof(self._dead) + extra
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+
+index = NearDuplicateIndex()
+
+
+def _backfill_fingerprints(batch_size=1000):
+    """Compute simhash for rows saved before fingerprints existed."""
+    total = 0
+    while True:
+        with get_read_connection() as conn:
+            cur = conn.cursor()
+            cur.execute(
+                _translate_params("SELECT id, title, description FROM job_leads WHERE simhash IS NULL AND fingerprinted_at IS NULL LIMIT ?"),
+                (batch_size,),
+            )
+            rows = cur.fetchall()
+        if not rows:
+            return total
+        now = datetime.now().isoformat()
+        updates = [(simhash(row['title'], row['description']), now, row['id']) for row in rows]
+        with get_write_connection() as conn:
+            cur = conn.cursor()
+            cur.executemany(_translate_params("UPDATE job_leads SET simhash = ?, fingerprinted_at = ? WHERE id = ?"), updates)
+        total += len(updates)
+
+
+def rebuild():
+    """Load canonical fingerprints from the DB into the index (startup)."""
+    backfilled = _backfill_fingerprints()
+    index.clear()
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, simhash FROM job_leads WHERE simhash IS NOT NULL AND duplicate_of IS NULL")
+        while True:
+            rows = cur.fetchmany(5000)
+            if not rows:
+                break
+            for row in rows:
+                index.add(row['id'], row['simhash'])
+    print(f"🧬 Near-duplicate index: {len(index)} canonical leads, {index.memory_bytes() / 1024 ** 2:.1f} MiB "
+          f"({backfilled} fingerprints backfilled)")
+    return len(index)
+
+
+def get_stats():
+    return {"indexed": len(index), "duplicates_linked": index.duplicates_linked,
+            "max_distance": NEAR_DUP_MAX_DISTANCE, "memory_bytes": index.memory_bytes()}
@@ -0,0 +1,150 @@
+"""
+Conditional GET and response cache for the job_leads read endpoints.
+
+job_leads_version.version is bumped by a trigger on every job_leads write,
+so it is a version number for the whole table. A response is serialized
+once per (version, path, query), kept in an in-memory LRU together with its
+gzip encoding, and sent with a strong ETag derived from the same key. A client polling an unchanged table gets a 304 without
+any lead query being run; the first request after a write starts a new
+version and drops the old entries.
+"""
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from fastapi import Response
+
+from config import RESPONSE_CACHE_SIZE, RESPONSE_GZIP_MIN_BYTES
+from database import get_read_connection
+
+# Query parameters that don't change the response body.
+_IGNORED_PARAMS = {"api_key"}
+
+
+class _Entry:
+    __slots__ = ("etag", "body", "gzipped", "media_type", "headers")
+
+    def __init__(self, etag, body, media_type, headers):
+        self.etag = etag
+        self.body = body
+        self.media_type = media_type
+        self.headers = headers
+        self.gzipped = gzip.compress(body, compresslevel=6) if len(body) >= RESPONSE_GZIP_MIN_BYTES else None
+
+
+_lock = threading.Lock()
+_entries = OrderedDict()
+_version = None
+_stats = {"hits": 0, "misses": 0, "not_modified": 0, "gzip_bytes_saved": 0}
+
+
+def table_version():
+    """Current job_leads version (changes on every insert, update and delete)."""
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT version FROM job_leads_version WHERE id = 1")
+        row = cur.fetchone()
+    if row is None:
+        return 0
+    return row['version'] if isinstance(row, dict) else row[0]
+
+
+def _request_key(request):
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if k not in _IGNORED_PARAMS)
+    return request.url.path + "?" + "&".join(f"{k}={v}" for k, v in params)
+
+
+def _etag(version, key):
+    return '"' + hashlib.sha256(f"{version}|{key}".encode()).hexdigest()[:32] + '"'
+
+
+def _etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _lookup(version, key):
+    global _version
+    with _lock:
+        if version != _version:
+            # The table changed: everything cached belongs to an older version.
+            _entries.clear()
+            _version = version
+        entry = _entries.get(key)
+        if entry is not None:
+            _entries.move_to_end(key)
+            _stats["hits"] += 1
+        else:
+            _stats["misses"] += 1
+        return entry
+
+
+def _store(version, key, entry):
+    with _lock:
+        if version != _version:
+            return
+        _entries[key] = entry
+        while len(_entries) > RESPONSE_CACHE_SIZE:
+            _entries.popitem(last=False)
+
+
+def _not_modified(etag):
+    with _lock:
+        _stats["not_modified"] += 1
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+
+
+def check(request):
+    """ETag for the current table version, plus a 304 response if the client already has it
+    (else None). For responses that are streamed rather than cached."""
+    etag = _etag(table_version(), _request_key(request))
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return etag, _not_modified(etag)
+    return etag, None
+
+
+def respond(request, build, media_type="application/json"):
+    """
+    Serve a read endpoint through the cache. `build()` returns (payload, headers):
+    JSON-serializable data (or str/bytes for other media types) and extra response
+    headers to cache alongside it. Exceptions from `build` propagate and nothing is cached.
+    """
+    version = table_version()
+    key = _request_key(request)
+    etag = _etag(version, key)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+
+    entry = _lookup(version, key)
+    if entry is None:
+        payload, headers = build()
+        if isinstance(payload, str):
+            body = payload.encode()
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload).encode()
+        entry = _Entry(etag, body, media_type, headers or {})
+        _store(version, key, entry)
+
+    headers = {**entry.headers, "ETag": entry.etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    if entry.gzipped is not None and "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        with _lock:
+            _stats["gzip_bytes_saved"] += len(entry.body) - len(entry.gzipped)
+        return Response(entry.gzipped, media_type=entry.media_type, headers=headers)
+    return Response(entry.body, media_type=entry.media_type, headers=headers)
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+        stats["entries"] = len(_entries)
+        stats["version"] = _version
+    served = stats["hits"] + stats["misses"] + stats["not_modified"]
+    stats["hit_rate"] = round((stats["hits"] + stats["not_modified"]) / served, 3) if served else 0.0
+    return stats
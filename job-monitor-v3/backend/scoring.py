@@ -0,0 +1,127 @@
+"""
+AI scoring engine.
+
+Workers claim batches of unscored leads with a time-limited lease
+(claimed_by / claim_expires_at), classify them, and write the scores back.
+A lead is only ever held by one claim at a time; if a worker dies, its
+lease expires and another worker picks the leads up. Every claim counts as
+an attempt; after AI_MAX_SCORE_ATTEMPTS without a classification the lead is
+marked scored with score 0 and left alone.
+"""
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import fetchers
+import metrics
+from ai_client import GROQ_KEYS
+from config import (
+    AI_WORKERS_PER_KEY, AI_MAX_WORKERS, AI_CLAIM_BATCH,
+    AI_CLAIM_LEASE_SECS, AI_MAX_SCORE_ATTEMPTS, AI_MULTI_ITEM_MAX_CHARS,
+)
+from async_database import get_async_write_connection
+from database import DATABASE_URL
+
+# Implies the partial index idx_job_leads_unscored; near-duplicates are never scored.
+UNSCORED_PREDICATE = "match_score = 0 AND scored_at IS NULL AND description != '' AND duplicate_of IS NULL"
+
+_executor = None
+
+
+def worker_count():
+    """Number of scoring workers: AI_WORKERS_PER_KEY per Groq key, capped at AI_MAX_WORKERS."""
+    return max(1, min(AI_MAX_WORKERS, len(GROQ_KEYS) * AI_WORKERS_PER_KEY))
+
+
+def get_executor():
+    """Dedicated thread pool so blocking Groq calls don't starve the default executor."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=worker_count(), thread_name_prefix="scorer")
+    return _executor
+
+
+async def claim_leads(limit=AI_CLAIM_BATCH):
+    """Atomically lease up to `limit` unscored leads. Returns (claim_token, rows)."""
+    token = uuid.uuid4().hex
+    now = datetime.now()
+    expires = (now + timedelta(seconds=AI_CLAIM_LEASE_SECS)).isoformat()
+    # Postgres skips rows another worker has locked; SQLite writers are already
+    # serialized by DB_WRITE_LOCK. RETURNING (SQLite 3.35+) hands back the claimed
+    # rows without a second query, which would scan job_leads by claimed_by.
+    skip_locked = "FOR UPDATE SKIP LOCKED" if DATABASE_URL else ""
+    async with get_async_write_connection() as conn:
+        rows = await conn.fetchall(f"""
+            UPDATE job_leads SET claimed_by = ?, claim_expires_at = ?, score_attempts = score_attempts + 1
+            WHERE id IN (
+                SELECT id FROM job_leads
+                WHERE {UNSCORED_PREDICATE}
+                  AND (claim_expires_at IS NULL OR claim_expires_at < ?)
+                ORDER BY created_at DESC
+                LIMIT ?
+                {skip_locked}
+            )
+            RETURNING id, title, description
+        """, (token, expires, now.isoformat(), limit))
+    return token, [dict(row) for row in rows]
+
+
+def score_claimed(rows):
+    """Classify claimed rows. Short leads share multi-item prompts; the rest go one per call.
+
+    Returns {lead_id: (agency, confidence, score)}.
+    """
+    short = [r for r in rows if len(r['description'] or '') < AI_MULTI_ITEM_MAX_CHARS]
+    if len(short) < 2:
+        short = []
+    short_ids = {r['id'] for r in short}
+
+    results = {}
+    if short:
+        batch = fetchers.classify_batch_with_ai([(r['title'], r['description']) for r in short])
+        results.update(zip((r['id'] for r in short), batch))
+    for row in rows:
+        if row['id'] not in short_ids:
+            results[row['id']] = fetchers.classify_with_ai(row['title'], row['description'])
+    return results
+
+
+async def save_scores(token, results):
+    """Write scores for leads still held by `token` and release their claim.
+
+    Failed classifications (fetchers.UNCLASSIFIED) keep their lease, so they are
+    retried once it expires rather than immediately, unless the lead has used
+    up AI_MAX_SCORE_ATTEMPTS claims: then it is marked scored (score 0, agency
+    unassigned) and released for good. Returns the number saved.
+    """
+    now = datetime.now().isoformat()
+    rows, failed = [], []
+    for lead_id, result in results.items():
+        if result == fetchers.UNCLASSIFIED:
+            failed.append(lead_id)
+        else:
+            agency, confidence, score = result
+            rows.append((agency, score, confidence, now, lead_id, token))
+    if not rows and not failed:
+        return 0
+    async with get_async_write_connection() as conn:
+        if rows:
+            await conn.executemany("""
+                UPDATE job_leads
+                SET agency_match = ?, match_score = ?, ai_confidence = ?, scored_at = ?,
+                    claimed_by = NULL, claim_expires_at = NULL
+                WHERE id = ? AND claimed_by = ?
+            """, rows)
+        given_up = []
+        if failed:
+            marks = ", ".join("?" * len(failed))
+            given_up = await conn.fetchall(f"""
+                UPDATE job_leads SET scored_at = ?, claimed_by = NULL, claim_expires_at = NULL
+                WHERE claimed_by = ? AND score_attempts >= ? AND id IN ({marks})
+                RETURNING id
+            """, (now, token, AI_MAX_SCORE_ATTEMPTS, *failed))
+    metrics.LEADS_SCORED.inc(len(rows))
+    if given_up:
+        metrics.LEADS_SCORE_FAILED.inc(len(given_up))
+        print(f"⚠️ Gave up scoring {len(given_up)} leads after {AI_MAX_SCORE_ATTEMPTS} attempts")
+    return len(rows)
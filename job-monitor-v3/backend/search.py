@@ -0,0 +1,83 @@
+"""
+Ranked full-text search over job_leads (title, description, company).
+
+SQLite uses the job_leads_fts FTS5 table (external content keyed on the
+persisted job_leads.search_rowid, kept in sync by triggers); Postgres uses
+the generated search_vector tsvector column and its GIN index. Both return
+a highlighted title and a description snippet with matches wrapped in <mark>.
+"""
+import sqlite3
+
+from database import get_read_connection, _translate_params, DATABASE_URL
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+
+class SearchQueryError(ValueError):
+    """The search text isn't a valid full-text query (a client error, unlike DB failures)."""
+
+
+# sqlite3.OperationalError messages FTS5 gives for a malformed MATCH expression.
+_FTS5_SYNTAX_ERRORS = ("fts5: syntax error", "unterminated string", "unknown special query")
+
+
+def _fts5_query(text):
+    """Quote each term so user input can't hit FTS5 syntax; the last term is a prefix match."""
+    terms = ['"' + t.replace('"', '""') + '"' for t in text.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_leads(text, clauses, params, columns, limit=20, offset=0):
+    """
+    Run a ranked search. `clauses`/`params` are extra job_leads filters (as built by
+    main._lead_filters) and `columns` the job_leads columns to return.
+    Each result also carries rank, title_highlight and snippet.
+    """
+    if not text.strip():
+        return []
+    select_cols = ", ".join(f"l.{c}" for c in columns)
+    where = "".join(f" AND l.{c}" for c in clauses)
+
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        if DATABASE_URL:
+            # Rank and page first, then build headlines only for the rows returned.
+            cur.execute(_translate_params(f"""
+                SELECT {select_cols},
+                       ts_headline('english', coalesce(l.title, ''), q,
+                                   'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, HighlightAll=true') AS title_highlight,
+                       ts_headline('english', coalesce(l.description, ''), q,
+                                   'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_END}, MaxWords=30, MinWords=10') AS snippet,
+                       hits.rank
+                FROM (
+                    SELECT j.id, ts_rank(j.search_vector, q) AS rank, q
+                    FROM job_leads j, websearch_to_tsquery('english', ?) q
+                    WHERE j.search_vector @@ q
+                ) hits
+                JOIN job_leads l ON l.id = hits.id
+                WHERE TRUE{where}
+                ORDER BY hits.rank DESC
+                LIMIT ? OFFSET ?
+            """), (text, *params, limit, offset))
+        else:
+            try:
+                cur.execute(f"""
+                    SELECT {select_cols},
+                           highlight(job_leads_fts, 0, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}') AS title_highlight,
+                           snippet(job_leads_fts, 1, '{HIGHLIGHT_START}', '{HIGHLIGHT_END}', '…', 24) AS snippet,
+                           -bm25(job_leads_fts, 10.0, 1.0, 5.0) AS rank
+                    FROM job_leads_fts
+                    JOIN job_leads l ON l.search_rowid = job_leads_fts.rowid
+                    WHERE job_leads_fts MATCH ?{where}
+                    ORDER BY bm25(job_leads_fts, 10.0, 1.0, 5.0)
+                    LIMIT ? OFFSET ?
+                """, (_fts5_query(text), *params, limit, offset))
+            except sqlite3.OperationalError as e:
+                # Only query syntax problems are the caller's fault; anything else is a real DB error.
+                if any(marker in str(e) for marker in _FTS5_SYNTAX_ERRORS):
+                    raise SearchQueryError(str(e)) from e
+                raise
+        return [dict(row) for row in cur.fetchall()]
@@ -0,0 +1,150 @@
+"""
+In-memory seen filter over (source, external_id).
+
+save_leads asks it about every candidate before doing any work, so leads we
+already have cost no simhash, no batch slot and no per-lead database round trip.
+Each key is reduced to a 64-bit fingerprint, kept in a sorted array('q') (8 bytes
+per key) plus a small set of recent additions that is merged in once it
+reaches SEEN_FILTER_MERGE_SIZE. A miss means definitely new; a hit means seen
+unless two keys share a fingerprint (about keys / 2**64, reported as the
+false-positive rate), so save_leads confirms a batch's hits with one
+SELECT ... WHERE id IN (...) (confirm()) and saves any that aren't stored.
+Leads are never deleted, so entries don't go stale.
+
+Loaded from job_leads at startup and updated as batches are saved. Until it is
+loaded a miss proves nothing, and those leads are deduplicated by the insert's
+ON CONFLICT as before.
+"""
+import hashlib
+import heapq
+import sys
+import threading
+from array import array
+from bisect import bisect_left
+
+import metrics
+from config import SEEN_FILTER_MERGE_SIZE
+from database import get_read_connection, _translate_params
+
+LOOKUPS = metrics.counter("seen_filter_lookups_total", "Seen-filter answers (new, seen, or unknown before it is loaded)")
+FALSE_POSITIVES = metrics.counter("seen_filter_false_positives_total", "Seen-filter hits that job_leads did not confirm")
+
+# Lead ids per confirm() query (stays under SQLite's bound-parameter limit).
+_CONFIRM_CHUNK = 500
+
+
+def fingerprint(source, external_id):
+    digest = hashlib.blake2b(f"{source}\x1f{external_id}".encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class SeenFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sorted = array('q')
+        self._recent = set()
+        self.loaded = False
+
+    def _contains_sorted(self, fp):
+        i = bisect_left(self._sorted, fp)
+        return i < len(self._sorted) and self._sorted[i] == fp
+
+    def _contains(self, fp):
+        return fp in self._recent or self._contains_sorted(fp)
+
+    def seen(self, source, external_id):
+        """True if this lead is already stored."""
+        fp = fingerprint(source, external_id)
+        with self._lock:
+            hit = self._contains(fp)
+            loaded = self.loaded
+        LOOKUPS.inc(answer="seen" if hit else "new" if loaded else "unknown")
+        return hit
+
+    def add_many(self, keys):
+        """Record (source, external_id) pairs that are now stored."""
+        fps = [fingerprint(source, external_id) for source, external_id in keys]
+        with self._lock:
+            for fp in fps:
+                if not self._contains(fp):
+                    self._recent.add(fp)
+            if len(self._recent) >= SEEN_FILTER_MERGE_SIZE:
+                self._merge()
+
+    def _merge(self):
+        self._sorted = array('q', heapq.merge(self._sorted, sorted(self._recent)))
+        self._recent.clear()
+
+    def load(self):
+        """Fingerprint every stored lead. Keys added meanwhile are kept."""
+        fps = array('q')
+        with get_read_connection() as conn:
+            cur = conn.cursor()
+            cur.execute("SELECT source, external_id FROM job_leads")
+            while True:
+                rows = cur.fetchmany(10000)
+                if not rows:
+                    break
+                fps.extend(fingerprint(row['source'], row['external_id']) for row in rows)
+        loaded = array('q', sorted(set(fps)))
+        with self._lock:
+            self._sorted = loaded
+            self._recent = {fp for fp in self._recent if not self._contains_sorted(fp)}
+            self.loaded = True
+        return len(self)
+
+    def __len__(self):
+        return len(self._sorted) + len(self._recent)
+
+    def memory_bytes(self):
+        with self._lock:
+            # The pending set holds int objects as well as its own table.
+            return sys.getsizeof(self._sorted) + sys.getsizeof(self._recent) + 32 * len(self._recent)
+
+    def false_positive_rate(self):
+        """Chance that an unseen key collides with a stored fingerprint."""
+        return len(self) / 2 ** 64
+
+
+index = SeenFilter()
+
+
+def confirm(lead_ids):
+    """The subset of `lead_ids` (the filter's hits) actually stored in job_leads."""
+    lead_ids = list(lead_ids)
+    stored = set()
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        for i in range(0, len(lead_ids), _CONFIRM_CHUNK):
+            chunk = lead_ids[i:i + _CONFIRM_CHUNK]
+            marks = ", ".join("?" for _ in chunk)
+            cur.execute(_translate_params(f"SELECT id FROM job_leads WHERE id IN ({marks})"), chunk)
+            stored.update(row['id'] for row in cur.fetchall())
+    FALSE_POSITIVES.inc(len(set(lead_ids) - stored))
+    return stored
+
+
+def rebuild():
+    """Load the filter from job_leads (startup)."""
+    count = index.load()
+    print(f"🔎 Seen filter: {count} leads, {index.memory_bytes() / 1024:.0f} KiB")
+    return count
+
+
+def get_stats():
+    answers = {dict(key).get("answer"): value for _, key, value in LOOKUPS.samples()}
+    lookups = sum(answers.values())
+    return {
+        "loaded": index.loaded,
+        "keys": len(index),
+        "memory_bytes": index.memory_bytes(),
+        "false_positive_rate": index.false_positive_rate(),
+        "false_positives": FALSE_POSITIVES.total(),
+        "lookups": answers,
+        "seen_rate": round(answers.get("seen", 0) / lookups, 3) if lookups else 0.0,
+    }
+
+
+metrics.gauge("seen_filter_keys", "Leads in the seen filter", lambda: len(index))
+metrics.gauge("seen_filter_memory_bytes", "Approximate seen-filter memory", index.memory_bytes)
+metrics.gauge("seen_filter_false_positive_rate", "Estimated seen-filter false-positive rate", index.false_positive_rate)
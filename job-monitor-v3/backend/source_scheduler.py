@@ -0,0 +1,165 @@
+"""
+Adaptive per-source polling.
+
+Every enabled job_sources row is polled on its own interval, instead of all
+sources at once whenever /leads/refresh is hit. After each fetch the interval
+is rescaled so a fetch finds about SOURCE_TARGET_YIELD new leads (a smoothed
+average of recent yields): busy sources are polled more often and quiet ones
+less, within SOURCE_POLL_MIN_SECS..SOURCE_POLL_MAX_SECS. The delay is also
+stretched by the source's recent error rate. Failures back off exponentially;
+after SOURCE_DISABLE_AFTER_FAILURES in a row the source is disabled until it
+is re-enabled via POST /sources/{id}/enable. The schedule is kept on
+job_sources, so it survives restarts.
+"""
+import asyncio
+import random
+import threading
+from datetime import datetime, timedelta
+
+import fetchers
+import metrics
+from config import (
+    SOURCE_SCHEDULER_TICK_SECS, SOURCE_POLL_DEFAULT_SECS, SOURCE_POLL_MIN_SECS, SOURCE_POLL_MAX_SECS,
+    SOURCE_TARGET_YIELD, SOURCE_YIELD_ALPHA, SOURCE_POLL_JITTER, SOURCE_BACKOFF_MAX_SECS,
+    SOURCE_DISABLE_AFTER_FAILURES, SOURCE_FETCH_TIMEOUT,
+)
+from async_database import get_async_read_connection, get_async_write_connection
+
+SCHEDULE_COLUMNS = (
+    "id", "name", "type", "enabled", "disabled_reason", "poll_interval_secs", "next_poll_at",
+    "last_checked", "yield_avg", "last_yield", "error_rate", "consecutive_failures",
+    "fetch_count", "error_count", "last_error",
+)
+
+_lock = threading.Lock()
+_stats = {"polls": 0, "failures": 0, "auto_disabled": 0}
+_rng = random.Random()
+
+
+def plan(source, new_leads=0, error=None, now=None):
+    """Schedule after one fetch of `source` (a job_sources row): the column updates to store."""
+    now = now or datetime.now()
+    interval = source.get("poll_interval_secs") or SOURCE_POLL_DEFAULT_SECS
+    error_rate = (1 - SOURCE_YIELD_ALPHA) * (source.get("error_rate") or 0.0) + SOURCE_YIELD_ALPHA * (error is not None)
+    updates = {
+        "error_rate": round(error_rate, 4),
+        "fetch_count": (source.get("fetch_count") or 0) + 1,
+    }
+    if error is not None:
+        failures = (source.get("consecutive_failures") or 0) + 1
+        delay = min(SOURCE_BACKOFF_MAX_SECS, interval * 2 ** failures)
+        updates.update(consecutive_failures=failures, error_count=(source.get("error_count") or 0) + 1,
+                       last_error=str(error)[:500])
+        if failures >= SOURCE_DISABLE_AFTER_FAILURES:
+            updates.update(enabled=0, disabled_reason=f"Auto-disabled after {failures} consecutive failures")
+    else:
+        previous = source.get("yield_avg")
+        yield_avg = new_leads if previous is None else (1 - SOURCE_YIELD_ALPHA) * previous + SOURCE_YIELD_ALPHA * new_leads
+        # Aim for SOURCE_TARGET_YIELD new leads per fetch, moving at most 2x per step.
+        factor = min(2.0, max(0.5, SOURCE_TARGET_YIELD / max(yield_avg, 0.1)))
+        interval = min(SOURCE_POLL_MAX_SECS, max(SOURCE_POLL_MIN_SECS, interval * factor))
+        delay = interval * (1 + error_rate)
+        updates.update(yield_avg=round(yield_avg, 3), last_yield=new_leads, consecutive_failures=0,
+                       poll_interval_secs=round(interval, 1))
+    delay *= _rng.uniform(1 - SOURCE_POLL_JITTER, 1 + SOURCE_POLL_JITTER)
+    updates["next_poll_at"] = (now + timedelta(seconds=delay)).isoformat()
+    return updates
+
+
+async def _save(source_id, updates):
+    assignments = ", ".join(f"{col} = ?" for col in updates)
+    async with get_async_write_connection() as conn:
+        await conn.execute(f"UPDATE job_sources SET {assignments} WHERE id = ?", (*updates.values(), source_id))
+
+
+async def _poll(source, fetch):
+    """Wait for one source's fetch (a fetchers.start_fetch future) and store its next schedule."""
+    # A timed-out fetch keeps its thread; the source stays running until that finishes.
+    future = asyncio.wrap_future(fetch)
+    new_leads, error = 0, None
+    try:
+        new_leads = await asyncio.wait_for(asyncio.shield(future), timeout=SOURCE_FETCH_TIMEOUT)
+    except asyncio.TimeoutError:
+        error = f"timed out after {SOURCE_FETCH_TIMEOUT:g}s"
+    except Exception as e:
+        error = e
+    updates = plan(source, new_leads, error)
+    with _lock:
+        _stats["polls"] += 1
+        _stats["failures"] += error is not None
+        _stats["auto_disabled"] += updates.get("enabled") == 0
+    if updates.get("enabled") == 0:
+        print(f"🔌 Source {source['name']} disabled after {updates['consecutive_failures']} consecutive failures: {error}")
+    try:
+        await _save(source["id"], updates)
+    except Exception as e:
+        print(f"Scheduler Error: could not save schedule for {source['name']}: {e}")
+
+
+async def due_sources(now=None):
+    """Enabled sources whose next poll is due (never-polled sources first)."""
+    now = (now or datetime.now()).isoformat()
+    async with get_async_read_connection() as conn:
+        rows = await conn.fetchall(
+            "SELECT * FROM job_sources WHERE enabled = 1 AND (next_poll_at IS NULL OR next_poll_at <= ?) "
+            "ORDER BY next_poll_at IS NOT NULL, next_poll_at",
+            (now,),
+        )
+    return [dict(row) for row in rows]
+
+
+async def run(stop):
+    """Scheduler loop (lifespan task): every SOURCE_SCHEDULER_TICK_SECS start the due sources' fetches."""
+    print("🗓️ Source Scheduler Started")
+    tasks = set()
+    while not stop.is_set():
+        try:
+            for source in await due_sources():
+                # Shared with /leads/refresh: None while either path is still fetching it.
+                fetch = fetchers.start_fetch(source)
+                if fetch is None:
+                    continue
+                task = asyncio.create_task(_poll(source, fetch))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except Exception as e:
+            print(f"Scheduler Error: {e}")
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=SOURCE_SCHEDULER_TICK_SECS)
+        except asyncio.TimeoutError:
+            pass
+    if tasks:
+        await asyncio.wait(tasks, timeout=SOURCE_FETCH_TIMEOUT)
+
+
+async def get_schedule():
+    """Per-source schedule and stats, soonest next poll first; disabled sources last."""
+    async with get_async_read_connection() as conn:
+        rows = await conn.fetchall(
+            f"SELECT {', '.join(SCHEDULE_COLUMNS)} FROM job_sources "
+            "ORDER BY enabled DESC, next_poll_at IS NOT NULL, next_poll_at, id"
+        )
+    running = fetchers.running_sources()
+    return [dict(row, in_flight=row["id"] in running) for row in rows]
+
+
+async def enable(source_id):
+    """Re-enable a source and poll it on the next tick. Returns False if it doesn't exist."""
+    async with get_async_write_connection() as conn:
+        updated = await conn.execute(
+            "UPDATE job_sources SET enabled = 1, disabled_reason = NULL, consecutive_failures = 0, next_poll_at = NULL "
+            "WHERE id = ?",
+            (source_id,),
+        )
+    return updated > 0
+
+
+def get_stats():
+    with _lock:
+        stats = dict(_stats)
+    stats["in_flight"] = len(fetchers.running_sources())
+    return stats
+
+
+metrics.gauge("source_polls_in_flight", "Source fetches queued or running (scheduler and refresh)",
+              lambda: len(fetchers.running_sources()))
@@ -0,0 +1,86 @@
+"""
+Shared fixtures. The suite runs against a throwaway SQLite database: DB_PATH and
+the other settings read at import time are set before any backend module is
+imported, so every connection the modules open points at it.
+"""
+import asyncio
+import atexit
+import os
+import shutil
+import sys
+import tempfile
+
+_TMP_DIR = tempfile.mkdtemp(prefix="jobmonitor-tests-")
+atexit.register(shutil.rmtree, _TMP_DIR, ignore_errors=True)
+os.environ["DB_PATH"] = os.path.join(_TMP_DIR, "jobs.db")
+# Empty rather than unset, so a local .env can't point the suite at a real database or Groq.
+os.environ["DATABASE_URL"] = ""
+os.environ["GROQ_API_KEY"] = ""
+os.environ["SOURCE_SCHEDULER_ENABLED"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import async_database
+import classify_cache
+import fetchers
+import ingest_queue
+import migrations
+import near_dupes
+import response_cache
+import seen_filter
+from database import get_write_connection
+
+# Emptied before every test; migration-seeded tables (schema_migrations, job_leads_version) are kept.
+_TABLES = ("job_leads", "lead_changes", "ingest_queue", "job_sources", "classification_cache")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def schema():
+    migrations.run_migrations()
+
+
+@pytest.fixture(autouse=True)
+def clean_state(schema):
+    """Empty the tables and reset the in-memory indexes and caches built on them."""
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        for table in _TABLES:
+            cur.execute(f"DELETE FROM {table}")
+    near_dupes.index.clear()
+    seen_filter.index = seen_filter.SeenFilter()
+    seen_filter.index.loaded = True
+    with response_cache._lock:
+        response_cache._entries.clear()
+    with classify_cache._lock:
+        classify_cache._lru.clear()
+    with ingest_queue._lock:
+        ingest_queue._depth = 0
+        ingest_queue._reserved = 0
+    with fetchers._running_lock:
+        fetchers._running_sources.clear()
+    yield
+
+
+def run_async(coro):
+    """Run a coroutine on a fresh event loop, closing the async pool with it as at shutdown."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await async_database.close_async_pool()
+    return asyncio.run(main())
+
+
+def make_lead(n, source="upwork", **overrides):
+    """A lead dict as the fetchers build them; text varies with n so leads aren't near-duplicates."""
+    lead = {
+        "source": source,
+        "external_id": f"ext-{n}",
+        "title": f"Lead {n} needs a {['python', 'react', 'devops', 'data'][n % 4]} engineer",
+        "description": " ".join(f"word{n}x{i}" for i in range(30)),
+        "url": f"https://example.com/jobs/{n}",
+        "posted_at": f"2026-01-{1 + n % 28:02d}T00:00:00",
+    }
+    lead.update(overrides)
+    return lead
@@ -0,0 +1,60 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import fetchers
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.path == "/trickle":
+            # Never idle long enough for a per-read timeout to fire.
+            self.send_response(200)
+            self.send_header("Content-Length", "1000")
+            self.end_headers()
+            for _ in range(1000):
+                try:
+                    self.wfile.write(b"x")
+                    self.wfile.flush()
+                except OSError:
+                    return
+                time.sleep(0.05)
+            return
+        body = b"<rss/>" * 100
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope="module")
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.shutdown()
+
+
+def test_body_is_read_in_full_within_the_deadline(server):
+    resp = fetchers._http_get(f"{server}/feed", fetchers._Deadline(5))
+    assert resp.content == b"<rss/>" * 100
+
+
+def test_trickling_body_stops_at_the_deadline(server):
+    started = time.monotonic()
+    with pytest.raises(fetchers.FetchTimeout):
+        fetchers._http_get(f"{server}/trickle", fetchers._Deadline(0.5))
+    assert time.monotonic() - started < 1.5
+
+
+def test_spent_deadline_raises_before_any_request():
+    deadline = fetchers._Deadline(0)
+    with pytest.raises(fetchers.FetchTimeout):
+        deadline.remaining()
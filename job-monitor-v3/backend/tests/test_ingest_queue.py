@@ -0,0 +1,93 @@
+import pytest
+
+import fetchers
+import ingest_queue
+from conftest import make_lead, run_async
+from database import get_read_connection, get_write_connection
+
+
+def _queue_rows():
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT id, status, attempts, lease_token, lease_expires_at, last_error FROM ingest_queue ORDER BY id")
+        return [dict(row) for row in cur.fetchall()]
+
+
+def _make_ready():
+    """Pass every retry's not-before time."""
+    with get_write_connection() as conn:
+        conn.cursor().execute("UPDATE ingest_queue SET lease_expires_at = '2000-01-01' WHERE lease_expires_at IS NOT NULL")
+
+
+@pytest.fixture
+def failing_save(monkeypatch):
+    def save_leads(leads, strict=False):
+        raise RuntimeError("database unavailable")
+    monkeypatch.setattr(fetchers, "save_leads", save_leads)
+
+
+def test_enqueued_jobs_are_saved_and_acked():
+    assert run_async(ingest_queue.enqueue([make_lead(n) for n in range(3)])) == 3
+    assert ingest_queue.depth() == 3
+    assert ingest_queue.process_batch(10) == 3
+    assert _queue_rows() == [] and ingest_queue.depth() == 0
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT count(*) FROM job_leads")
+        assert cur.fetchone()[0] == 3
+
+
+def test_claimed_jobs_are_leased_to_one_worker():
+    run_async(ingest_queue.enqueue([make_lead(n) for n in range(3)]))
+    first = ingest_queue.claim(2)
+    assert [attempts for _, attempts, _ in first] == [0, 0]
+    assert len(ingest_queue.claim(10)) == 1
+    assert ingest_queue.claim(10) == []
+
+
+def test_failed_batch_is_retried_after_a_delay(failing_save):
+    run_async(ingest_queue.enqueue([make_lead(0)]))
+    assert ingest_queue.process_batch(10) == 1
+    [row] = _queue_rows()
+    assert (row["status"], row["attempts"], row["lease_token"]) == ("pending", 1, None)
+    assert "database unavailable" in row["last_error"]
+    assert ingest_queue.claim(10) == []  # not before lease_expires_at
+    _make_ready()
+    assert [attempts for _, attempts, _ in ingest_queue.claim(10)] == [1]
+
+
+def test_job_is_dead_lettered_after_max_attempts(monkeypatch, failing_save):
+    monkeypatch.setattr(ingest_queue, "INGEST_MAX_ATTEMPTS", 3)
+    run_async(ingest_queue.enqueue([make_lead(0)]))
+    for _ in range(3):
+        assert ingest_queue.process_batch(10) == 1
+        _make_ready()
+    [row] = _queue_rows()
+    assert (row["status"], row["attempts"]) == ("dead", 3)
+    assert ingest_queue.depth() == 0
+    assert ingest_queue.process_batch(10) == 0
+
+
+def test_recover_releases_stale_leases_and_reseeds_depth():
+    run_async(ingest_queue.enqueue([make_lead(n) for n in range(2)]))
+    ingest_queue.claim(10)  # then the process "dies"
+    with ingest_queue._lock:
+        ingest_queue._depth = 0
+    assert ingest_queue.recover() == 2
+    assert ingest_queue.depth() == 2
+    assert len(ingest_queue.claim(10)) == 2
+
+
+def test_reservations_count_against_capacity_until_released():
+    assert ingest_queue.try_reserve(6, limit=10)
+    assert not ingest_queue.try_reserve(5, limit=10)
+    ingest_queue.release(6)
+    assert ingest_queue.try_reserve(5, limit=10)
+
+
+def test_reserved_enqueue_turns_the_hold_into_depth():
+    assert ingest_queue.try_reserve(2, limit=3)
+    run_async(ingest_queue.enqueue([make_lead(0), make_lead(1)], reserved=True))
+    stats = ingest_queue.get_stats()
+    assert (stats["depth"], stats["reserved"]) == (2, 0)
+    assert not ingest_queue.try_reserve(2, limit=3)
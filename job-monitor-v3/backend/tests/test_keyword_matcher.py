@@ -0,0 +1,30 @@
+import pytest
+
+import keyword_matcher
+
+
+@pytest.mark.parametrize("weight", [1, 3])
+def test_reject_phrase_in_title_rejects_at_any_title_weight(monkeypatch, weight):
+    monkeypatch.setattr(keyword_matcher, "KEYWORD_TITLE_WEIGHT", weight)
+    verdict = keyword_matcher.scan("Babysitter needed", "python backend api automation")
+    assert verdict.reject_in_title and verdict.is_reject
+
+
+def test_reject_phrase_in_body_only_rejects_without_agency_signal():
+    assert keyword_matcher.scan("Weekend help", "babysitter for two kids").is_reject
+    verdict = keyword_matcher.scan("Python developer", "some data entry, mostly backend api work")
+    assert not verdict.reject_in_title and not verdict.is_reject
+
+
+def test_phrases_match_on_word_boundaries_only():
+    verdict = keyword_matcher.scan("Mapython dev", "rapid pipeline")
+    assert verdict.agency_scores == {}
+
+
+def test_clear_single_agency_match_skips_the_llm():
+    agency, confidence, score = keyword_matcher.classify("Python backend engineer", "api automation and integration")
+    assert agency == "socketlogic" and 0 < confidence <= 0.95 and score > 0
+
+
+def test_ambiguous_text_falls_through():
+    assert keyword_matcher.classify("Python marketing lead", "growth and backend") is None
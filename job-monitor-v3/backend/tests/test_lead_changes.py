@@ -0,0 +1,73 @@
+import fetchers
+import lead_changes
+from conftest import make_lead
+from database import get_write_connection
+
+COLUMNS = ["id", "title", "status", "match_score"]
+
+
+def _write(sql, params=()):
+    with get_write_connection() as conn:
+        conn.cursor().execute(sql, params)
+
+
+def _since(cursor):
+    return lead_changes.changes_since(cursor, COLUMNS)
+
+
+def test_inserts_are_reported_with_the_current_row():
+    start = lead_changes.current_seq()
+    ids = fetchers.save_leads([make_lead(0), make_lead(1)])
+    changes, cursor, reset = _since(start)
+    assert [c["lead_id"] for c in changes] == ids
+    assert all(c["kinds"] == ["inserted"] for c in changes)
+    assert changes[0]["lead"]["title"] == make_lead(0)["title"]
+    assert cursor == lead_changes.current_seq() and not reset
+
+
+def test_cursor_resumes_after_the_last_change():
+    [lead_id] = fetchers.save_leads([make_lead(0)])
+    _, cursor, _ = _since(0)
+    assert _since(cursor) == ([], cursor, False)
+    _write("UPDATE job_leads SET match_score = 70 WHERE id = ?", (lead_id,))
+    changes, next_cursor, _ = _since(cursor)
+    assert [(c["lead_id"], c["kinds"], c["lead"]["match_score"]) for c in changes] == [(lead_id, ["scored"], 70)]
+    assert next_cursor > cursor
+
+
+def test_changes_collapse_per_lead_in_newest_first_seq_order():
+    a, b = fetchers.save_leads([make_lead(0), make_lead(1)])
+    _, cursor, _ = _since(0)
+    _write("UPDATE job_leads SET status = 'archived' WHERE id = ?", (a,))
+    _write("UPDATE job_leads SET match_score = 50 WHERE id = ?", (b,))
+    _write("UPDATE job_leads SET client_proposal = 'Hi' WHERE id = ?", (a,))
+    changes, _, _ = _since(cursor)
+    assert [(c["lead_id"], c["kinds"]) for c in changes] == [(b, ["scored"]), (a, ["status", "enriched"])]
+    assert changes[1]["seq"] > changes[0]["seq"]
+
+
+def test_visible_edits_are_updates_and_bookkeeping_is_silent():
+    [lead_id] = fetchers.save_leads([make_lead(0)])
+    _, cursor, _ = _since(0)
+    _write("UPDATE job_leads SET claimed_by = 'w', claim_expires_at = 'x', simhash = 1 WHERE id = ?", (lead_id,))
+    assert _since(cursor)[0] == []
+    _write("UPDATE job_leads SET budget = '$500', status = 'archived' WHERE id = ?", (lead_id,))
+    [change] = _since(cursor)[0]
+    assert sorted(change["kinds"]) == ["status", "updated"]
+
+
+def test_cursor_older_than_retained_history_asks_for_a_reset():
+    fetchers.save_leads([make_lead(n) for n in range(3)])
+    _, cursor, _ = _since(0)
+    _write("DELETE FROM lead_changes WHERE seq < ?", (cursor,))
+    assert _since(cursor - 3)[2] is True
+    assert _since(cursor - 1)[2] is False
+
+
+def test_limit_pages_through_changes():
+    ids = fetchers.save_leads([make_lead(n) for n in range(5)])
+    seen, cursor = [], 0
+    for _ in range(3):
+        changes, cursor, _ = lead_changes.changes_since(cursor, COLUMNS, limit=2)
+        seen += [c["lead_id"] for c in changes]
+    assert seen == ids
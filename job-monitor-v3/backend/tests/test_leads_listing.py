@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import fetchers
+import main
+from conftest import make_lead
+from database import get_write_connection
+
+AUTH = {"Authorization": f"Bearer {main.API_KEY}"}
+
+
+@pytest.fixture
+def client():
+    # No `with`: the lifespan (workers, scheduler) isn't needed to serve reads.
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def leads():
+    """Twelve open leads: scores tie in threes, and three are ascend, applied or duplicates."""
+    ids = fetchers.save_leads([make_lead(n, source="upwork" if n % 2 else "remoteok") for n in range(12)])
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        for n, lead_id in enumerate(ids):
+            cur.execute("UPDATE job_leads SET match_score = ?, scored_at = 'x' WHERE id = ?", (n // 3 * 10, lead_id))
+        cur.execute("UPDATE job_leads SET agency_match = 'ascend' WHERE id IN (?, ?)", (ids[0], ids[1]))
+        cur.execute("UPDATE job_leads SET applied = 1 WHERE id = ?", (ids[2],))
+        cur.execute("UPDATE job_leads SET status = 'archived' WHERE id = ?", (ids[11],))
+    return ids
+
+
+def _pages(client, query):
+    pages, cursor = [], None
+    while True:
+        params = dict(query, **({"cursor": cursor} if cursor else {}))
+        res = client.get("/leads", params=params, headers=AUTH)
+        assert res.status_code == 200
+        pages.append(res.json())
+        cursor = res.headers.get("X-Next-Cursor")
+        if not cursor:
+            return pages
+
+
+def test_keyset_pages_cover_every_open_lead_once_in_order(client, leads):
+    pages = _pages(client, {"limit": 4})
+    rows = [row for page in pages for row in page]
+    assert [len(page) for page in pages] == [4, 4, 3]
+    assert sorted(row["id"] for row in rows) == sorted(leads[:11])
+    keys = [(row["match_score"], row["posted_at"], row["id"]) for row in rows]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_last_page_has_no_cursor(client, leads):
+    res = client.get("/leads", params={"limit": 11}, headers=AUTH)
+    assert len(res.json()) == 11
+    assert "X-Next-Cursor" not in res.headers
+
+
+def test_filters_apply_across_pages(client, leads):
+    rows = [row for page in _pages(client, {"limit": 2, "source": "upwork"}) for row in page]
+    assert rows and {row["source"] for row in rows} == {"upwork"}
+    assert len(rows) == 5  # leads 1, 3, 5, 7, 9; 11 is archived
+
+
+def test_list_view_drops_heavy_fields(client, leads):
+    row = client.get("/leads", params={"view": "list", "limit": 1}, headers=AUTH).json()[0]
+    assert "description" not in row
+    assert "description" in client.get("/leads", params={"limit": 1}, headers=AUTH).json()[0]
+
+
+def test_invalid_cursor_is_rejected(client, leads):
+    assert client.get("/leads", params={"cursor": "not-a-cursor"}, headers=AUTH).status_code == 400
+
+
+def test_stats_count_every_open_lead(client, leads):
+    stats = client.get("/leads/stats", headers=AUTH).json()
+    assert stats == {
+        "total": 11,
+        "agencies": {"ascend": 2},
+        "applied": 1,
+        "sources": {"remoteok": 6, "upwork": 5},
+    }
@@ -0,0 +1,26 @@
+import migrations
+from database import get_read_connection
+
+
+def _index_names():
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        return {row["name"] for row in cur.fetchall()}
+
+
+def test_every_migration_is_recorded():
+    assert migrations.applied_versions() == {version for version, _, _ in migrations.MIGRATIONS}
+
+
+def test_rerun_applies_nothing():
+    assert migrations.run_migrations() == []
+
+
+def test_versions_are_unique_and_in_order():
+    versions = [version for version, _, _ in migrations.MIGRATIONS]
+    assert versions == sorted(set(versions))
+
+
+def test_hot_path_indexes_exist():
+    assert {"idx_job_leads_status_keyset", "idx_job_leads_unscored"} <= _index_names()
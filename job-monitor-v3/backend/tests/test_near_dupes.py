@@ -0,0 +1,73 @@
+import random
+
+import fetchers
+import near_dupes
+from conftest import make_lead
+from database import get_read_connection
+
+POSTING = (
+    "Senior Python engineer to build and maintain our data ingestion pipeline, "
+    "integrate third party APIs, write automated tests and own deployments on AWS. "
+    "Remote friendly, long term contract, start next week."
+)
+
+
+def _flip(value, bits):
+    """`value` with the given bit positions inverted, kept signed 64-bit."""
+    for bit in bits:
+        value ^= 1 << bit
+    return near_dupes._to_signed(value & ((1 << 64) - 1))
+
+
+def test_simhash_ignores_case_markup_and_spacing():
+    a = near_dupes.simhash("Python engineer", POSTING)
+    assert a == near_dupes.simhash("PYTHON  ENGINEER", "<p>" + POSTING.upper().replace(" ", "\n ") + "</p>")
+    assert -(1 << 63) <= a < (1 << 63)
+
+
+def test_short_texts_get_no_fingerprint():
+    assert near_dupes.simhash("Python dev", "short description") is None
+
+
+def test_small_edit_stays_close_and_unrelated_text_does_not():
+    base = near_dupes.simhash("Python engineer", POSTING)
+    edited = near_dupes.simhash("Python engineer", POSTING.replace("next week", "next month"))
+    other = near_dupes.simhash("Bookkeeper", " ".join(f"ledger{i} invoice{i}" for i in range(20)))
+    distance = lambda a, b: bin((a ^ b) & ((1 << 64) - 1)).count("1")
+    assert distance(base, edited) < distance(base, other)
+    assert distance(base, other) > near_dupes.NEAR_DUP_MAX_DISTANCE
+
+
+def test_index_finds_fingerprints_up_to_the_max_distance():
+    rng = random.Random(7)
+    index = near_dupes.NearDuplicateIndex()
+    value = near_dupes._to_signed(rng.getrandbits(64))
+    index.add("lead-a", value)
+    for _ in range(50):
+        within = rng.sample(range(64), near_dupes.NEAR_DUP_MAX_DISTANCE)
+        assert index.find(_flip(value, within)) == "lead-a"
+    beyond = rng.sample(range(64), near_dupes.NEAR_DUP_MAX_DISTANCE + 1)
+    assert index.find(_flip(value, beyond)) is None
+
+
+def test_index_returns_the_closest_match_and_skips_removed_slots():
+    index = near_dupes.NearDuplicateIndex()
+    value = 0x1234_5678_9ABC_DEF0
+    far = index.add("far", _flip(value, [1, 2]))
+    index.add("near", _flip(value, [1]))
+    assert index.find(value) == "near"
+    index.remove(far)
+    assert len(index) == 1
+    assert index.find(_flip(value, [2])) == "near"
+
+
+def test_save_leads_links_reposts_to_the_canonical_lead():
+    original = make_lead(0, title="Python engineer", description=POSTING)
+    repost = make_lead(1, source="remoteok", title="Python engineer", description=POSTING + " Apply today.")
+    saved = fetchers.save_leads([original, repost])
+    assert len(saved) == 2
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT status, duplicate_of FROM job_leads WHERE id = ?", (saved[1],))
+        row = cur.fetchone()
+    assert (row["status"], row["duplicate_of"]) == ("duplicate", saved[0])
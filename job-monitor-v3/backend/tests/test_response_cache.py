@@ -0,0 +1,78 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import fetchers
+import main
+import response_cache
+from conftest import make_lead
+from database import get_write_connection
+
+AUTH = {"Authorization": f"Bearer {main.API_KEY}"}
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def lead_id():
+    return fetchers.save_leads([make_lead(0)])[0]
+
+
+def _revalidate(client, path, etag):
+    return client.get(path, headers={**AUTH, "If-None-Match": etag})
+
+
+def test_unchanged_table_revalidates_with_304(client, lead_id):
+    first = client.get("/leads", headers=AUTH)
+    assert first.status_code == 200 and first.headers["ETag"]
+    again = _revalidate(client, "/leads", first.headers["ETag"])
+    assert again.status_code == 304 and again.headers["ETag"] == first.headers["ETag"]
+
+
+@pytest.mark.parametrize("write", [
+    "UPDATE job_leads SET budget = '$900' WHERE id = ?",           # column no change kind covers
+    "UPDATE job_leads SET claimed_by = 'worker' WHERE id = ?",     # bookkeeping only
+    "DELETE FROM job_leads WHERE id = ?",
+])
+def test_any_job_leads_write_invalidates_the_etag(client, lead_id, write):
+    etag = client.get(f"/leads/{lead_id}", headers=AUTH).headers["ETag"]
+    etag_list = client.get("/leads", headers=AUTH).headers["ETag"]
+    with get_write_connection() as conn:
+        conn.cursor().execute(write, (lead_id,))
+    assert _revalidate(client, f"/leads/{lead_id}", etag).status_code != 304
+    assert _revalidate(client, "/leads", etag_list).status_code == 200
+
+
+def test_fresh_body_after_a_write(client, lead_id):
+    client.get(f"/leads/{lead_id}", headers=AUTH)
+    with get_write_connection() as conn:
+        conn.cursor().execute("UPDATE job_leads SET budget = '$900' WHERE id = ?", (lead_id,))
+    assert client.get(f"/leads/{lead_id}", headers=AUTH).json()["budget"] == "$900"
+
+
+def test_etag_depends_on_the_query_but_not_the_api_key(client, lead_id):
+    etag = client.get("/leads", params={"limit": 5}, headers=AUTH).headers["ETag"]
+    assert client.get("/leads", params={"limit": 6}, headers=AUTH).headers["ETag"] != etag
+    keyed = client.get("/leads", params={"limit": 5, "api_key": main.API_KEY})
+    assert keyed.headers["ETag"] == etag
+
+
+def test_repeat_requests_are_served_from_the_cache(client, lead_id):
+    client.get("/leads", headers=AUTH)
+    hits = response_cache.get_stats()["hits"]
+    client.get("/leads", headers=AUTH)
+    assert response_cache.get_stats()["hits"] == hits + 1
+
+
+def test_large_bodies_are_sent_pre_gzipped(client):
+    fetchers.save_leads([make_lead(n) for n in range(20)])
+    res = client.get("/leads", headers={**AUTH, "Accept-Encoding": "gzip"})
+    assert res.headers["Content-Encoding"] == "gzip"
+    assert len(res.json()) == 20  # decoded once, not double-compressed
+    raw = client.get("/leads", headers={**AUTH, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in raw.headers
+    assert json.loads(raw.content) == res.json()
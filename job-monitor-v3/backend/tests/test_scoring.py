@@ -0,0 +1,83 @@
+from datetime import datetime, timedelta
+
+import fetchers
+import scoring
+from conftest import make_lead, run_async
+from database import get_read_connection, get_write_connection
+
+
+def _lead(lead_id):
+    with get_read_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("SELECT * FROM job_leads WHERE id = ?", (lead_id,))
+        return dict(cur.fetchone())
+
+
+def _expire_leases():
+    past = (datetime.now() - timedelta(seconds=1)).isoformat()
+    with get_write_connection() as conn:
+        conn.cursor().execute("UPDATE job_leads SET claim_expires_at = ? WHERE claimed_by IS NOT NULL", (past,))
+
+
+def test_claim_leases_each_lead_once():
+    ids = fetchers.save_leads([make_lead(n) for n in range(3)])
+    token, rows = run_async(scoring.claim_leads(limit=2))
+    other, more = run_async(scoring.claim_leads(limit=5))
+    assert len(rows) == 2 and len(more) == 1
+    assert {r["id"] for r in rows} | {r["id"] for r in more} == set(ids)
+    assert all(_lead(r["id"])["claimed_by"] == token for r in rows)
+    assert run_async(scoring.claim_leads())[1] == []
+
+
+def test_duplicates_and_blank_descriptions_are_not_claimed():
+    fetchers.save_leads([make_lead(0, description=""), make_lead(1)])
+    with get_write_connection() as conn:
+        conn.cursor().execute("UPDATE job_leads SET duplicate_of = 'upwork_ext-9' WHERE external_id = 'ext-1'")
+    assert run_async(scoring.claim_leads())[1] == []
+
+
+def test_expired_lease_is_reclaimed_and_the_old_claim_cannot_save():
+    [lead_id] = fetchers.save_leads([make_lead(0)])
+    stale, _ = run_async(scoring.claim_leads())
+    _expire_leases()
+    fresh, rows = run_async(scoring.claim_leads())
+    assert [r["id"] for r in rows] == [lead_id] and fresh != stale
+
+    run_async(scoring.save_scores(stale, {lead_id: ("ascend", 0.9, 88)}))
+    assert _lead(lead_id)["match_score"] == 0  # the stale token matched no row
+    run_async(scoring.save_scores(fresh, {lead_id: ("ascend", 0.9, 88)}))
+    lead = _lead(lead_id)
+    assert (lead["agency_match"], lead["match_score"], lead["claimed_by"]) == ("ascend", 88, None)
+    assert lead["scored_at"] is not None
+
+
+def test_scored_leads_are_not_claimed_again():
+    [lead_id] = fetchers.save_leads([make_lead(0)])
+    token, _ = run_async(scoring.claim_leads())
+    run_async(scoring.save_scores(token, {lead_id: ("apex", 0.8, 0)}))
+    _expire_leases()
+    assert run_async(scoring.claim_leads())[1] == []
+
+
+def test_failed_classification_keeps_its_lease():
+    [lead_id] = fetchers.save_leads([make_lead(0)])
+    token, _ = run_async(scoring.claim_leads())
+    assert run_async(scoring.save_scores(token, {lead_id: fetchers.UNCLASSIFIED})) == 0
+    assert _lead(lead_id)["claimed_by"] == token
+    assert run_async(scoring.claim_leads())[1] == []
+    _expire_leases()
+    assert [r["id"] for r in run_async(scoring.claim_leads())[1]] == [lead_id]
+
+
+def test_lead_is_given_up_after_max_attempts(monkeypatch):
+    monkeypatch.setattr(scoring, "AI_MAX_SCORE_ATTEMPTS", 2)
+    [lead_id] = fetchers.save_leads([make_lead(0)])
+    for attempt in (1, 2):
+        token, rows = run_async(scoring.claim_leads())
+        assert [r["id"] for r in rows] == [lead_id]
+        run_async(scoring.save_scores(token, {lead_id: fetchers.UNCLASSIFIED}))
+        assert _lead(lead_id)["score_attempts"] == attempt
+        _expire_leases()
+    lead = _lead(lead_id)
+    assert lead["scored_at"] is not None and lead["claimed_by"] is None and lead["match_score"] == 0
+    assert run_async(scoring.claim_leads())[1] == []
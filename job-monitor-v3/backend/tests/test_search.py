@@ -0,0 +1,68 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import fetchers
+import main
+import search
+from conftest import make_lead
+from database import get_write_connection
+
+AUTH = {"Authorization": f"Bearer {main.API_KEY}"}
+
+
+@pytest.fixture
+def leads():
+    return fetchers.save_leads([
+        make_lead(0, title="Kubernetes platform engineer", description="Run our clusters. " * 10),
+        make_lead(1, title="Shopify storefront developer", description="Liquid themes and apps. " * 10,
+                  company="Acme Retail"),
+        make_lead(2, source="remoteok", title="Kubernetes consultant", description="Short audit. " * 10),
+    ])
+
+
+def _search(text, **filters):
+    clauses, params = main._lead_filters(status="new", **filters)
+    return search.search_leads(text, clauses, params, ["id", "title"])
+
+
+def test_fts5_query_quotes_every_term_and_prefixes_the_last():
+    assert search._fts5_query('c++ "quoted" NOT near(') == '"c++" """quoted""" "NOT" "near("*'
+
+
+@pytest.mark.parametrize("text", [
+    'kubernetes"', '"unbalanced', "title:kubernetes", "kubernetes AND", "OR", "NOT kubernetes",
+    "NEAR(kubernetes engineer)", "kube*", "-kubernetes", "(kubernetes", "^kubernetes", "{title}: x",
+])
+def test_operator_and_quote_input_never_reaches_fts5_syntax(leads, text):
+    _search(text)  # must not raise
+
+
+def test_terms_match_as_words_with_prefix_on_the_last(leads):
+    assert {row["id"] for row in _search("kubernetes")} == {leads[0], leads[2]}
+    assert [row["id"] for row in _search("shopi")] == [leads[1]]
+    assert [row["id"] for row in _search("acme")] == [leads[1]]  # company is indexed
+    assert _search("   ") == []
+
+
+def test_results_are_highlighted_and_filtered(leads):
+    [row] = _search("kubernetes", source="remoteok")
+    assert row["id"] == leads[2]
+    assert row["title_highlight"] == "<mark>Kubernetes</mark> consultant"
+
+
+def test_index_follows_updates_and_deletes(leads):
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        cur.execute("UPDATE job_leads SET title = 'Terraform engineer' WHERE id = ?", (leads[0],))
+        cur.execute("DELETE FROM job_leads WHERE id = ?", (leads[2],))
+    assert _search("kubernetes") == []
+    assert [row["id"] for row in _search("terraform")] == [leads[0]]
+    with get_write_connection() as conn:
+        # Raises if the external-content index no longer matches job_leads.
+        conn.cursor().execute("INSERT INTO job_leads_fts (job_leads_fts) VALUES ('integrity-check')")
+
+
+def test_endpoint_accepts_hostile_queries(leads):
+    client = TestClient(main.app)
+    res = client.get("/leads/search", params={"q": 'kubernetes" OR title:*'}, headers=AUTH)
+    assert res.status_code == 200
@@ -0,0 +1,43 @@
+import fetchers
+import seen_filter
+from conftest import make_lead
+
+
+def test_saved_leads_are_seen_and_skipped_on_refetch():
+    leads = [make_lead(n) for n in range(3)]
+    assert len(fetchers.save_leads(leads)) == 3
+    assert all(seen_filter.index.seen(lead["source"], lead["external_id"]) for lead in leads)
+    assert fetchers.save_leads(leads) == []
+    assert seen_filter.FALSE_POSITIVES.total() == 0
+
+
+def test_unconfirmed_hit_is_saved_and_counted():
+    # A fingerprint collision looks like a key the filter has but job_leads doesn't.
+    lead = make_lead(0)
+    seen_filter.index.add_many([(lead["source"], lead["external_id"])])
+    before = seen_filter.FALSE_POSITIVES.total()
+    assert fetchers.save_leads([lead]) == ["upwork_ext-0"]
+    assert seen_filter.FALSE_POSITIVES.total() == before + 1
+
+
+def test_confirm_checks_hits_in_chunks(monkeypatch):
+    monkeypatch.setattr(seen_filter, "_CONFIRM_CHUNK", 2)
+    ids = fetchers.save_leads([make_lead(n) for n in range(5)])
+    assert seen_filter.confirm(ids + ["upwork_missing"]) == set(ids)
+
+
+def test_load_rebuilds_from_job_leads():
+    fetchers.save_leads([make_lead(n) for n in range(4)])
+    seen_filter.index = seen_filter.SeenFilter()
+    assert seen_filter.index.load() == 4
+    assert seen_filter.index.seen("upwork", "ext-3")
+    assert not seen_filter.index.seen("upwork", "ext-4")
+
+
+def test_recent_keys_merge_into_the_sorted_array(monkeypatch):
+    monkeypatch.setattr(seen_filter, "SEEN_FILTER_MERGE_SIZE", 3)
+    index = seen_filter.SeenFilter()
+    index.add_many([("s", str(n)) for n in range(5)])
+    assert len(index) == 5 and len(index._recent) < 3
+    assert list(index._sorted) == sorted(index._sorted)
+    assert all(index.seen("s", str(n)) for n in range(5))
@@ -0,0 +1,135 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+import fetchers
+import source_scheduler
+from conftest import run_async
+from database import get_write_connection
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture(autouse=True)
+def no_jitter(monkeypatch):
+    monkeypatch.setattr(source_scheduler, "SOURCE_POLL_JITTER", 0.0)
+
+
+def _delay(updates):
+    return (datetime.fromisoformat(updates["next_poll_at"]) - NOW).total_seconds()
+
+
+def test_failures_back_off_exponentially_up_to_the_cap(monkeypatch):
+    monkeypatch.setattr(source_scheduler, "SOURCE_BACKOFF_MAX_SECS", 5000)
+    source = {"poll_interval_secs": 300}
+    delays = []
+    for _ in range(6):
+        updates = source_scheduler.plan(source, error="HTTP 503", now=NOW)
+        delays.append(_delay(updates))
+        source.update(updates)
+    assert delays == [600, 1200, 2400, 4800, 5000, 5000]
+    assert source["consecutive_failures"] == 6 and source["last_error"] == "HTTP 503"
+
+
+def test_source_is_disabled_after_too_many_failures(monkeypatch):
+    monkeypatch.setattr(source_scheduler, "SOURCE_DISABLE_AFTER_FAILURES", 3)
+    source = {"poll_interval_secs": 300}
+    for _ in range(2):
+        source.update(source_scheduler.plan(source, error="boom", now=NOW))
+        assert "enabled" not in source
+    source.update(source_scheduler.plan(source, error="boom", now=NOW))
+    assert source["enabled"] == 0 and "3 consecutive failures" in source["disabled_reason"]
+
+
+def test_success_resets_failures_and_tracks_the_target_yield():
+    busy = source_scheduler.plan({"poll_interval_secs": 900, "consecutive_failures": 4}, new_leads=50, now=NOW)
+    quiet = source_scheduler.plan({"poll_interval_secs": 900}, new_leads=0, now=NOW)
+    assert busy["consecutive_failures"] == 0
+    assert busy["poll_interval_secs"] == 450  # at most halved per step
+    assert quiet["poll_interval_secs"] == 1800  # at most doubled per step
+
+
+def test_interval_stays_within_bounds(monkeypatch):
+    monkeypatch.setattr(source_scheduler, "SOURCE_POLL_MIN_SECS", 120)
+    monkeypatch.setattr(source_scheduler, "SOURCE_POLL_MAX_SECS", 1000)
+    assert source_scheduler.plan({"poll_interval_secs": 130}, new_leads=100, now=NOW)["poll_interval_secs"] == 120
+    assert source_scheduler.plan({"poll_interval_secs": 900}, new_leads=0, now=NOW)["poll_interval_secs"] == 1000
+
+
+def test_error_rate_stretches_the_delay():
+    updates = source_scheduler.plan({"poll_interval_secs": 600, "error_rate": 0.5, "yield_avg": 5}, new_leads=5, now=NOW)
+    assert updates["error_rate"] == 0.35
+    assert _delay(updates) == pytest.approx(600 * 1.35)
+
+
+@pytest.fixture
+def blocked_fetch(monkeypatch):
+    """Fetches block until the returned event is set."""
+    release = threading.Event()
+
+    def fetch_source(source, started=None):
+        release.wait(5)
+        return 2
+    monkeypatch.setattr(fetchers, "_fetch_source", fetch_source)
+    yield release
+    release.set()
+
+
+def _wait_until_released(source_id):
+    # Future.result() can return just before the done-callbacks that release the source run.
+    deadline = time.monotonic() + 5
+    while source_id in fetchers.running_sources() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return source_id not in fetchers.running_sources()
+
+
+@pytest.fixture
+def source():
+    row = {"id": "feed-1", "name": "Feed One", "type": "rss", "url": "http://127.0.0.1:9/feed", "enabled": 1,
+           "poll_interval_secs": 600}
+    with get_write_connection() as conn:
+        conn.cursor().execute(
+            "INSERT INTO job_sources (id, name, type, url, enabled, poll_interval_secs) VALUES (?, ?, ?, ?, ?, ?)",
+            tuple(row.values()),
+        )
+    return row
+
+
+def test_a_running_source_is_not_started_twice(blocked_fetch, source):
+    future = fetchers.start_fetch(source)
+    assert future is not None
+    assert fetchers.start_fetch(source) is None
+    assert fetchers.running_sources() == {"feed-1"}
+    events = list(fetchers.run_all_fetchers())  # /leads/refresh while the scheduler's fetch runs
+    assert "log:Skipped Feed One: still fetching from an earlier run" in events
+    assert events[-1] == "done:0"
+    blocked_fetch.set()
+    assert future.result(timeout=5) == 2
+    assert _wait_until_released("feed-1")
+
+
+def test_timed_out_poll_backs_off_but_keeps_the_source_running(monkeypatch, blocked_fetch, source):
+    monkeypatch.setattr(source_scheduler, "SOURCE_FETCH_TIMEOUT", 0.05)
+    future = fetchers.start_fetch(source)
+    run_async(source_scheduler._poll(source, future))
+    [row] = [r for r in run_async(source_scheduler.get_schedule()) if r["id"] == "feed-1"]
+    assert row["consecutive_failures"] == 1 and "timed out" in row["last_error"]
+    assert row["in_flight"] is True
+    assert fetchers.start_fetch(source) is None
+    blocked_fetch.set()
+    future.result(timeout=5)
+    assert _wait_until_released("feed-1")
+    assert fetchers.start_fetch(source) is not None
+
+
+def test_due_sources_puts_never_polled_first():
+    later = (datetime.now() - timedelta(minutes=1)).isoformat()
+    future = (datetime.now() + timedelta(hours=1)).isoformat()
+    with get_write_connection() as conn:
+        cur = conn.cursor()
+        for source_id, next_poll in (("due", later), ("new", None), ("later", future)):
+            cur.execute("INSERT INTO job_sources (id, name, type, url, enabled, next_poll_at) VALUES (?, ?, 'rss', 'u', 1, ?)",
+                        (source_id, source_id, next_poll))
+    assert [s["id"] for s in run_async(source_scheduler.due_sources())] == ["new", "due"]
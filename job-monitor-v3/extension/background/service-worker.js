@@ -369,10 +369,11 @@ function broadcastProgress() {
     });
 }
 
-async function ingestJobs(jobs) {
+// POST jobs to /leads/ingest; returns how many the backend accepted
+async function postJobs(jobs, attempt = 0) {
     try {
         const state = await chrome.storage.local.get(['apiKey']);
-        await fetch(`${API_BASE}/leads/ingest`, {
+        const res = await fetch(`${API_BASE}/leads/ingest`, {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json',
@@ -380,11 +381,36 @@ async function ingestJobs(jobs) {
             },
             body: JSON.stringify({ jobs })
         });
-        const storageState = await chrome.storage.local.get(['harvested']);
-        await chrome.storage.local.set({ harvested: (storageState.harvested || 0) + jobs.length });
+        // Backend ingest queue is full: wait as instructed and resend the same batch
+        if (res.status === 429 && attempt < 5) {
+            const retryAfter = parseInt(res.headers.get('Retry-After') || '2', 10);
+            await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+            return postJobs(jobs, attempt + 1);
+        }
+        // Batch larger than the backend accepts: send it in halves
+        if (res.status === 413 && jobs.length > 1) {
+            const mid = Math.ceil(jobs.length / 2);
+            return (await postJobs(jobs.slice(0, mid))) + (await postJobs(jobs.slice(mid)));
+        }
+        if (!res.ok) {
+            console.error(`Ingest rejected (${res.status}) for ${jobs.length} jobs`);
+            return 0;
+        }
+        const body = await res.json();
+        return body.count ?? jobs.length;
     } catch (e) {
         console.error('Ingest Error:', e);
+        return 0;
+    }
+}
+
+async function ingestJobs(jobs) {
+    const accepted = await postJobs(jobs);
+    if (accepted > 0) {
+        const storageState = await chrome.storage.local.get(['harvested']);
+        await chrome.storage.local.set({ harvested: (storageState.harvested || 0) + accepted });
     }
+    return accepted;
 }
 
 function buildSearchUrl(platform, keyword) {
@@ -203,13 +203,19 @@ harvestBtn.addEventListener('click', async () => {
 
             if (response) {
                 if (response.type === 'jobs' && response.jobs.length > 0) {
-                    await sendToBackend(response.jobs);
-                    // Update count
-                    const state = await chrome.storage.local.get(['harvested']);
-                    const newCount = (state.harvested || 0) + response.jobs.length;
-                    await chrome.storage.local.set({ harvested: newCount });
-                    harvestedCountEl.textContent = newCount;
-                    harvestBtn.textContent = `✅ Harvested ${response.jobs.length} jobs!`;
+                    const accepted = await sendToBackend(response.jobs);
+                    if (accepted > 0) {
+                        // Update count with what the backend actually accepted
+                        const state = await chrome.storage.local.get(['harvested']);
+                        const newCount = (state.harvested || 0) + accepted;
+                        await chrome.storage.local.set({ harvested: newCount });
+                        harvestedCountEl.textContent = newCount;
+                        harvestBtn.textContent = accepted === response.jobs.length
+                            ? `✅ Harvested ${accepted} jobs!`
+                            : `⚠️ Saved ${accepted} of ${response.jobs.length} jobs`;
+                    } else {
+                        harvestBtn.textContent = '❌ Backend rejected jobs';
+                    }
 
                 } else if (response.type === 'people' && response.people.length > 0) {
                     await sendContactsToBackend(response.people);
@@ -254,8 +260,9 @@ async function sendContactsToBackend(contacts) {
     }
 }
 
-// Send jobs to backend
-async function sendToBackend(jobs) {
+// Send jobs to backend; returns how many it accepted.
+// Same handling as the service worker: 429 waits Retry-After and resends, 413 splits the batch.
+async function sendToBackend(jobs, attempt = 0) {
     try {
         const state = await chrome.storage.local.get(['apiUrl', 'apiKey']);
         const baseUrl = state.apiUrl || 'http://localhost:8002';
@@ -268,10 +275,24 @@ async function sendToBackend(jobs) {
             },
             body: JSON.stringify({ jobs })
         });
-        return await response.json();
+        if (response.status === 429 && attempt < 5) {
+            const retryAfter = parseInt(response.headers.get('Retry-After') || '2', 10);
+            await new Promise(resolve => setTimeout(resolve, retryAfter * 1000));
+            return sendToBackend(jobs, attempt + 1);
+        }
+        if (response.status === 413 && jobs.length > 1) {
+            const mid = Math.ceil(jobs.length / 2);
+            return (await sendToBackend(jobs.slice(0, mid))) + (await sendToBackend(jobs.slice(mid)));
+        }
+        if (!response.ok) {
+            console.error(`Backend rejected ${jobs.length} jobs: HTTP ${response.status}`);
+            return 0;
+        }
+        const result = await response.json();
+        return result.count ?? jobs.length;
     } catch (err) {
         console.error('Backend error:', err);
-        throw err;
+        return 0;
     }
 }
 
@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import ReactMarkdown from "react-markdown";
 
 const getApiBase = () => {
@@ -20,7 +20,7 @@ interface JobLead {
   id: string;
   source: string;
   title: string;
-  description: string;
+  description: string; // undefined when loaded via GET /leads?view=list
   url: string;
   agency_match: string;
   match_score: number;
@@ -36,6 +36,17 @@ interface JobLead {
   client_plan?: string;
 }
 
+// GET /leads/stats: counts over every open lead, independent of how many pages are loaded
+interface LeadStats {
+  total: number;
+  agencies: Record<string, number>;
+  applied: number;
+  sources: Record<string, number>;
+}
+
+// Leads per /leads page; the list grows a page at a time via X-Next-Cursor
+const LEADS_PAGE_SIZE = 100;
+
 interface SystemHealth {
   status: string;
   metrics: {
@@ -84,6 +95,11 @@ export default function Home() {
   const [sourceFilter, setSourceFilter] = useState("all");
   const [activeTab, setActiveTab] = useState("jobs"); // "jobs" | "notifications"
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [leadStats, setLeadStats] = useState<LeadStats | null>(null);
+  const statsTimer = useRef<ReturnType<typeof setTimeout> | null>(null);
+  const listEnd = useRef<HTMLDivElement | null>(null);
   const [selectedLead, setSelectedLead] = useState<JobLead | null>(null);
   const [aiProposal, setAiProposal] = useState("");
   const [aiPlan, setAiPlan] = useState("");
@@ -258,38 +274,84 @@ export default function Home() {
     setExtProgress(prev => ({ ...prev, isMonitoring: false, phase: 'idle' }));
   };
 
+  // Query string for the server-side list filters behind the agency/source tabs
+  // Read through a ref so timers and stream handlers registered on mount see the current tabs
+  const listFilters = useRef({ filter, sourceFilter });
+  listFilters.current = { filter, sourceFilter };
+  const leadQuery = () => {
+    const { filter, sourceFilter } = listFilters.current;
+    const params = new URLSearchParams({ view: "list", limit: String(LEADS_PAGE_SIZE) });
+    if (filter === "applied") params.set("applied", "true");
+    else if (filter !== "all") params.set("agency", filter);
+    if (sourceFilter !== "all") params.set("source", sourceFilter);
+    return params.toString();
+  };
+
+  // One keyset page of the list projection (heavy text fields are loaded per lead on open via loadLeadDetail)
+  const fetchLeadPage = async (cursor: string | null): Promise<{ page: JobLead[]; next: string | null }> => {
+    const query = cursor ? `&cursor=${encodeURIComponent(cursor)}` : "";
+    const res = await fetch(`${getApiBase()}/leads?${leadQuery()}${query}`, {
+      headers: getHeaders()
+    });
+    if (res.status === 401) { router.push("/login"); throw new Error("Unauthorized"); }
+    if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
+    const data = await res.json();
+    if (!Array.isArray(data)) {
+      console.error("API returned non-array data:", data);
+      throw new Error("Invalid data received from server");
+    }
+    return { page: data, next: res.headers.get("X-Next-Cursor") };
+  };
+
+  // Header counts come from the server aggregate, not from the (partially loaded) list
+  const fetchStats = () => {
+    fetch(`${getApiBase()}/leads/stats`, { headers: getHeaders() })
+      .then(res => (res.ok ? res.json() : null))
+      .then(data => { if (data) setLeadStats(data); })
+      .catch(err => console.error("Failed to fetch lead stats", err));
+  };
+
+  // Debounced so a burst of pushed changes refreshes the header once
+  const scheduleStatsRefresh = () => {
+    if (statsTimer.current) clearTimeout(statsTimer.current);
+    statsTimer.current = setTimeout(fetchStats, 2000);
+  };
+
   const fetchLeads = () => {
     // Only show loading if we have no data yet to keep view stable
     if (leads.length === 0) setLoading(true);
     setError("");
+    fetchStats();
 
-    const apiBase = getApiBase();
-
-    fetch(`${apiBase}/leads`, {
-      headers: getHeaders()
-    })
-      .then(res => {
-        if (res.status === 401) { router.push("/login"); throw new Error("Unauthorized"); }
-        if (!res.ok) throw new Error(`HTTP error! status: ${res.status}`);
-        return res.json();
-      })
-      .then(data => {
-        if (Array.isArray(data)) {
-          setLeads(data);
-        } else {
-          console.error("API returned non-array data:", data);
-          setLeads([]);
-          setError("Invalid data received from server");
-        }
+    // First page only; further pages are fetched on scroll or "Load more" (loadMoreLeads)
+    fetchLeadPage(null)
+      .then(({ page, next }) => {
+        setLeads(page);
+        setNextCursor(next);
         setLoading(false);
       })
       .catch(err => {
         console.error("Failed to fetch leads", err);
-        setError(`Failed to reach ${apiBase}: ${err.message}`);
+        setError(`Failed to reach ${getApiBase()}: ${err.message}`);
         setLoading(false);
       });
   };
 
+  const loadMoreLeads = () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    fetchLeadPage(nextCursor)
+      .then(({ page, next }) => {
+        setLeads(prev => {
+          const have = new Set(prev.map(l => l.id));
+          return [...prev, ...page.filter(l => !have.has(l.id))];
+        });
+        setNextCursor(next);
+      })
+      .catch(err => console.error("Failed to load more leads", err))
+      .finally(() => setLoadingMore(false));
+  };
+
   const refreshJobs = async () => {
     // Don't clear view, just show progress bar
     if (leads.length === 0) setLoading(true);
@@ -326,18 +388,47 @@ export default function Home() {
       .catch(err => console.error("Failed to fetch system health", err));
   };
 
+  // Merge a pushed change into the list, keeping detail fields already loaded for that lead
+  const applyLeadChange = (change: { lead_id: string; lead: JobLead | null }) => {
+    setLeads(prev => {
+      const lead = change.lead;
+      if (!lead || lead.status !== "new") return prev.filter(l => l.id !== change.lead_id);
+      if (!prev.some(l => l.id === lead.id)) return [lead, ...prev];
+      return prev.map(l => (l.id === lead.id ? { ...l, ...lead } : l));
+    });
+  };
+
+  // Reload the first page whenever the agency/source tab changes (also the initial load)
   useEffect(() => {
     fetchLeads();
+  }, [filter, sourceFilter]);
+
+  // Fetch the next page when the end of the list scrolls into view
+  useEffect(() => {
+    const end = listEnd.current;
+    if (!end || !nextCursor) return;
+    const observer = new IntersectionObserver(entries => {
+      if (entries[0].isIntersecting) loadMoreLeads();
+    }, { rootMargin: "400px" });
+    observer.observe(end);
+    return () => observer.disconnect();
+  }, [nextCursor, loadingMore]);
+
+  useEffect(() => {
     fetchSystemHealth();
-    const interval = setInterval(fetchLeads, 60000); // Poll every minute
+    // Lead updates are pushed over SSE (EventSource reconnects with Last-Event-ID by itself)
+    const key = localStorage.getItem("job_monitor_api_key") || "";
+    const stream = new EventSource(`${getApiBase()}/leads/stream?api_key=${encodeURIComponent(key)}`);
+    stream.addEventListener("lead", e => {
+      applyLeadChange(JSON.parse((e as MessageEvent).data));
+      scheduleStatsRefresh();
+    });
+    stream.addEventListener("reset", () => fetchLeads());
     const healthInterval = setInterval(fetchSystemHealth, 30000); // Poll health every 30s
     return () => {
-      clearInterval(interval);
-      clearInterval(healthInterval);
-    };
-    return () => {
-      clearInterval(interval);
+      stream.close();
       clearInterval(healthInterval);
+      if (statsTimer.current) clearTimeout(statsTimer.current);
     };
   }, []);
 
@@ -385,13 +476,46 @@ export default function Home() {
 
 
 
+  // POST to a /stream generation endpoint and feed the growing text to onText as tokens arrive (SSE over fetch)
+  const streamGeneration = async (path: string, payload: object, onText: (text: string) => void) => {
+    const res = await fetch(`${getApiBase()}${path}/stream`, {
+      method: "POST",
+      headers: getHeaders(),
+      body: JSON.stringify(payload),
+    });
+    if (res.status === 401) { router.push("/login"); return; }
+    if (!res.ok || !res.body) throw new Error(res.status === 404 ? "Not found" : `HTTP error! status: ${res.status}`);
+
+    const reader = res.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = "";
+    let text = "";
+    while (true) {
+      const { done, value } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const frames = buffer.split("\n\n");
+      buffer = frames.pop() || "";
+      for (const frame of frames) {
+        const event = frame.match(/^event: (.*)$/m)?.[1];
+        const data = frame.match(/^data: (.*)$/m)?.[1];
+        if (!event || !data) continue;
+        if (event === "token") {
+          text += JSON.parse(data).text;
+          onText(text);
+        } else if (event === "error") {
+          throw new Error(JSON.parse(data).error);
+        }
+      }
+    }
+  };
+
   const generateProposal = async () => {
     if (!selectedLead) return;
     setGenerating(true);
     setAiProposal("");
 
     try {
-      const apiBase = getApiBase();
       const payload = {
         job_id: selectedLead.id === 'manual' ? null : selectedLead.id,
         title: selectedLead.id === 'manual' ? selectedLead.title : null,
@@ -401,15 +525,8 @@ export default function Home() {
         proposal_persona: proposalPersona
       };
 
-      const res = await fetch(`${apiBase}/generate-proposal`, {
-        method: "POST",
-        headers: getHeaders(),
-        body: JSON.stringify(payload),
-      });
-      if (res.status === 401) { router.push("/login"); return; }
-      const data = await res.json();
-      if (data.error) throw new Error(data.error);
-      setAiProposal(data.proposal);
+      // Streamed: text appears as it is generated and is saved to the lead when complete
+      await streamGeneration("/generate-proposal", payload, setAiProposal);
     } catch (err: any) {
       alert("Error: " + err.message);
     } finally {
@@ -423,7 +540,6 @@ export default function Home() {
     setAiPlan("");
 
     try {
-      const apiBase = getApiBase();
       const payload = {
         job_id: selectedLead.id === 'manual' ? null : selectedLead.id,
         title: selectedLead.id === 'manual' ? selectedLead.title : null,
@@ -432,15 +548,7 @@ export default function Home() {
         agency: selectedLead.agency_match || 'socketlogic'
       };
 
-      const res = await fetch(`${apiBase}/generate-action-plan`, {
-        method: "POST",
-        headers: getHeaders(),
-        body: JSON.stringify(payload),
-      });
-      if (res.status === 401) { router.push("/login"); return; }
-      const data = await res.json();
-      if (data.error) throw new Error(data.error);
-      setAiPlan(data.plan);
+      await streamGeneration("/generate-action-plan", payload, setAiPlan);
     } catch (err: any) {
       alert("Error: " + err.message);
     } finally {
@@ -533,6 +641,21 @@ export default function Home() {
     window.open(`${apiBase}/leads/export-csv?api_key=${key}`, '_blank');
   };
 
+  // Fetch description/proposal/plan, which the list view omits
+  const loadLeadDetail = async (lead: JobLead) => {
+    try {
+      const res = await fetch(`${getApiBase()}/leads/${encodeURIComponent(lead.id)}`, { headers: getHeaders() });
+      if (res.status === 401) { router.push("/login"); return; }
+      if (!res.ok) return;
+      const full: JobLead = await res.json();
+      setSelectedLead(prev => (prev && prev.id === full.id ? { ...prev, ...full } : prev));
+      setAiProposal(prev => prev || full.client_proposal || "");
+      setAiPlan(prev => prev || full.client_plan || "");
+    } catch (err) {
+      console.error("Failed to load lead detail", err);
+    }
+  };
+
   // Open Lead Modal
   const openLead = (lead: JobLead) => {
     setSelectedLead(lead);
@@ -540,23 +663,20 @@ export default function Home() {
     setAiPlan(lead.client_plan || "");
     setCompanyAnalysis(null);
     setEnhancedDescription("");
+    if (lead.description === undefined) loadLeadDetail(lead);
   };
 
-  // Computed Stats
+  // Header Stats (server-side aggregate over all open leads)
   const stats = {
-    total: leads.length,
-    ascend: leads.filter(l => l.agency_match === 'ascend').length,
-    apex: leads.filter(l => l.agency_match === 'apex').length,
-    socket: leads.filter(l => l.agency_match === 'socketlogic').length,
-    applied: leads.filter(l => l.applied === 1).length
+    total: leadStats?.total ?? 0,
+    ascend: leadStats?.agencies.ascend ?? 0,
+    apex: leadStats?.agencies.apex ?? 0,
+    socket: leadStats?.agencies.socketlogic ?? 0,
+    applied: leadStats?.applied ?? 0
   };
 
-  // Calculate Source Counts
-  const sources = Array.from(new Set(leads.map(l => l.source)));
-  const sourceCounts = sources.reduce((acc, source) => {
-    acc[source] = leads.filter(l => l.source === source).length;
-    return acc;
-  }, {} as Record<string, number>);
+  // Source Counts
+  const sourceCounts = leadStats?.sources ?? {};
 
   return (
     <main className="min-h-screen bg-gray-950 text-white font-sans flex flex-col">
@@ -1013,6 +1133,19 @@ export default function Home() {
                     </div>
                   ))
                 )}
+
+                {/* Next page: fetched when this comes into view, or on click */}
+                {nextCursor && (
+                  <div ref={listEnd} className="text-center py-4">
+                    <button
+                      onClick={loadMoreLeads}
+                      disabled={loadingMore}
+                      className="text-sm text-blue-400 hover:underline disabled:text-gray-500 disabled:no-underline"
+                    >
+                      {loadingMore ? "Loading..." : "Load more"}
+                    </button>
+                  </div>
+                )}
               </div>
             </>
           ) : (
@@ -1040,6 +1173,7 @@ export default function Home() {
                     key={lead.id}
                     onClick={() => {
                       setSelectedLead(lead);
+                      if (lead.description === undefined) loadLeadDetail(lead);
                     }}
                     className="group bg-gray-900/50 border border-gray-800 p-4 rounded-xl cursor-pointer hover:bg-gray-800 hover:border-gray-700 hover:shadow-lg transition-all duration-200 flex gap-4 items-start relative overflow-hidden"
                   >